@@ -1,25 +1,69 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.exceptions import RequestValidationError
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 try:
-    import shap
-    SHAP_AVAILABLE = True
+    import brotli
 except ImportError:
-    SHAP_AVAILABLE = False
-    print("Warning: SHAP not available. Explanations will be simplified.")
+    brotli = None
 import uvicorn
 import numpy as np
 import pandas as pd
 import joblib
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 import uuid
 import json
 from datetime import datetime
 import os
+import hashlib
+import gzip
+import asyncio
+import threading
+import time
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 
-import os
+from forest_engine import CompiledForest, compile_forest
+from scoring_index import ScoringIndex, ScoringIndexTooLarge
+from explanation_cache import ExplanationCache
+from session_store import AssessmentSession, create_session_store
+from inference_executor import ExecutorOverloaded, create_inference_executor
+from micro_batcher import MicroBatcher
+from log_writer import create_log_writer
+from log_index import create_log_index
+from projection_engine import create_projector
+from json_response import FastJSONResponse
+from model_registry import ModelRegistryError, create_model_registry
+from model_artifact import artifact_metadata, load_forest
+from shadow_scoring import create_shadow_router
+from recommendation_engine import AGE_BAND_AGES, ColumnarRecommender, future_value_factors, session_columns
+from bulk_validation import BulkValidator
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, MetricsRegistry, create_slow_request_profiler, instrument_methods
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loader = None
+    if STARTUP_MODE == "lazy" and active_bundle is None:
+        # Accept traffic (and answer /healthz) while the model loads; /readyz reports when it is done
+        loader = asyncio.create_task(asyncio.to_thread(warm_up))
+    follower = asyncio.create_task(follow_registry()) if MODEL_REGISTRY_POLL_SECONDS > 0 else None
+    candidate = None
+    if CANDIDATE_MODEL_VERSION and candidate_bundle is None:
+        candidate = asyncio.create_task(asyncio.to_thread(load_candidate_in_background, CANDIDATE_MODEL_VERSION))
+    yield
+    for task in (loader, follower, candidate):
+        if task is not None and not task.done():
+            task.cancel()
+    shadow_router.shutdown()
+    if inference_executor is not None:
+        inference_executor.shutdown()
+    if log_writer is not None:
+        log_writer.close()
 
-app = FastAPI(title="Robo-Advisor Pre-Screening Tool")
+app = FastAPI(title="Robo-Advisor Pre-Screening Tool", lifespan=lifespan)
 
 # Add CORS middleware for frontend integration
 app.add_middleware(
@@ -30,225 +74,731 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load the trained model with error handling
-try:
-    model = joblib.load("model.joblib")
-    print("✅ Model loaded successfully")
-except (FileNotFoundError, ModuleNotFoundError) as e:
-    print(f"⚠️ Model loading failed: {e}")
-    print("🔄 Training new model...")
-    import subprocess
-    subprocess.run(["python", "train-script.py"], check=True)
-    model = joblib.load("model.joblib")
-    print("✅ New model trained and loaded")
-
-# Initialize SHAP explainer
-try:
-    if SHAP_AVAILABLE:
-        explainer = shap.TreeExplainer(model)
-        print("✅ SHAP explainer initialized")
-    else:
-        explainer = None
+# Prometheus-style metrics served at /metrics; every worker process keeps its own
+metrics_registry = MetricsRegistry()
+request_count = metrics_registry.counter("robo_http_requests_total", "HTTP requests by method, route and status", ("method", "route", "status"))
+request_seconds = metrics_registry.histogram("robo_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+requests_in_flight = metrics_registry.gauge("robo_http_requests_in_flight", "HTTP requests being served")
+stage_seconds = metrics_registry.histogram("robo_stage_duration_seconds", "Time spent in each hot-path stage", ("stage",))
+
+# Opt-in stack sampling of slow requests (SLOW_REQUEST_PROFILE_RATE), read at /metrics/slow-requests
+slow_request_profiler = create_slow_request_profiler()
+app.add_middleware(
+    MetricsMiddleware,
+    requests=request_count,
+    latency=request_seconds,
+    in_flight=requests_in_flight,
+    profiler=slow_request_profiler
+)
+
+# Startup mode: "eager" loads the model and explainer at import (shared by preloaded gunicorn
+# workers); "lazy" starts serving at once, loads the model in the background and imports SHAP
+# only when the explainer is first needed
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "eager").lower()
+
+# SHAP is imported on first use; None means no import has been attempted yet
+shap = None
+SHAP_AVAILABLE = None
+
+def import_shap():
+    """Import SHAP (heavy: pulls in numba and llvmlite) the first time it is needed"""
+    global shap, SHAP_AVAILABLE
+    if SHAP_AVAILABLE is None:
+        try:
+            import shap as shap_module
+            shap = shap_module
+            SHAP_AVAILABLE = True
+        except ImportError:
+            SHAP_AVAILABLE = False
+            print("Warning: SHAP not available. Explanations will be simplified.")
+    return shap
+
+# Versioned model artifacts; ACTIVE names the version every worker should serve
+model_registry = create_model_registry()
+
+def load_model():
+    """(model, version, metadata) for the registry's active version, else model.joblib (retrained if missing or unreadable)"""
+    active = model_registry.active_version()
+    if active:
+        try:
+            loaded, metadata = model_registry.load(active)
+            print(f"✅ Model version {active} loaded from registry")
+            return loaded, active, metadata
+        except Exception as e:
+            print(f"⚠️ Registry model {active} unavailable, falling back to model.joblib: {e}")
+    try:
+        loaded, metadata = load_local_model()
+        print("✅ Model loaded successfully")
+    except (FileNotFoundError, ModuleNotFoundError) as e:
+        print(f"⚠️ Model loading failed: {e}")
+        print("🔄 Training new model...")
+        import subprocess
+        subprocess.run(["python", "train-script.py"], check=True)
+        loaded, metadata = load_local_model()
+        print("✅ New model trained and loaded")
+    return loaded, UNREGISTERED_VERSION, metadata
+
+# Pickle-free export of model.joblib written by train-script.py (see model_artifact.py)
+MODEL_ARTIFACT_PATH = os.environ.get("MODEL_ARTIFACT_PATH", "model.forest")
+
+def load_local_model():
+    """(model, metadata) from the compact artifact when it was exported from the current model.joblib, else model.joblib"""
+    digest = model_file_digest() if os.path.exists("model.joblib") else None
+    artifact = artifact_metadata(MODEL_ARTIFACT_PATH)
+    if artifact is not None and digest in (None, artifact.get("source_digest")):
+        try:
+            loaded = load_forest(MODEL_ARTIFACT_PATH)
+            print(f"✅ Model loaded from compact artifact {MODEL_ARTIFACT_PATH}")
+            return loaded, {"content_hash": artifact.get("source_digest"), "artifact": MODEL_ARTIFACT_PATH}
+        except Exception as e:
+            print(f"⚠️ Compact model artifact unreadable, loading model.joblib: {e}")
+    elif artifact is not None:
+        print(f"⚠️ {MODEL_ARTIFACT_PATH} was not exported from the current model.joblib, ignoring it")
+    return joblib.load("model.joblib"), {"content_hash": digest}
+
+# Optional inference engine ("sklearn", "compiled" or "lookup")
+INFERENCE_ENGINE = os.environ.get("INFERENCE_ENGINE", "sklearn").lower()
+
+# Above this many rows sklearn's Cython tree traversal beats the compiled engine, so batches go to sklearn
+COMPILED_MAX_ROWS = int(os.environ.get("COMPILED_MAX_ROWS", 256))
+
+# Directory of memory-mapped forest arrays shared by all worker processes (optional)
+MODEL_ARRAYS_PATH = os.environ.get("MODEL_ARRAYS_PATH")
+
+def model_file_digest(path="model.joblib"):
+    """Content hash of a model artifact"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def build_compiled_forest(model, digest=None):
+    """Flatten the forest into the array-backed engine when it is selected"""
+    if INFERENCE_ENGINE != "compiled":
+        return None
+    try:
+        compiled = compile_forest(model)
+        if MODEL_ARRAYS_PATH:
+            # Export once, then map the file read-only so every worker shares the same pages
+            digest = digest or model_file_digest()
+            meta = CompiledForest.read_metadata(MODEL_ARRAYS_PATH)
+            if not meta or meta.get("model_digest") != digest:
+                compiled.save(MODEL_ARRAYS_PATH, metadata={"model_digest": digest})
+            compiled = CompiledForest.load(MODEL_ARRAYS_PATH, mmap_mode="r")
+            print(f"✅ Compiled inference engine memory-mapped from {MODEL_ARRAYS_PATH}")
+        print(f"✅ Compiled inference engine ready ({len(compiled.feature)} nodes)")
+        return compiled
+    except Exception as e:
+        print(f"⚠️ Compiled inference engine unavailable, using sklearn: {e}")
+        return None
+
+def build_explainer(model):
+    """Initialize the SHAP explainer"""
+    try:
+        if import_shap() is not None:
+            # A forest loaded from model.forest is described to SHAP as plain tree arrays
+            tree_explainer = shap.TreeExplainer(model.shap_model() if isinstance(model, CompiledForest) else model)
+            print("✅ SHAP explainer initialized")
+            return tree_explainer
         print("⚠️ SHAP not available, using simplified explanations")
-except Exception as e:
-    print(f"⚠️ SHAP initialization failed: {e}")
-    explainer = None
+    except Exception as e:
+        print(f"⚠️ SHAP initialization failed: {e}")
+    return None
+
+def build_scoring_index(model, explainer):
+    """Build the lookup table, dropping the optional SHAP table if it exceeds the memory budget"""
+    if INFERENCE_ENGINE != "lookup":
+        return None
+    max_bytes = int(float(os.environ.get("SCORING_INDEX_MAX_MB", 64)) * 1024 * 1024)
+    try:
+        index = None
+        if os.environ.get("SCORING_INDEX_SHAP") == "1" and explainer is not None:
+            try:
+                index = ScoringIndex(model, max_bytes=max_bytes, explainer=explainer)
+            except ScoringIndexTooLarge as e:
+                print(f"⚠️ SHAP table skipped: {e}")
+        index = index or ScoringIndex(model, max_bytes=max_bytes)
+        print(f"✅ Scoring index built ({index.n_cells:,} cells, {index.nbytes / 2**20:.1f} MB)")
+        if os.environ.get("SCORING_INDEX_VALIDATE") == "1":
+            mismatches = index.validate(model, pd.read_csv("synthetic_robo_advisor_data.csv"))
+            if mismatches:
+                print(f"⚠️ Scoring index disagrees with model.predict on {mismatches} rows, disabling it")
+                return None
+            print("✅ Scoring index validated against model.predict")
+        return index
+    except Exception as e:
+        print(f"⚠️ Scoring index unavailable, using live model: {e}")
+        return None
+
+# Bounded pool for model and SHAP work, created on first use in each worker process
+inference_executor = None
+INFERENCE_RETRY_AFTER = os.environ.get("INFERENCE_RETRY_AFTER", "1")
+
+# Version label of a model loaded straight from model.joblib rather than the registry
+UNREGISTERED_VERSION = "model.joblib"
+
+# Number of entries in each bundle's cache of predicted-class SHAP vectors
+SHAP_CACHE_SIZE = int(os.environ.get("SHAP_CACHE_SIZE", 4096))
+
+@dataclass
+class ModelBundle:
+    """A model plus the engines, explainer and SHAP cache derived from it, swapped as one unit"""
+    model: object
+    version: str
+    metadata: dict
+    compiled_forest: object = None
+    explainer: object = None
+    scoring_index: object = None
+    explanation_cache: ExplanationCache = None
+    loaded_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    explainer_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    
+    def describe(self):
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "content_hash": self.metadata.get("content_hash"),
+            "training_accuracy": self.metadata.get("training_accuracy"),
+            "explainer_ready": self.explainer is not None
+        }
+
+# Requests capture active_bundle once and use it throughout, so a swap never mixes two
+# models in one response; previous_bundle stays loaded for instant rollback and
+# candidate_bundle is the shadow/canary model under evaluation
+active_bundle = None
+previous_bundle = None
+candidate_bundle = None
+bundle_swap_lock = threading.Lock()
+startup_error = None
+# Seconds spent in each startup phase
+startup_timings = {}
+
+def timed(phase, fn, *args):
+    """Call fn and record its duration under startup_timings[phase]"""
+    started = time.perf_counter()
+    result = fn(*args)
+    startup_timings[phase] = round(time.perf_counter() - started, 3)
+    return result
+
+def build_model_bundle(model, version, metadata, with_explainer=True, timer=None):
+    """Build the engines, explainer and cache derived from a loaded model"""
+    timer = timer or (lambda phase, fn, *args: fn(*args))
+    compiled_forest = timer("compiled_forest", build_compiled_forest, model, metadata.get("content_hash"))
+    explainer = timer("explainer", build_explainer, model) if with_explainer else None
+    scoring_index = timer("scoring_index", build_scoring_index, model, explainer)
+    return ModelBundle(
+        model=model,
+        version=version,
+        metadata=metadata,
+        compiled_forest=compiled_forest,
+        explainer=explainer,
+        scoring_index=scoring_index,
+        explanation_cache=ExplanationCache(model, max_size=SHAP_CACHE_SIZE)
+    )
+
+def refresh_process_pool():
+    """Forked workers hold a copy of the bundles they started with: send new calls to a fresh
+    pool and let the old one finish what it already accepted"""
+    global inference_executor
+    if inference_executor is not None and inference_executor.kind == "process":
+        stale, inference_executor = inference_executor, create_inference_executor()
+        stale.shutdown(wait=False)
+
+def publish_bundle(bundle, previous):
+    """Make bundle the one serving requests (caller holds bundle_swap_lock)"""
+    global active_bundle, previous_bundle, candidate_bundle
+    # Publishing the active bundle last marks it ready
+    previous_bundle, active_bundle = previous, bundle
+    if candidate_bundle is bundle:
+        # A promoted candidate has nothing left to be compared against
+        candidate_bundle = None
+    refresh_process_pool()
+
+def activate_bundle(bundle):
+    """Serve bundle from now on, keeping the current one loaded for rollback"""
+    with bundle_swap_lock:
+        publish_bundle(bundle, active_bundle if active_bundle is not bundle else previous_bundle)
+
+def load_model_bundle(with_explainer=True):
+    """Load the model and build the engines derived from it"""
+    model, version, metadata = timed("model_load", load_model)
+    activate_bundle(build_model_bundle(model, version, metadata, with_explainer, timer=timed))
+
+def warm_up():
+    """Background startup for lazy mode: load the model, then build the explainer ahead of first use"""
+    global startup_error
+    try:
+        load_model_bundle(with_explainer=False)
+        print("✅ Model ready")
+        timed("explainer", get_explainer)
+    except Exception as e:
+        startup_error = str(e)
+        print(f"⚠️ Background model load failed: {e}")
+
+def get_explainer(bundle=None):
+    """The bundle's SHAP explainer, built on first use when loading skipped it"""
+    bundle = bundle or active_bundle
+    if bundle is None:
+        return None
+    if bundle.explainer is None and SHAP_AVAILABLE is not False:
+        with bundle.explainer_lock:
+            if bundle.explainer is None:
+                bundle.explainer = build_explainer(bundle.model)
+    return bundle.explainer
+
+if STARTUP_MODE != "lazy":
+    load_model_bundle()
+
+# Coalesce concurrent single-profile scoring requests into one model + SHAP call
+MICROBATCH_ENABLED = os.environ.get("MICROBATCH_ENABLED", "0") == "1"
+MICROBATCH_MAX_ROWS = int(os.environ.get("MICROBATCH_MAX_ROWS", 64))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get("MICROBATCH_MAX_WAIT_MS", 2))
+micro_batcher = None
+
+# Candidate model scored alongside the active one: shadowed on a sample of requests
+# (SHADOW_FRACTION) and/or serving a share of users (CANARY_PERCENT)
+CANDIDATE_MODEL_VERSION = os.environ.get("CANDIDATE_MODEL_VERSION")
+model_seconds = metrics_registry.histogram("robo_model_prediction_duration_seconds", "Prediction latency of the serving and candidate models", ("role",))
+shadow_router = create_shadow_router(latency=model_seconds)
+
+# Assessment sessions (in-memory with TTL, or shared SQLite via SESSION_BACKEND=sqlite)
+session_store = create_session_store()
+instrument_methods(session_store, stage_seconds, {"get": "session_get", "save": "session_save"})
 
-# In-memory storage for demo (use database in production)
-assessment_sessions = {}
-assessment_logs = []
+# Monte Carlo projections (PROJECTION_PATHS / PROJECTION_BUDGET_MS / PROJECTION_SEED)
+projector = create_projector()
+
+# Assessment logs are written by log_writer and queried through the on-disk log_index
+log_index = create_log_index()
+log_writer = None
 
 # Original ClientData model for backward compatibility
+# Bounds are declared on the fields, so Pydantic checks them in the same pass as the types and
+# publishes them in the OpenAPI schema; a violation is a 422 naming the field
 class ClientData(BaseModel):
-    age: int
-    income: int
-    risk_tolerance: int
-    investment_horizon: int
+    age: int = Field(ge=18, le=100)
+    income: int = Field(ge=20000, le=50000000)
+    risk_tolerance: int = Field(ge=1, le=5)
+    investment_horizon: int = Field(ge=1, le=50)
 
 # New data models for pre-screening tool
 class DemographicInfo(BaseModel):
-    age: int
-    income: int
+    age: int = Field(ge=18, le=100)
+    income: int = Field(ge=20000, le=50000000)
     employment_status: str  # "employed", "self_employed", "unemployed", "retired"
     location: str
-    dependents: int
+    dependents: int = Field(ge=0, le=20)
     marital_status: str  # "single", "married", "divorced", "widowed"
-    
-    # Add validation
-    class Config:
-        @staticmethod
-        def schema_extra(schema, model_type):
-            schema["properties"]["age"]["minimum"] = 18
-            schema["properties"]["age"]["maximum"] = 100
-            schema["properties"]["income"]["minimum"] = 20000
-            schema["properties"]["income"]["maximum"] = 50000000
-            schema["properties"]["dependents"]["minimum"] = 0
-            schema["properties"]["dependents"]["maximum"] = 20
 
 class FinancialGoals(BaseModel):
     primary_goal: str  # "retirement", "home_purchase", "education", "wealth_building", "emergency_fund"
-    target_amount: Optional[int] = None
-    time_horizon: int  # years
-    current_savings: int
-    monthly_expenses: int
-    existing_debt: int
-    emergency_fund_months: int
-    
-    # Add validation
-    class Config:
-        @staticmethod
-        def schema_extra(schema, model_type):
-            schema["properties"]["target_amount"]["minimum"] = 1000
-            schema["properties"]["target_amount"]["maximum"] = 100000000
-            schema["properties"]["time_horizon"]["minimum"] = 1
-            schema["properties"]["time_horizon"]["maximum"] = 50
-            schema["properties"]["current_savings"]["minimum"] = 0
-            schema["properties"]["current_savings"]["maximum"] = 50000000
-            schema["properties"]["monthly_expenses"]["minimum"] = 0
-            schema["properties"]["monthly_expenses"]["maximum"] = 1000000
-            schema["properties"]["existing_debt"]["minimum"] = 0
-            schema["properties"]["existing_debt"]["maximum"] = 50000000
-            schema["properties"]["emergency_fund_months"]["minimum"] = 0
-            schema["properties"]["emergency_fund_months"]["maximum"] = 12
+    target_amount: Optional[int] = Field(default=None, ge=1000, le=100000000)
+    time_horizon: int = Field(ge=1, le=50)  # years
+    current_savings: int = Field(ge=0, le=50000000)
+    monthly_expenses: int = Field(ge=0, le=1000000)
+    existing_debt: int = Field(ge=0, le=50000000)
+    emergency_fund_months: int = Field(ge=0, le=12)
 
 class RiskAssessmentResponse(BaseModel):
     question_id: int
     selected_option: str
     score: int
 
-class CompleteAssessment(BaseModel):
+# Response models; the large responses are rendered by FastJSONResponse, so these document the schema
+class FeatureContribution(BaseModel):
+    value: float
+    shap_value: float
+    impact: str
+
+class ExplanationResponse(BaseModel):
+    predicted_risk_level: int
+    risk_category: str
+    user_friendly_explanation: str
+    feature_importance: Dict[str, float]
+    detailed_explanation: Dict[str, FeatureContribution]
+
+class AssessmentSummary(BaseModel):
+    questionnaire_risk_score: int
+    ml_predicted_risk_score: int
+    final_risk_category: str
+
+class PortfolioRecommendation(BaseModel):
+    allocation: Dict[str, int]
+    recommended_monthly_investment: float
+    rebalancing_frequency: str
+
+class ProjectedValueRange(BaseModel):
+    pessimistic_p10: str
+    median_p50: str
+    optimistic_p90: str
+
+class GoalAchievement(BaseModel):
+    target_amount: Optional[int]
+    projected_amount: float
+    probability_of_success: Optional[float]
+    likely_to_achieve: bool
+
+class PercentileValues(BaseModel):
+    p10: float
+    p50: float
+    p90: float
+
+class YearlyBands(BaseModel):
+    year: List[int]
+    p10: List[float]
+    p50: List[float]
+    p90: List[float]
+
+class ProjectionSimulation(BaseModel):
+    paths: int
+    expected_annual_return: float
+    annual_volatility: float
+    final_value: PercentileValues
+    yearly_bands: YearlyBands
+    probability_of_reaching_target: Optional[float]
+
+class Projections(BaseModel):
+    expected_annual_return: str
+    projected_portfolio_value: str
+    monthly_contribution_needed: str
+    projected_value_range: ProjectedValueRange
+    goal_achievement: GoalAchievement
+    simulation: ProjectionSimulation
+
+class RecommendationResponse(BaseModel):
     session_id: str
+    assessment_summary: AssessmentSummary
+    portfolio_recommendation: PortfolioRecommendation
+    projections: Projections
+    explanation: str
+    next_steps: List[str]
+    disclaimer: str
+
+class CompleteAssessment(BaseModel):
     demographics: DemographicInfo
     financial_goals: FinancialGoals
     risk_responses: List[RiskAssessmentResponse]
 
+# Model feature order and risk level labels
+FEATURE_NAMES = ["age", "income", "risk_tolerance", "investment_horizon"]
+RISK_LEVELS = {
+    1: "Very Conservative",
+    2: "Conservative",
+    3: "Moderate",
+    4: "Aggressive",
+    5: "Very Aggressive"
+}
+
+# Largest number of rows scored in a single model/SHAP call by the batch endpoints
+BATCH_MAX_ROWS = int(os.environ.get("BATCH_MAX_ROWS", 2000))
+
+# /predict/batch and /explain/batch check their rows column by column instead of building a ClientData per row
+client_data_validator = BulkValidator(ClientData)
+BATCH_REQUEST_BODY = {"requestBody": {"required": True, "content": {"application/json": {
+    "schema": {"type": "array", "items": ClientData.model_json_schema()}
+}}}}
+
+async def read_client_profiles(request: Request):
+    """Model input frame from a JSON list of ClientData objects, or a 422 listing every invalid row"""
+    try:
+        rows = json.loads(await request.body())
+    except ValueError as e:
+        raise RequestValidationError([{"type": "json_invalid", "loc": ["body"], "msg": f"JSON decode error: {e}"}])
+    checked = client_data_validator.validate_rows(rows)
+    if checked.errors:
+        raise RequestValidationError(checked.errors)
+    return pd.DataFrame({name: checked.columns[name] for name in FEATURE_NAMES}, columns=FEATURE_NAMES)
+
+def iter_batch_chunks(n_rows: int, chunk_size: int = None):
+    """Yield (start, stop) bounds splitting n_rows into chunks of at most chunk_size"""
+    chunk_size = max(1, chunk_size or BATCH_MAX_ROWS)
+    for start in range(0, n_rows, chunk_size):
+        yield start, min(start + chunk_size, n_rows)
+
+def select_class_shap(shap_values, class_indices):
+    """Pick each row's SHAP vector for its predicted class as an (n_rows, n_features) array"""
+    rows = np.arange(len(class_indices))
+    if isinstance(shap_values, list):
+        # Older SHAP: one (n_rows, n_features) array per class
+        stacked = np.stack(shap_values, axis=-1)
+        return stacked[rows, :, class_indices]
+    shap_values = np.asarray(shap_values)
+    if shap_values.ndim == 3:
+        # Newer SHAP: (n_rows, n_features, n_classes)
+        return shap_values[rows, :, class_indices]
+    return shap_values
+
+def predict_levels(input_df, bundle=None):
+    """Predict risk levels with the configured inference engine"""
+    bundle = bundle or active_bundle
+    if bundle.scoring_index is not None:
+        return bundle.scoring_index.predict(input_df, fallback=bundle.model)
+    return forest_engine_for(input_df, bundle).predict(input_df)
+
+def predict_probabilities(input_df, bundle=None):
+    """Predict class probabilities with the configured inference engine"""
+    bundle = bundle or active_bundle
+    return forest_engine_for(input_df, bundle).predict_proba(input_df)
+
+def forest_engine_for(input_df, bundle):
+    """The compiled forest for inputs up to COMPILED_MAX_ROWS rows, else bundle.model (both give identical results)"""
+    if bundle.compiled_forest is not None and len(input_df) <= COMPILED_MAX_ROWS:
+        return bundle.compiled_forest
+    return bundle.model
+
+def predicted_class_indices(predictions, model):
+    """Map predicted risk levels to the model's class column indices"""
+    indices = np.searchsorted(model.classes_, predictions)
+    return np.clip(indices, 0, len(model.classes_) - 1)
+
+def shap_for_rows(input_df, predictions, bundle=None):
+    """SHAP vector of each row's predicted class, from the scoring index or explanation cache when possible"""
+    bundle = bundle or active_bundle
+    if bundle.scoring_index is not None and bundle.scoring_index.shap_table is not None:
+        shap_rows, in_domain = bundle.scoring_index.shap_values(input_df)
+        if in_domain.all():
+            return shap_rows
+    
+    def compute(rows, row_predictions):
+        explainer = get_explainer(bundle)
+        with stage_seconds.time("shap"):
+            shap_values = explainer.shap_values(rows)
+        return select_class_shap(shap_values, predicted_class_indices(row_predictions, bundle.model))
+    
+    if bundle.explanation_cache.max_size == 0:
+        return compute(input_df, predictions)
+    return bundle.explanation_cache.lookup(input_df, np.asarray(predictions), compute)
+
+def score_and_explain(input_df, bundle=None):
+    """Predicted risk levels and predicted-class SHAP vectors for a frame of profiles"""
+    bundle = bundle or active_bundle
+    predictions = predict_levels(input_df, bundle)
+    return predictions, shap_for_rows(input_df, predictions, bundle)
+
+def bundle_for(role):
+    """Bundle serving a role, resolved in the process doing the work (the candidate falls back to active)"""
+    return (candidate_bundle if role == "candidate" else None) or active_bundle
+
+def serving_role(routing_key):
+    """'candidate' if the user behind routing_key is in the canary group, else 'primary'"""
+    if candidate_bundle is not None and routing_key is not None and shadow_router.serve_canary(routing_key):
+        return "candidate"
+    return "primary"
+
+def predict_timed(input_df, role="primary"):
+    """Predicted risk levels plus the seconds the prediction took, timed where it runs"""
+    bundle = bundle_for(role)
+    started = time.perf_counter()
+    predictions = predict_levels(input_df, bundle)
+    seconds = time.perf_counter() - started
+    stage_seconds.observe(seconds, "predict")
+    return predictions, seconds
+
+def score_and_explain_timed(input_df, role="primary"):
+    """score_and_explain plus the seconds spent in the prediction alone"""
+    bundle = bundle_for(role)
+    started = time.perf_counter()
+    predictions = predict_levels(input_df, bundle)
+    seconds = time.perf_counter() - started
+    stage_seconds.observe(seconds, "predict")
+    return predictions, shap_for_rows(input_df, predictions, bundle), seconds
+
+def shadow_compare(input_df, primary_predictions, candidate):
+    """Score rows with the candidate (on the shadow thread) and compare with what was served"""
+    started = time.perf_counter()
+    predictions = predict_levels(input_df, candidate)
+    shadow_router.stats.record_latency("candidate", time.perf_counter() - started)
+    shadow_router.stats.record_comparison(np.asarray(primary_predictions).tolist(), np.asarray(predictions).tolist())
+
+def record_scoring(input_df, predictions, seconds, role):
+    """Record the serving model's latency and maybe queue a shadow comparison, without waiting for it"""
+    shadow_router.stats.record_latency(role, seconds)
+    shadow_router.stats.record_served(role, len(input_df))
+    candidate = candidate_bundle
+    if role == "primary" and candidate is not None and shadow_router.sample_shadow():
+        shadow_router.submit(shadow_compare, input_df, predictions, candidate)
+
+def get_inference_executor():
+    global inference_executor
+    if inference_executor is None:
+        inference_executor = create_inference_executor()
+    return inference_executor
+
+async def run_inference(fn, *args):
+    """Run model work on the inference executor, failing fast with 503 when it is saturated"""
+    if active_bundle is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model failed to load: {startup_error}" if startup_error else "Model is still loading",
+            headers={"Retry-After": INFERENCE_RETRY_AFTER}
+        )
+    try:
+        return await get_inference_executor().run(fn, *args)
+    except ExecutorOverloaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Scoring capacity exceeded, please retry shortly",
+            headers={"Retry-After": INFERENCE_RETRY_AFTER}
+        )
+
+async def score_rows_batch(rows, role="primary"):
+    """Score stacked feature rows in one executor call, returning (prediction, shap vector) per row"""
+    input_df = pd.DataFrame(rows, columns=FEATURE_NAMES)
+    predictions, shap_rows, seconds = await run_inference(score_and_explain_timed, input_df, role)
+    record_scoring(input_df, predictions, seconds, role)
+    return list(zip(predictions.tolist(), shap_rows))
+
+async def score_profile(features: dict, routing_key=None):
+    """Prediction and predicted-class SHAP vector for one profile, micro-batched when enabled"""
+    global micro_batcher
+    row = [features[name] for name in FEATURE_NAMES]
+    role = serving_role(routing_key)
+    if role == "candidate" or not MICROBATCH_ENABLED:
+        # Micro-batches are scored by the active model only
+        return (await score_rows_batch([row], role))[0]
+    if micro_batcher is None:
+        micro_batcher = MicroBatcher(score_rows_batch, max_rows=MICROBATCH_MAX_ROWS, max_wait_ms=MICROBATCH_MAX_WAIT_MS)
+    return await micro_batcher.submit(row)
+
+def describe_feature(feature: str, value):
+    """Describe a single model feature value in plain language"""
+    if feature == "age":
+        return f"your age of {value} years"
+    elif feature == "income":
+        return f"your annual income of ${value:,}"
+    elif feature == "risk_tolerance":
+        return f"your risk tolerance level of {value}/5"
+    elif feature == "investment_horizon":
+        return f"your {value}-year investment timeline"
+    return f"your {feature} of {value}"
+
+def build_explanation(prediction: int, feature_values: dict, feature_importance: dict):
+    """Build the /explain response body for one scored profile"""
+    # Find the most influential features
+    sorted_features = sorted(feature_importance.items(), key=lambda x: abs(x[1]), reverse=True)
+    top_positive = [f for f, v in sorted_features if v > 0][:2]
+    top_negative = [f for f, v in sorted_features if v < 0][:2]
+    
+    # Create explanation text
+    explanation_text = f"Based on your profile, we recommend a {RISK_LEVELS[prediction]} (Level {prediction}) investment strategy. "
+    
+    if top_positive:
+        explanation_text += "Factors increasing your risk capacity: "
+        explanation_text += ", ".join(describe_feature(f, feature_values[f]) for f in top_positive) + ". "
+    
+    if top_negative:
+        explanation_text += "Factors suggesting lower risk: "
+        explanation_text += ", ".join(describe_feature(f, feature_values[f]) for f in top_negative) + ". "
+    
+    return {
+        "predicted_risk_level": prediction,
+        "risk_category": RISK_LEVELS[prediction],
+        "user_friendly_explanation": explanation_text,
+        "feature_importance": feature_importance,
+        "detailed_explanation": {
+            name: {
+                "value": float(feature_values[name]),
+                "shap_value": importance,
+                "impact": "increases" if importance > 0 else "decreases"
+            }
+            for name, importance in feature_importance.items()
+        }
+    }
+
 # Original endpoints for backward compatibility
 @app.post("/predict")
-def predict_risk_level(data: ClientData):
+async def predict_risk_level(data: ClientData):
     input_df = pd.DataFrame([data.model_dump()])
-    prediction = model.predict(input_df)[0]
-    
-    # Risk level categories
-    risk_levels = {
-        1: "Very Conservative",
-        2: "Conservative", 
-        3: "Moderate",
-        4: "Aggressive",
-        5: "Very Aggressive"
-    }
+    # The same profile is always routed to the same model
+    role = serving_role(tuple(input_df.iloc[0].tolist()))
+    predictions, seconds = await run_inference(predict_timed, input_df, role)
+    record_scoring(input_df, predictions, seconds, role)
+    prediction = predictions[0]
     
     return {
         "predicted_risk_level": int(prediction),
-        "risk_category": risk_levels[int(prediction)]
+        "risk_category": RISK_LEVELS[int(prediction)]
     }
 
-@app.post("/explain")
-def explain_risk_level(data: ClientData):
+@app.post("/explain", response_model=ExplanationResponse)
+async def explain_risk_level(data: ClientData):
     try:
-        input_df = pd.DataFrame([data.model_dump()])
-        
-        # Get prediction for context
-        prediction = model.predict(input_df)[0]
+        # Get prediction and SHAP values for the predicted class
+        prediction, shap_vals = await score_profile(data.model_dump())
         prediction = int(prediction)  # Ensure it's a scalar
         
-        # Generate SHAP values
-        shap_values = explainer.shap_values(input_df)
-        
-        # Handle multi-class SHAP values
-        if isinstance(shap_values, list):
-            # For multi-class, get SHAP values for predicted class
-            predicted_class_idx = prediction - 1  # Assuming classes 1-5, convert to 0-4
-            if predicted_class_idx < 0 or predicted_class_idx >= len(shap_values):
-                predicted_class_idx = 0  # Default to first class if index is out of bounds
-            shap_vals = shap_values[predicted_class_idx][0]
-        else:
-            shap_vals = shap_values[0]
-        
-        # Ensure shap_vals is a 1D array
-        if len(shap_vals.shape) > 1:
-            shap_vals = shap_vals.flatten()
-        
         # Create feature importance dictionary
-        feature_names = input_df.columns.tolist()
-        feature_importance = dict(zip(feature_names, shap_vals.tolist()))
-        
-        # Generate user-friendly explanation
-        risk_levels = {
-            1: "Very Conservative",
-            2: "Conservative", 
-            3: "Moderate",
-            4: "Aggressive",
-            5: "Very Aggressive"
-        }
+        feature_importance = dict(zip(FEATURE_NAMES, shap_vals))
         
-        # Find the most influential features
-        sorted_features = sorted(feature_importance.items(), key=lambda x: abs(x[1]), reverse=True)
-        top_positive = [f for f, v in sorted_features if v > 0][:2]
-        top_negative = [f for f, v in sorted_features if v < 0][:2]
-        
-        # Create explanation text
-        explanation_text = f"Based on your profile, we recommend a {risk_levels[prediction]} (Level {prediction}) investment strategy. "
-        
-        if top_positive:
-            explanation_text += f"Factors increasing your risk capacity: "
-            for feature in top_positive:
-                value = input_df[feature].iloc[0]
-                if feature == "age":
-                    explanation_text += f"your age of {value} years, "
-                elif feature == "income":
-                    explanation_text += f"your annual income of ${value:,}, "
-                elif feature == "risk_tolerance":
-                    explanation_text += f"your risk tolerance level of {value}/5, "
-                elif feature == "investment_horizon":
-                    explanation_text += f"your {value}-year investment timeline, "
-            explanation_text = explanation_text.rstrip(", ") + ". "
+        return FastJSONResponse(build_explanation(prediction, data.model_dump(), feature_importance))
+    except HTTPException:
+        raise
+    except Exception as e:
+        # An error body would not match ExplanationResponse; report the failure as a status instead
+        raise HTTPException(status_code=503, detail=f"Explanation generation failed: {str(e)}")
+
+def predict_batch_results(input_df: pd.DataFrame):
+    """Score many client profiles with one vectorized model call per chunk"""
+    bundle = active_bundle
+    results = []
+    
+    for start, stop in iter_batch_chunks(len(input_df)):
+        probabilities = predict_probabilities(input_df.iloc[start:stop], bundle)
+        class_indices = probabilities.argmax(axis=1)
+        predictions = bundle.model.classes_.take(class_indices)
+        confidences = probabilities[np.arange(len(class_indices)), class_indices]
         
-        if top_negative:
-            explanation_text += f"Factors suggesting lower risk: "
-            for feature in top_negative:
-                value = input_df[feature].iloc[0]
-                if feature == "age":
-                    explanation_text += f"your age of {value} years, "
-                elif feature == "income":
-                    explanation_text += f"your annual income of ${value:,}, "
-                elif feature == "risk_tolerance":
-                    explanation_text += f"your risk tolerance level of {value}/5, "
-                elif feature == "investment_horizon":
-                    explanation_text += f"your {value}-year investment timeline, "
-            explanation_text = explanation_text.rstrip(", ") + ". "
+        for prediction, confidence in zip(predictions.tolist(), confidences.tolist()):
+            results.append({
+                "predicted_risk_level": int(prediction),
+                "risk_category": RISK_LEVELS[int(prediction)],
+                "confidence": confidence
+            })
+    return results
+
+def explain_batch_results(input_df: pd.DataFrame):
+    """Score and explain many client profiles with one SHAP call per chunk"""
+    bundle = active_bundle
+    if get_explainer(bundle) is None:
+        raise HTTPException(status_code=503, detail="SHAP explainer not available")
+    
+    results = []
+    
+    for start, stop in iter_batch_chunks(len(input_df)):
+        chunk = input_df.iloc[start:stop]
+        predictions, shap_rows = score_and_explain(chunk, bundle)
         
-        return {
-            "predicted_risk_level": prediction,
-            "risk_category": risk_levels[prediction],
-            "user_friendly_explanation": explanation_text,
-            "feature_importance": feature_importance,
-            "detailed_explanation": {
-                name: {
-                    "value": float(input_df[name].iloc[0]),
-                    "shap_value": float(importance),
-                    "impact": "increases" if importance > 0 else "decreases"
-                }
-                for name, importance in feature_importance.items()
-            }
-        }
-    except Exception as e:
-        return {"error": f"Explanation generation failed: {str(e)}"}
+        for values, prediction, shap_vals in zip(chunk.to_numpy().tolist(), predictions.tolist(), shap_rows):
+            feature_importance = dict(zip(FEATURE_NAMES, shap_vals.tolist()))
+            results.append(build_explanation(int(prediction), dict(zip(FEATURE_NAMES, values)), feature_importance))
+    return results
+
+@app.post("/predict/batch", openapi_extra=BATCH_REQUEST_BODY)
+async def predict_risk_level_batch(request: Request):
+    """Score many client profiles with one vectorized model call per chunk"""
+    results = await run_inference(predict_batch_results, await read_client_profiles(request))
+    return {
+        "total_profiles": len(results),
+        "results": results
+    }
+
+@app.post("/explain/batch", openapi_extra=BATCH_REQUEST_BODY)
+async def explain_risk_level_batch(request: Request):
+    """Score and explain many client profiles with one SHAP call per chunk"""
+    results = await run_inference(explain_batch_results, await read_client_profiles(request))
+    return {
+        "total_profiles": len(results),
+        "results": results
+    }
 
 # New Pre-Screening Tool API Endpoints
+# Handlers that only touch the session store are plain functions: FastAPI runs them in its
+# threadpool, so a SQLite store waiting on a lock never blocks the event loop
 
 @app.post("/start-assessment")
 def start_assessment():
     """Initialize a new assessment session"""
     session_id = str(uuid.uuid4())
     
-    assessment_sessions[session_id] = {
-        "created_at": datetime.now().isoformat(),
-        "status": "started",
-        "demographics": None,
-        "financial_goals": None,
-        "risk_responses": [],
-        "completed": False
-    }
+    session_store.save(AssessmentSession(session_id=session_id, created_at=datetime.now().isoformat()))
     
     return {
         "session_id": session_id,
@@ -258,19 +808,13 @@ def start_assessment():
 @app.post("/submit-demographics")
 def submit_demographics(session_id: str, demographics: DemographicInfo):
     """Submit demographic information"""
-    if session_id not in assessment_sessions:
+    session = session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Assessment session not found")
     
-    # Additional validation
-    if not (18 <= demographics.age <= 100):
-        raise HTTPException(status_code=400, detail="Age must be between 18 and 100")
-    if not (20000 <= demographics.income <= 50000000):
-        raise HTTPException(status_code=400, detail="Income must be between $20,000 and $50 million")
-    if not (0 <= demographics.dependents <= 20):
-        raise HTTPException(status_code=400, detail="Number of dependents must be between 0 and 20")
-    
-    assessment_sessions[session_id]["demographics"] = demographics.dict()
-    assessment_sessions[session_id]["status"] = "demographics_complete"
+    session.set_demographics(demographics.model_dump())
+    session.status = "demographics_complete"
+    session_store.save(session)
     
     return {
         "session_id": session_id,
@@ -281,25 +825,13 @@ def submit_demographics(session_id: str, demographics: DemographicInfo):
 @app.post("/submit-financial-goals")
 def submit_financial_goals(session_id: str, financial_goals: FinancialGoals):
     """Submit financial goals and situation"""
-    if session_id not in assessment_sessions:
+    session = session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Assessment session not found")
     
-    # Additional validation
-    if financial_goals.target_amount is not None and not (1000 <= financial_goals.target_amount <= 100000000):
-        raise HTTPException(status_code=400, detail="Target amount must be between $1,000 and $100 million")
-    if not (1 <= financial_goals.time_horizon <= 50):
-        raise HTTPException(status_code=400, detail="Time horizon must be between 1 and 50 years")
-    if not (0 <= financial_goals.current_savings <= 50000000):
-        raise HTTPException(status_code=400, detail="Current savings must be between $0 and $50 million")
-    if not (0 <= financial_goals.monthly_expenses <= 1000000):
-        raise HTTPException(status_code=400, detail="Monthly expenses must be between $0 and $1 million")
-    if not (0 <= financial_goals.existing_debt <= 50000000):
-        raise HTTPException(status_code=400, detail="Existing debt must be between $0 and $50 million")
-    if not (0 <= financial_goals.emergency_fund_months <= 12):
-        raise HTTPException(status_code=400, detail="Emergency fund must be between 0 and 12 months")
-    
-    assessment_sessions[session_id]["financial_goals"] = financial_goals.dict()
-    assessment_sessions[session_id]["status"] = "financial_goals_complete"
+    session.set_financial_goals(financial_goals.model_dump())
+    session.status = "financial_goals_complete"
+    session_store.save(session)
     
     return {
         "session_id": session_id,
@@ -307,85 +839,172 @@ def submit_financial_goals(session_id: str, financial_goals: FinancialGoals):
         "next_step": "/get-risk-questions"
     }
 
+# Risk questionnaire; bump the version whenever questions, options or scores change
+RISK_QUESTIONNAIRE_VERSION = "1"
+RISK_QUESTIONS = [
+    {
+        "id": 1,
+        "category": "experience",
+        "question": "How would you describe your investment experience?",
+        "type": "single_choice",
+        "options": [
+            {"value": "none", "text": "No prior investment experience", "score": 1},
+            {"value": "beginner", "text": "Less than 2 years", "score": 2},
+            {"value": "intermediate", "text": "2-10 years of experience", "score": 3},
+            {"value": "expert", "text": "More than 10 years of experience", "score": 4}
+        ]
+    },
+    {
+        "id": 2,
+        "category": "loss_tolerance",
+        "question": "If your investments lost 20% of their value in one year, what would you do?",
+        "type": "single_choice",
+        "options": [
+            {"value": "sell_all", "text": "Sell everything to avoid further losses", "score": 1},
+            {"value": "sell_some", "text": "Sell some investments to limit losses", "score": 2},
+            {"value": "hold", "text": "Hold everything and wait for recovery", "score": 3},
+            {"value": "buy_more", "text": "Buy more at the lower prices", "score": 4}
+        ]
+    },
+    {
+        "id": 3,
+        "category": "volatility_comfort",
+        "question": "What's the maximum loss you could accept in a single year?",
+        "type": "single_choice",
+        "options": [
+            {"value": "5_percent", "text": "5% - I need stability", "score": 1},
+            {"value": "10_percent", "text": "10% - Small fluctuations are OK", "score": 2},
+            {"value": "20_percent", "text": "20% - I can handle moderate swings", "score": 3},
+            {"value": "30_plus", "text": "30%+ - I'm comfortable with high volatility", "score": 4}
+        ]
+    },
+    {
+        "id": 4,
+        "category": "time_pressure",
+        "question": "When do you expect to need this money?",
+        "type": "single_choice",
+        "options": [
+            {"value": "less_2_years", "text": "Less than 2 years", "score": 1},
+            {"value": "2_5_years", "text": "2-5 years", "score": 2},
+            {"value": "5_10_years", "text": "5-10 years", "score": 3},
+            {"value": "more_10_years", "text": "More than 10 years", "score": 4}
+        ]
+    },
+    {
+        "id": 5,
+        "category": "priority",
+        "question": "What's most important to you?",
+        "type": "single_choice",
+        "options": [
+            {"value": "preserve_capital", "text": "Preserving my money (avoiding losses)", "score": 1},
+            {"value": "steady_income", "text": "Generating steady income", "score": 2},
+            {"value": "balanced_growth", "text": "Balanced growth with some income", "score": 3},
+            {"value": "maximize_growth", "text": "Maximizing long-term growth", "score": 4}
+        ]
+    }
+]
+# Score of every (question id, option value) pair, used instead of client-sent scores
+RISK_OPTION_SCORES = {
+    (question["id"], option["value"]): option["score"]
+    for question in RISK_QUESTIONS
+    for option in question["options"]
+}
+
+def encode_risk_questions():
+    """Serialize the questionnaire once: (ETag, {content-encoding: body})"""
+    body = json.dumps({
+        "version": RISK_QUESTIONNAIRE_VERSION,
+        "total_questions": len(RISK_QUESTIONS),
+        "questions": RISK_QUESTIONS
+    }, separators=(",", ":")).encode()
+    encodings = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encodings["br"] = brotli.compress(body)
+    etag = f'"{RISK_QUESTIONNAIRE_VERSION}-{hashlib.sha256(body).hexdigest()[:16]}"'
+    return etag, encodings
+
+RISK_QUESTIONS_ETAG, RISK_QUESTIONS_BODIES = encode_risk_questions()
+
+def accept_encoding_qvalues(header: str):
+    """Map each Accept-Encoding token to its q-value; malformed q-values count as 0"""
+    qvalues = {}
+    for item in header.lower().split(","):
+        token, *params = [part.strip() for part in item.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[token] = q
+    return qvalues
+
+def negotiate_encoding(header: str):
+    """Best compressed encoding the client accepts (q > 0), preferring br on ties; identity otherwise"""
+    qvalues = accept_encoding_qvalues(header)
+    best, best_q = "identity", 0.0
+    for encoding in ("br", "gzip"):
+        q = qvalues.get(encoding, qvalues.get("*", 0.0))
+        if encoding in RISK_QUESTIONS_BODIES and q > best_q:
+            best, best_q = encoding, q
+    return best
+RISK_QUESTIONS_CACHE_CONTROL = f"public, max-age={int(os.environ.get('RISK_QUESTIONS_MAX_AGE', 3600))}"
+
 @app.get("/get-risk-questions")
-def get_risk_questions():
+async def get_risk_questions(request: Request):
     """Get risk tolerance assessment questions"""
-    questions = [
-        {
-            "id": 1,
-            "category": "experience",
-            "question": "How would you describe your investment experience?",
-            "type": "single_choice",
-            "options": [
-                {"value": "none", "text": "No prior investment experience", "score": 1},
-                {"value": "beginner", "text": "Less than 2 years", "score": 2},
-                {"value": "intermediate", "text": "2-10 years of experience", "score": 3},
-                {"value": "expert", "text": "More than 10 years of experience", "score": 4}
-            ]
-        },
-        {
-            "id": 2,
-            "category": "loss_tolerance",
-            "question": "If your investments lost 20% of their value in one year, what would you do?",
-            "type": "single_choice",
-            "options": [
-                {"value": "sell_all", "text": "Sell everything to avoid further losses", "score": 1},
-                {"value": "sell_some", "text": "Sell some investments to limit losses", "score": 2},
-                {"value": "hold", "text": "Hold everything and wait for recovery", "score": 3},
-                {"value": "buy_more", "text": "Buy more at the lower prices", "score": 4}
-            ]
-        },
-        {
-            "id": 3,
-            "category": "volatility_comfort",
-            "question": "What's the maximum loss you could accept in a single year?",
-            "type": "single_choice",
-            "options": [
-                {"value": "5_percent", "text": "5% - I need stability", "score": 1},
-                {"value": "10_percent", "text": "10% - Small fluctuations are OK", "score": 2},
-                {"value": "20_percent", "text": "20% - I can handle moderate swings", "score": 3},
-                {"value": "30_plus", "text": "30%+ - I'm comfortable with high volatility", "score": 4}
-            ]
-        },
-        {
-            "id": 4,
-            "category": "time_pressure",
-            "question": "When do you expect to need this money?",
-            "type": "single_choice",
-            "options": [
-                {"value": "less_2_years", "text": "Less than 2 years", "score": 1},
-                {"value": "2_5_years", "text": "2-5 years", "score": 2},
-                {"value": "5_10_years", "text": "5-10 years", "score": 3},
-                {"value": "more_10_years", "text": "More than 10 years", "score": 4}
-            ]
-        },
-        {
-            "id": 5,
-            "category": "priority",
-            "question": "What's most important to you?",
-            "type": "single_choice",
-            "options": [
-                {"value": "preserve_capital", "text": "Preserving my money (avoiding losses)", "score": 1},
-                {"value": "steady_income", "text": "Generating steady income", "score": 2},
-                {"value": "balanced_growth", "text": "Balanced growth with some income", "score": 3},
-                {"value": "maximize_growth", "text": "Maximizing long-term growth", "score": 4}
-            ]
-        }
-    ]
-    
-    return {
-        "total_questions": len(questions),
-        "questions": questions
+    headers = {
+        "ETag": RISK_QUESTIONS_ETAG,
+        "Cache-Control": RISK_QUESTIONS_CACHE_CONTROL,
+        "Vary": "Accept-Encoding"
     }
+    
+    # Conditional request from a client that already has this version
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if "*" in candidates or RISK_QUESTIONS_ETAG in candidates:
+        return Response(status_code=304, headers=headers)
+    
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(RISK_QUESTIONS_BODIES[encoding], media_type="application/json", headers=headers)
+
+def score_risk_responses(risk_responses: List[RiskAssessmentResponse]):
+    """Validate responses against the questionnaire and attach the table's scores"""
+    scored = []
+    answered = set()
+    for response in risk_responses:
+        score = RISK_OPTION_SCORES.get((response.question_id, response.selected_option))
+        if score is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown option '{response.selected_option}' for question {response.question_id}"
+            )
+        if response.question_id in answered:
+            raise HTTPException(status_code=400, detail=f"Question {response.question_id} answered more than once")
+        answered.add(response.question_id)
+        scored.append({
+            "question_id": response.question_id,
+            "selected_option": response.selected_option,
+            "score": score
+        })
+    return scored
 
 @app.post("/submit-risk-assessment")
 def submit_risk_assessment(session_id: str, risk_responses: List[RiskAssessmentResponse]):
     """Submit risk tolerance responses"""
-    if session_id not in assessment_sessions:
+    session = session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Assessment session not found")
     
-    assessment_sessions[session_id]["risk_responses"] = [r.dict() for r in risk_responses]
-    assessment_sessions[session_id]["status"] = "risk_assessment_complete"
+    session.set_risk_responses(score_risk_responses(risk_responses))
+    session.status = "risk_assessment_complete"
+    session_store.save(session)
     
     return {
         "session_id": session_id,
@@ -393,13 +1012,47 @@ def submit_risk_assessment(session_id: str, risk_responses: List[RiskAssessmentR
         "next_step": "/generate-recommendation"
     }
 
-@app.post("/generate-recommendation")
-def generate_recommendation(session_id: str):
+@app.post("/generate-recommendation", response_model=RecommendationResponse)
+async def generate_recommendation(session_id: str, fresh_projections: bool = False):
     """Generate comprehensive investment recommendation"""
-    if session_id not in assessment_sessions:
+    # Store calls may wait on a SQLite lock, so they run in the threadpool
+    stored_session = await run_in_threadpool(session_store.get, session_id)
+    if stored_session is None:
         raise HTTPException(status_code=404, detail="Assessment session not found")
     
-    session = assessment_sessions[session_id]
+    recommendation = await build_recommendation(stored_session, fresh_projections)
+    
+    await run_in_threadpool(session_store.save, stored_session)
+    
+    # Log the assessment data
+    log_assessment_data(stored_session)
+    
+    return FastJSONResponse(recommendation)
+
+@app.post("/assess", response_model=RecommendationResponse)
+async def assess(assessment: CompleteAssessment, persist: bool = False, fresh_projections: bool = False):
+    """Validate, score, allocate and project a complete assessment in one call"""
+    # The id is always generated here so persist=true can never overwrite an existing session
+    session = AssessmentSession(session_id=str(uuid.uuid4()), created_at=datetime.now().isoformat())
+    session.set_demographics(assessment.demographics.model_dump())
+    session.set_financial_goals(assessment.financial_goals.model_dump())
+    session.set_risk_responses(score_risk_responses(assessment.risk_responses))
+    session.status = "risk_assessment_complete"
+    
+    recommendation = await build_recommendation(session, fresh_projections)
+    
+    # Server-side session state is only created when the caller asks for it
+    if persist:
+        await run_in_threadpool(session_store.save, session)
+    
+    # Log the assessment data
+    log_assessment_data(session)
+    
+    return FastJSONResponse(recommendation)
+
+async def build_recommendation(stored_session: AssessmentSession, fresh_projections: bool = False):
+    """Score a fully populated session and mark it completed (the caller saves it)"""
+    session = stored_session.as_dict()
     
     # Validate all data is present
     if not all([session["demographics"], session["financial_goals"], session["risk_responses"]]):
@@ -419,35 +1072,20 @@ def generate_recommendation(session_id: str):
         "investment_horizon": session["financial_goals"]["time_horizon"]
     }
     
-    # Get ML prediction
-    input_df = pd.DataFrame([ml_input])
-    ml_prediction = model.predict(input_df)[0]
+    # Get ML prediction and SHAP explanation
+    ml_prediction, shap_vals = await score_profile(ml_input, routing_key=stored_session.session_id)
     
-    # Generate SHAP explanation
-    shap_values = explainer.shap_values(input_df)
-    if isinstance(shap_values, list):
-        predicted_class_idx = int(ml_prediction) - 1
-        if predicted_class_idx < 0 or predicted_class_idx >= len(shap_values):
-            predicted_class_idx = 0
-        shap_vals = shap_values[predicted_class_idx][0]
-    else:
-        shap_vals = shap_values[0]
-    
-    if len(shap_vals.shape) > 1:
-        shap_vals = shap_vals.flatten()
-    
-    feature_names = input_df.columns.tolist()
-    feature_importance = dict(zip(feature_names, shap_vals.tolist()))
+    feature_importance = dict(zip(FEATURE_NAMES, shap_vals))
     
     # Generate portfolio allocation
     portfolio_allocation = generate_portfolio_allocation(int(ml_prediction), session)
     
-    # Calculate projections
-    projections = calculate_projections(session, portfolio_allocation)
+    # Calculate projections (Monte Carlo simulation runs off the event loop)
+    projections = await run_inference(calculate_projections, session, portfolio_allocation, fresh_projections)
     
     # Create comprehensive recommendation
     recommendation = {
-        "session_id": session_id,
+        "session_id": stored_session.session_id,
         "assessment_summary": {
             "questionnaire_risk_score": calculated_risk_tolerance,
             "ml_predicted_risk_score": int(ml_prediction),
@@ -460,63 +1098,83 @@ def generate_recommendation(session_id: str):
         "disclaimer": "This recommendation is for educational purposes only and should not be considered as financial advice."
     }
     
-    # Mark session as completed and log the data
-    session["completed"] = True
-    session["recommendation"] = recommendation
-    session["completed_at"] = datetime.now().isoformat()
-    
-    # Log the assessment data
-    log_assessment_data(session)
+    # Mark session as completed
+    stored_session.completed = True
+    stored_session.completed_at = datetime.now().isoformat()
+    stored_session.risk_scores = (calculated_risk_tolerance, int(ml_prediction))
     
     return recommendation
 
+# Base allocation per risk level and expected annual return per asset class
+BASE_ALLOCATIONS = {
+    1: {"stocks": 20, "bonds": 70, "cash": 10},
+    2: {"stocks": 40, "bonds": 50, "cash": 10},
+    3: {"stocks": 60, "bonds": 35, "cash": 5},
+    4: {"stocks": 80, "bonds": 20, "cash": 0},
+    5: {"stocks": 90, "bonds": 10, "cash": 0}
+}
+EXPECTED_RETURNS = {"stocks": 0.08, "bonds": 0.04, "cash": 0.02}
+
+def portfolio_expected_return(allocation: dict):
+    """Expected annual return of a percentage allocation"""
+    return sum([
+        allocation[asset] / 100 * EXPECTED_RETURNS[asset]
+        for asset in allocation
+    ])
+
+def build_allocation_table():
+    """Allocation for every (risk level, age > 60, emergency fund < 3 months) combination"""
+    table = {}
+    for risk_level, base in BASE_ALLOCATIONS.items():
+        for older in (False, True):
+            for low_emergency_fund in (False, True):
+                allocation = base.copy()
+                
+                # Age adjustment
+                if older:
+                    allocation["bonds"] += 10
+                    allocation["stocks"] -= 10
+                
+                # Emergency fund adjustment
+                if low_emergency_fund:
+                    allocation["cash"] += 10
+                    allocation["stocks"] -= 10
+                
+                # Ensure allocations sum to 100
+                allocation["stocks"] += 100 - sum(allocation.values())
+                table[(risk_level, older, low_emergency_fund)] = allocation
+    return table
+
+# Shared, read-only allocation dicts; each request only looks one up
+ALLOCATION_TABLE = build_allocation_table()
+# Expected return keyed by (stocks, bonds, cash) percentages
+PORTFOLIO_RETURNS = {
+    tuple(allocation.values()): portfolio_expected_return(allocation)
+    for allocation in ALLOCATION_TABLE.values()
+}
+# The same allocation and projection maths over arrays of sessions (see recommendation_engine.py)
+recommender = ColumnarRecommender(ALLOCATION_TABLE, PORTFOLIO_RETURNS)
+
 def generate_portfolio_allocation(risk_level: int, session: dict):
     """Generate portfolio allocation based on risk level and user profile"""
-    base_allocations = {
-        1: {"stocks": 20, "bonds": 70, "cash": 10},
-        2: {"stocks": 40, "bonds": 50, "cash": 10},
-        3: {"stocks": 60, "bonds": 35, "cash": 5},
-        4: {"stocks": 80, "bonds": 20, "cash": 0},
-        5: {"stocks": 90, "bonds": 10, "cash": 0}
-    }
-    
-    allocation = base_allocations[risk_level].copy()
-    
-    # Adjust based on user profile
-    demographics = session["demographics"]
-    financial_goals = session["financial_goals"]
-    
-    # Age adjustment
-    if demographics["age"] > 60:
-        allocation["bonds"] += 10
-        allocation["stocks"] -= 10
-    
-    # Emergency fund adjustment
-    if financial_goals["emergency_fund_months"] < 3:
-        allocation["cash"] += 10
-        allocation["stocks"] -= 10
-    
-    # Ensure allocations sum to 100
-    total = sum(allocation.values())
-    if total != 100:
-        diff = 100 - total
-        allocation["stocks"] += diff
-    
+    key = (
+        risk_level,
+        session["demographics"]["age"] > 60,
+        session["financial_goals"]["emergency_fund_months"] < 3
+    )
     return {
-        "allocation": allocation,
+        "allocation": ALLOCATION_TABLE[key],
         "recommended_monthly_investment": calculate_recommended_investment(session),
         "rebalancing_frequency": "quarterly"
     }
 
-def calculate_projections(session: dict, portfolio_allocation: dict):
-    """Calculate investment projections"""
-    expected_returns = {"stocks": 0.08, "bonds": 0.04, "cash": 0.02}
-    
+@stage_seconds.time("projection")
+def calculate_projections(session: dict, portfolio_allocation: dict, fresh_paths: bool = False):
+    """Calculate investment projections; the simulation is seeded from the inputs unless fresh_paths"""
     allocation = portfolio_allocation["allocation"]
-    portfolio_return = sum([
-        allocation[asset] / 100 * expected_returns[asset] 
-        for asset in allocation
-    ])
+    portfolio_return = PORTFOLIO_RETURNS.get(tuple(allocation.values()))
+    if portfolio_return is None:
+        portfolio_return = portfolio_expected_return(allocation)
     
     financial_goals = session["financial_goals"]
     current_value = financial_goals["current_savings"]
@@ -526,15 +1184,29 @@ def calculate_projections(session: dict, portfolio_allocation: dict):
     # Calculate future value
     future_value = calculate_future_value(current_value, monthly_contribution, portfolio_return, years)
     
+    # Simulate return paths for percentile bands and the chance of reaching the target
+    target_amount = financial_goals.get("target_amount")
+    simulation = projector.project(current_value, monthly_contribution, allocation, years, target_amount,
+                                   fresh=fresh_paths)
+    probability = simulation["probability_of_reaching_target"]
+    
     return {
         "expected_annual_return": f"{portfolio_return:.1%}",
         "projected_portfolio_value": f"${future_value:,.0f}",
         "monthly_contribution_needed": f"${monthly_contribution:,.0f}",
+        "projected_value_range": {
+            "pessimistic_p10": f"${simulation['final_value']['p10']:,.0f}",
+            "median_p50": f"${simulation['final_value']['p50']:,.0f}",
+            "optimistic_p90": f"${simulation['final_value']['p90']:,.0f}"
+        },
         "goal_achievement": {
             "target_amount": financial_goals.get("target_amount", 0),
             "projected_amount": future_value,
-            "likely_to_achieve": future_value >= financial_goals.get("target_amount", 0) if financial_goals.get("target_amount") else True
-        }
+            "probability_of_success": probability,
+            # Same source as projected_amount; the simulated chance is probability_of_success
+            "likely_to_achieve": future_value >= target_amount if target_amount else True
+        },
+        "simulation": simulation
     }
 
 def calculate_recommended_investment(session: dict):
@@ -552,19 +1224,8 @@ def calculate_recommended_investment(session: dict):
 
 def calculate_future_value(present_value, monthly_payment, annual_rate, years):
     """Calculate future value with compound interest"""
-    monthly_rate = annual_rate / 12
-    months = years * 12
-    
-    # Future value of present amount
-    fv_present = present_value * (1 + annual_rate) ** years
-    
-    # Future value of monthly payments (annuity)
-    if monthly_rate > 0:
-        fv_payments = monthly_payment * (((1 + monthly_rate) ** months - 1) / monthly_rate)
-    else:
-        fv_payments = monthly_payment * months
-    
-    return fv_present + fv_payments
+    growth, annuity = future_value_factors(annual_rate, years)
+    return present_value * growth + monthly_payment * annuity
 
 def generate_explanation(session: dict, feature_importance: dict, risk_level: int):
     """Generate user-friendly explanation"""
@@ -618,50 +1279,470 @@ def get_risk_category(risk_level: int):
     }
     return categories.get(risk_level, "Moderate")
 
-def log_assessment_data(session: dict):
+@stage_seconds.time("log_enqueue")
+def log_assessment_data(session: AssessmentSession):
     """Log assessment data for analytics"""
+    assessment_summary = None
+    if session.risk_scores:
+        questionnaire_score, ml_score = session.risk_scores
+        assessment_summary = {
+            "questionnaire_risk_score": questionnaire_score,
+            "ml_predicted_risk_score": ml_score,
+            "final_risk_category": get_risk_category(ml_score)
+        }
+    
     log_entry = {
-        "session_id": session.get("session_id"),
+        "session_id": session.session_id,
         "timestamp": datetime.now().isoformat(),
-        "demographics": session.get("demographics"),
-        "financial_goals": session.get("financial_goals"),
-        "risk_responses": session.get("risk_responses"),
-        "recommendation": session.get("recommendation", {}).get("assessment_summary"),
-        "completed": session.get("completed", False)
+        "demographics": session.demographics_dict(),
+        "financial_goals": session.financial_goals_dict(),
+        "risk_responses": session.risk_responses_list(),
+        "recommendation": assessment_summary,
+        "completed": session.completed
     }
     
-    assessment_logs.append(log_entry)
-    
-    # Also save to file for persistence
-    log_file = "assessment_logs.jsonl"
-    with open(log_file, "a") as f:
-        f.write(json.dumps(log_entry) + "\n")
+    # Persisted and indexed in batches by the background writer
+    get_log_writer().write(log_entry)
+
+def get_log_writer():
+    global log_writer
+    if log_writer is None:
+        log_writer = create_log_writer(
+            index=log_index,
+            on_flush=lambda seconds, entries: stage_seconds.observe(seconds, "log_write")
+        )
+    return log_writer
+
+LOG_PAGE_MAX = 1000
 
 @app.get("/get-assessment-logs")
-def get_assessment_logs():
-    """Get all assessment logs (admin endpoint)"""
+def get_assessment_logs(
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=LOG_PAGE_MAX),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    completed: Optional[bool] = None,
+    risk_category: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """Get assessment logs one page at a time, or stream them as NDJSON (admin endpoint)"""
+    filters = {
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "completed": completed,
+        "risk_category": risk_category,
+    }
+    
+    if format == "ndjson":
+        # Without a limit the whole filtered range is streamed, one index page at a time
+        if limit is None:
+            entries = log_index.iter_entries(after=cursor, **filters)
+        else:
+            entries = iter(log_index.page(limit=limit, after=cursor, **filters)[0])
+        lines = (json.dumps(entry) + "\n" for entry in entries)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    
+    logs, next_cursor = log_index.page(limit=limit or 100, after=cursor, **filters)
     return {
-        "total_assessments": len(assessment_logs),
-        "logs": assessment_logs
+        "total_assessments": log_index.count(**filters),
+        "logs": logs,
+        "next_cursor": next_cursor
     }
 
 @app.get("/session-status/{session_id}")
 def get_session_status(session_id: str):
     """Get current session status"""
-    if session_id not in assessment_sessions:
+    session = session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = assessment_sessions[session_id]
     return {
         "session_id": session_id,
-        "status": session["status"],
-        "completed": session.get("completed", False),
-        "created_at": session["created_at"]
+        "status": session.status,
+        "completed": session.completed,
+        "created_at": session.created_at
+    }
+
+@app.get("/explanation-cache/stats")
+async def get_explanation_cache_stats():
+    """Get SHAP explanation cache counters of the active model (admin endpoint)"""
+    if active_bundle is None:
+        raise HTTPException(status_code=503, detail="Model is still loading")
+    return active_bundle.explanation_cache.stats()
+
+@app.get("/micro-batching/stats")
+async def get_micro_batching_stats():
+    """Get achieved batch sizes of the request-coalescing scheduler (admin endpoint)"""
+    if micro_batcher is None:
+        return {"enabled": MICROBATCH_ENABLED, "batches": 0, "rows": 0}
+    return {"enabled": MICROBATCH_ENABLED, **micro_batcher.stats()}
+
+# Sessions scored per columnar pass by /recommendations/recompute
+RECOMPUTE_CHUNK = int(os.environ.get("RECOMPUTE_CHUNK", 10000))
+
+@lru_cache(maxsize=None)
+def explanation_variant(risk_level: int, age_band: int):
+    """generate_explanation's text, which depends only on the risk level and age band"""
+    return generate_explanation({"demographics": {"age": AGE_BAND_AGES[age_band]}}, {}, risk_level)
+
+@lru_cache(maxsize=None)
+def next_steps_variant(needs_emergency_fund: bool, debt_exceeds_savings: bool):
+    """generate_next_steps' list, which depends only on these two flags"""
+    return tuple(generate_next_steps({"financial_goals": {
+        "emergency_fund_months": 0 if needs_emergency_fund else 6,
+        "existing_debt": 1 if debt_exceeds_savings else 0,
+        "current_savings": 0
+    }}))
+
+def recompute_batch(sessions, bundle, summary, results=None, updates=None):
+    """Score a batch of sessions and rebuild their recommendations in columnar passes"""
+    columns = session_columns(sessions)
+    input_df = pd.DataFrame({
+        "age": columns["age"],
+        "income": columns["income"],
+        "risk_tolerance": columns["questionnaire_risk_tolerance"],
+        "investment_horizon": columns["time_horizon"]
+    }, columns=FEATURE_NAMES)
+    levels = np.asarray(predict_levels(input_df, bundle))
+    recommendation = recommender.recommend(
+        age=columns["age"],
+        income=columns["income"],
+        risk_level=levels,
+        time_horizon=columns["time_horizon"],
+        current_savings=columns["current_savings"],
+        monthly_expenses=columns["monthly_expenses"],
+        emergency_fund_months=columns["emergency_fund_months"],
+        existing_debt=columns["existing_debt"],
+        target_amount=columns["target_amount"]
+    )
+    
+    summary["recomputed"] += len(sessions)
+    summary["projected_to_reach_target"] += int(recommendation["projected_to_reach_target"].sum())
+    for level, count in zip(*np.unique(levels, return_counts=True)):
+        category = get_risk_category(int(level))
+        summary["risk_categories"][category] = summary["risk_categories"].get(category, 0) + int(count)
+    
+    questionnaire = columns["questionnaire_risk_tolerance"].tolist()
+    for i, (session, level) in enumerate(zip(sessions, levels.tolist())):
+        if session.risk_scores and session.risk_scores[1] != level:
+            summary["risk_level_changed"] += 1
+            if updates is not None:
+                session.risk_scores = (questionnaire[i], level)
+                updates.append(session)
+    
+    if results is not None:
+        values = {name: column.tolist() for name, column in recommendation.items()}
+        for i, (session, level) in enumerate(zip(sessions, levels.tolist())):
+            results.append({
+                "session_id": session.session_id,
+                "ml_predicted_risk_score": level,
+                "risk_category": get_risk_category(level),
+                "allocation": {"stocks": values["stocks"][i], "bonds": values["bonds"][i], "cash": values["cash"][i]},
+                "recommended_monthly_investment": values["recommended_monthly_investment"][i],
+                "expected_annual_return": f"{values['expected_annual_return'][i]:.1%}",
+                "projected_portfolio_value": f"${values['projected_value'][i]:,.0f}",
+                "projected_to_reach_target": values["projected_to_reach_target"][i],
+                "explanation": explanation_variant(level, values["age_band"][i]),
+                "next_steps": next_steps_variant(values["needs_emergency_fund"][i], values["debt_exceeds_savings"][i])
+            })
+
+@app.post("/recommendations/recompute")
+def recompute_recommendations(persist: bool = False, include_results: bool = False):
+    """Re-score every session with a complete assessment on the active model and rebuild its
+    allocation, contribution and projected value in columnar batches (admin endpoint)"""
+    bundle = active_bundle
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Model is still loading")
+    started = time.perf_counter()
+    summary = {
+        "model_version": bundle.version,
+        "sessions": 0,
+        "recomputed": 0,
+        "risk_level_changed": 0,
+        "projected_to_reach_target": 0,
+        "risk_categories": {}
+    }
+    results = [] if include_results else None
+    updates = [] if persist else None
+    batch = []
+    for session in session_store.iter_sessions():
+        summary["sessions"] += 1
+        if session.demographics and session.financial_goals and session.risk_responses:
+            batch.append(session)
+        if len(batch) >= RECOMPUTE_CHUNK:
+            recompute_batch(batch, bundle, summary, results, updates)
+            batch = []
+    if batch:
+        recompute_batch(batch, bundle, summary, results, updates)
+    
+    # Saved after the scan so the store is not written while it is being iterated
+    for session in updates or ():
+        session_store.save(session)
+    summary["persisted"] = len(updates or ())
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    if results is not None:
+        summary["results"] = results
+    return summary
+
+# Profiles scored through a freshly built bundle before it takes traffic
+WARM_UP_PROFILES = pd.DataFrame(
+    [[age, income, risk_tolerance, horizon]
+     for age, income in ((25, 40000), (45, 90000), (65, 150000))
+     for risk_tolerance in (1, 3, 5)
+     for horizon in (2, 15, 30)],
+    columns=FEATURE_NAMES
+)
+
+def warm_bundle(bundle):
+    """Run the scoring and SHAP paths once so the first requests after a swap are not cold"""
+    predictions, _ = score_and_explain(WARM_UP_PROFILES, bundle)
+    predict_probabilities(WARM_UP_PROFILES, bundle)
+    return predictions
+
+# Background registry loads: at most one at a time, reported by /admin/models
+MODEL_REGISTRY_POLL_SECONDS = float(os.environ.get("MODEL_REGISTRY_POLL_SECONDS", 0))
+model_swap = {"state": "idle", "version": None, "error": None}
+model_swap_task = None
+
+def load_and_activate(version):
+    """Load a registry version, build and warm its bundle off the request path, then swap it in"""
+    model_swap.update(state="loading", version=version, error=None)
+    try:
+        loaded_bundles = [b for b in (previous_bundle, candidate_bundle) if b is not None and b.version == version]
+        if loaded_bundles:
+            # Already loaded (a rollback from another worker, or a promoted candidate): no need to rebuild it
+            bundle = loaded_bundles[0]
+        else:
+            loaded, metadata = model_registry.load(version)
+            bundle = build_model_bundle(loaded, version, metadata)
+            warm_bundle(bundle)
+        activate_bundle(bundle)
+        model_registry.set_active(version)
+        model_swap.update(state="idle", error=None)
+        print(f"✅ Model version {version} activated")
+        return bundle
+    except Exception as e:
+        model_swap.update(state="failed", error=str(e))
+        print(f"⚠️ Activating model version {version} failed: {e}")
+        raise
+
+def start_model_swap(version):
+    """Start loading a version in the background; 409 if another load is running"""
+    global model_swap_task
+    if model_swap_task is not None and not model_swap_task.done():
+        raise HTTPException(status_code=409, detail=f"Model version {model_swap['version']} is still loading")
+    model_swap_task = asyncio.create_task(asyncio.to_thread(load_and_activate, version))
+    return model_swap_task
+
+async def follow_registry():
+    """Activate whatever version the registry's ACTIVE file names, so every worker converges on it"""
+    while True:
+        await asyncio.sleep(MODEL_REGISTRY_POLL_SECONDS)
+        version = model_registry.active_version()
+        if active_bundle is None or version in (None, active_bundle.version) or model_swap["state"] == "loading":
+            continue
+        try:
+            await start_model_swap(version)
+        except Exception:
+            # Reported through model_swap; the next tick retries
+            pass
+
+@app.get("/admin/models")
+async def list_models():
+    """Registered model versions plus the loaded active and rollback bundles (admin endpoint)"""
+    return {
+        "active": active_bundle.describe() if active_bundle else None,
+        "previous": previous_bundle.describe() if previous_bundle else None,
+        "registry_active": model_registry.active_version(),
+        "swap": model_swap,
+        "versions": model_registry.list_versions()
+    }
+
+@app.post("/admin/models/register")
+def register_model(accuracy: Optional[float] = None):
+    """Register the current model.joblib as a new immutable version (admin endpoint)"""
+    try:
+        return model_registry.register("model.joblib", training_accuracy=accuracy)
+    except (OSError, ModelRegistryError) as e:
+        raise HTTPException(status_code=400, detail=f"Model registration failed: {str(e)}")
+
+@app.post("/admin/models/{version}/activate")
+async def activate_model(version: str, wait: bool = False):
+    """Load, warm up and swap in a registered version without blocking requests (admin endpoint)"""
+    try:
+        model_registry.metadata(version)
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if active_bundle is not None and active_bundle.version == version:
+        return {"message": f"Model version {version} is already active", "active": active_bundle.describe()}
+    
+    task = start_model_swap(version)
+    if not wait:
+        return JSONResponse(
+            {"message": f"Loading model version {version}", "status_url": "/admin/models"},
+            status_code=202
+        )
+    try:
+        bundle = await task
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Activating model version {version} failed: {str(e)}")
+    return {"message": f"Model version {version} activated", "active": bundle.describe()}
+
+@app.post("/admin/models/rollback")
+def rollback_model():
+    """Swap back to the previously active model, which is still loaded (admin endpoint)"""
+    with bundle_swap_lock:
+        if previous_bundle is None:
+            raise HTTPException(status_code=409, detail="No previous model version is loaded")
+        publish_bundle(previous_bundle, active_bundle)
+        bundle = active_bundle
+    if bundle.version == UNREGISTERED_VERSION:
+        model_registry.clear_active()
+    else:
+        model_registry.set_active(bundle.version)
+    print(f"✅ Rolled back to model version {bundle.version}")
+    
+    return {
+        "message": f"Rolled back to model version {bundle.version}",
+        "active": bundle.describe(),
+        "previous": previous_bundle.describe()
+    }
+
+def load_candidate(version):
+    """Load and warm a registry version as the shadow/canary candidate"""
+    global candidate_bundle
+    loaded, metadata = model_registry.load(version)
+    bundle = build_model_bundle(loaded, version, metadata)
+    warm_bundle(bundle)
+    with bundle_swap_lock:
+        candidate_bundle = bundle
+        shadow_router.stats.reset()
+        refresh_process_pool()
+    print(f"✅ Candidate model version {version} loaded")
+    return bundle
+
+def load_candidate_in_background(version):
+    """Startup hook for CANDIDATE_MODEL_VERSION, which must not delay serving"""
+    try:
+        load_candidate(version)
+    except Exception as e:
+        print(f"⚠️ Candidate model version {version} unavailable: {e}")
+
+@app.get("/admin/candidate")
+async def get_candidate():
+    """Candidate model, traffic split and shadow comparison metrics (admin endpoint)"""
+    return {
+        "candidate": candidate_bundle.describe() if candidate_bundle else None,
+        "active": active_bundle.describe() if active_bundle else None,
+        "traffic": shadow_router.config(),
+        "metrics": shadow_router.stats.snapshot()
+    }
+
+@app.post("/admin/candidate/traffic")
+async def set_candidate_traffic(
+    shadow_fraction: Optional[float] = Query(None, ge=0, le=1),
+    canary_percent: Optional[float] = Query(None, ge=0, le=100)
+):
+    """Change the shadowed fraction of requests and the canary share of users (admin endpoint)"""
+    shadow_router.configure(shadow_fraction, canary_percent)
+    return shadow_router.config()
+
+@app.post("/admin/candidate/{version}")
+def set_candidate(
+    version: str,
+    shadow_fraction: Optional[float] = Query(None, ge=0, le=1),
+    canary_percent: Optional[float] = Query(None, ge=0, le=100)
+):
+    """Load a registered version as the candidate, resetting its metrics (admin endpoint)"""
+    try:
+        bundle = load_candidate(version)
+    except ModelRegistryError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    shadow_router.configure(shadow_fraction, canary_percent)
+    return {"candidate": bundle.describe(), "traffic": shadow_router.config()}
+
+@app.delete("/admin/candidate")
+def remove_candidate():
+    """Stop shadow and canary scoring and unload the candidate (admin endpoint)"""
+    global candidate_bundle
+    with bundle_swap_lock:
+        removed, candidate_bundle = candidate_bundle, None
+        refresh_process_pool()
+    return {
+        "removed": removed.version if removed else None,
+        "metrics": shadow_router.stats.snapshot()
+    }
+
+@app.post("/admin/reload-model")
+def reload_model():
+    """Reload the local model (model.forest or model.joblib) and rebuild the explainer, engines and caches derived from it"""
+    global startup_error
+    
+    try:
+        new_model, metadata = load_local_model()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {str(e)}")
+    bundle = build_model_bundle(new_model, UNREGISTERED_VERSION, metadata)
+    warm_bundle(bundle)
+    activate_bundle(bundle)
+    startup_error = None
+    print("✅ Model reloaded")
+    
+    return {
+        "message": "Model reloaded successfully",
+        "explanation_cache": bundle.explanation_cache.stats()
+    }
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness probe: the process is up and serving"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: the model is loaded and scoring requests can be served"""
+    bundle = active_bundle
+    body = {
+        "status": "ready" if bundle is not None else ("failed" if startup_error else "loading"),
+        "startup_mode": STARTUP_MODE,
+        "model_loaded": bundle is not None,
+        "model_version": bundle.version if bundle else None,
+        "explainer_ready": bundle is not None and bundle.explainer is not None,
+        "startup_timings": startup_timings
+    }
+    if startup_error:
+        body["error"] = startup_error
+    return JSONResponse(body, status_code=200 if bundle is not None else 503)
+
+def log_writer_stat(name):
+    return log_writer.stats()[name] if log_writer is not None else 0
+
+metrics_registry.gauge("robo_sessions", "Assessment sessions in the session store", callback=lambda: session_store.count())
+metrics_registry.gauge("robo_assessment_log_queue_depth", "Log entries waiting for the background writer", callback=lambda: log_writer_stat("queue_depth"))
+metrics_registry.counter("robo_assessment_log_entries_written_total", "Log entries appended to the JSONL log", callback=lambda: log_writer_stat("written"))
+metrics_registry.counter("robo_assessment_log_entries_dropped_total", "Log entries dropped because the queue was full", callback=lambda: log_writer_stat("dropped"))
+metrics_registry.gauge("robo_inference_in_flight", "Calls running or queued on the inference executor", callback=lambda: inference_executor.in_flight if inference_executor is not None else 0)
+metrics_registry.counter("robo_inference_rejected_total", "Calls rejected with 503 because the executor was saturated", callback=lambda: inference_executor.rejected if inference_executor is not None else 0)
+metrics_registry.gauge("robo_model_info", "Model version being served", ("version",), callback=lambda: {(active_bundle.version,): 1} if active_bundle is not None else {})
+
+@app.get("/metrics")
+def get_metrics():
+    """Request, stage-latency and queue metrics of this worker in Prometheus text format"""
+    return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/metrics/slow-requests")
+async def get_slow_request_profiles():
+    """Collapsed stacks sampled from recent slow requests (enable with SLOW_REQUEST_PROFILE_RATE)"""
+    return {
+        "enabled": slow_request_profiler.enabled,
+        "sample_rate": slow_request_profiler.sample_rate,
+        "threshold_ms": slow_request_profiler.threshold * 1000,
+        "profiles": slow_request_profiler.recent()
     }
 
 # Root endpoint
 @app.get("/")
-def root():
+async def root():
     return {
         "message": "Robo-Advisor Pre-Screening Tool API",
         "available_endpoints": [
@@ -672,7 +1753,8 @@ def root():
             "/submit-risk-assessment",
             "/generate-recommendation"
         ],
-        "legacy_endpoints": ["/predict", "/explain"],
+        "single_call_assessment": "/assess",
+        "legacy_endpoints": ["/predict", "/explain", "/predict/batch", "/explain/batch"],
         "docs": "/docs"
     }
 
@@ -0,0 +1,334 @@
+"""Score a whole client book offline with the API's model, allocation and projection logic.
+
+The input is a CSV or Parquet file with the ``ClientData`` columns age,
+income, risk_tolerance and investment_horizon (the layout of
+synthetic_robo_advisor_data.csv). Other columns are copied to the output.
+The financial-goal columns current_savings, monthly_expenses,
+emergency_fund_months, target_amount and time_horizon are used when present.
+Otherwise GOAL_DEFAULTS apply, and time_horizon falls back to
+investment_horizon.
+
+The file is streamed in ``--chunk-size`` row chunks. Each chunk is predicted,
+and optionally explained with SHAP, in one vectorized call. At most
+2 x ``--jobs`` chunks are in memory at a time, whatever the file size. With
+``--jobs`` above 1, chunks are scored in forked worker processes that share the
+loaded model, and the output keeps the input order. The output is written
+to ``<output>.partial`` and renamed when complete.
+
+Added columns: risk_level, risk_category, stocks_pct, bonds_pct, cash_pct,
+recommended_monthly_investment, expected_annual_return, projected_value
+(compound growth, as in calculate_projections) and projected_to_reach_target.
+They come from the columnar recommender (recommendation_engine.py), which
+matches generate_portfolio_allocation and calculate_projections exactly.
+``--monte-carlo`` runs calculate_projections for every row and adds p10_value, p50_value, p90_value
+and probability_of_success. ``--shap`` adds one shap_<feature> column per
+feature, for the predicted class. Input columns with these names, such as the
+training label risk_level, are replaced. Features are checked with the API's
+ClientData validator, so a row the API would reject with a 422 (a missing,
+fractional, non-numeric or out-of-range feature) is kept with empty scores
+and the reasons in validation_errors.
+
+Examples:
+    python batch-score.py clients.csv scored.csv
+    python batch-score.py clients.parquet scored.parquet --jobs -1 --shap
+    python batch-score.py clients.csv scored.csv --model-version 20250101T120000-1a2b3c4d --monte-carlo
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+# The batch job loads the model itself, and its rows are mostly distinct: skip the
+# import-time load and the per-request SHAP cache
+os.environ.setdefault("STARTUP_MODE", "lazy")
+os.environ.setdefault("SHAP_CACHE_SIZE", "0")
+import app  # noqa: E402
+
+# Used for financial-goal columns missing from the input
+GOAL_DEFAULTS = {
+    "current_savings": 0.0,
+    "monthly_expenses": 0.0,
+    # Not below 3 months, so no extra cash allocation
+    "emergency_fund_months": 3,
+    "target_amount": np.nan,
+}
+PARQUET_SUFFIXES = (".parquet", ".pq")
+RECOMMENDATION_COLUMNS = ["stocks_pct", "bonds_pct", "cash_pct", "recommended_monthly_investment",
+                          "expected_annual_return", "projected_value", "projected_to_reach_target"]
+MONTE_CARLO_COLUMNS = ["p10_value", "p50_value", "p90_value", "probability_of_success"]
+
+
+def is_parquet(path):
+    return path.lower().endswith(PARQUET_SUFFIXES)
+
+
+def import_parquet():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("Parquet files need pyarrow: pip install pyarrow")
+    return pyarrow, pyarrow.parquet
+
+
+def iter_chunks(path, chunk_size):
+    """DataFrames of up to chunk_size rows from a CSV or Parquet file"""
+    if is_parquet(path):
+        _, parquet = import_parquet()
+        for batch in parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file, renamed into place on close"""
+
+    def __init__(self, path):
+        self.path = path
+        self.staging = path + ".partial"
+        self.parquet = is_parquet(path)
+        self._file = None
+        self._writer = None
+
+    def write(self, frame):
+        if self.parquet:
+            pyarrow, parquet = import_parquet()
+            table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = parquet.ParquetWriter(self.staging, table.schema)
+            elif table.schema != self._writer.schema:
+                # e.g. a passthrough column that is all-null in this chunk
+                table = table.cast(self._writer.schema)
+            self._writer.write_table(table)
+        else:
+            first = self._file is None
+            if first:
+                self._file = open(self.staging, "w", newline="")
+            frame.to_csv(self._file, header=first, index=False)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        elif self._file is not None:
+            self._file.close()
+        else:
+            return
+        os.replace(self.staging, self.path)
+
+    def abort(self):
+        """Close and delete the partial output"""
+        for handle in (self._writer, self._file):
+            if handle is not None:
+                handle.close()
+        if os.path.exists(self.staging):
+            os.remove(self.staging)
+
+
+def load_bundle(version=None, with_explainer=False):
+    """Activate the registry version given, else whatever the API would load"""
+    if version:
+        model, metadata = app.model_registry.load(version)
+    else:
+        model, version, metadata = app.load_model()
+    app.activate_bundle(app.build_model_bundle(model, version, metadata, with_explainer))
+    return app.active_bundle
+
+
+def ensure_bundle(version, with_explainer):
+    """Pool initializer: forked workers inherit the parent's bundle, spawned ones load their own"""
+    if app.active_bundle is None:
+        load_bundle(version, with_explainer)
+
+
+def goal_column(chunk, name, default):
+    if name not in chunk:
+        return np.full(len(chunk), default, dtype=float)
+    return pd.to_numeric(chunk[name], errors="coerce").fillna(default).to_numpy(dtype=float)
+
+
+def with_scores(chunk, scores):
+    """chunk with the score columns appended, replacing input columns of the same name"""
+    return chunk.drop(columns=scores.columns, errors="ignore").join(scores)
+
+
+def validation_messages(checked, index):
+    """'field: message; ...' for each row that failed validation, None for valid rows"""
+    messages = [None] * len(index)
+    for error in checked.errors:
+        row, field = error["loc"]
+        text = f"{field}: {error['msg']}"
+        messages[row] = text if messages[row] is None else f"{messages[row]}; {text}"
+    return pd.Series(messages, index=index, dtype=object)
+
+
+def score_chunk(chunk, with_shap=False, monte_carlo=False):
+    """chunk plus its score columns, computed with the active bundle"""
+    bundle = app.active_bundle
+    # The same checks as /predict/batch, so rows the API rejects are not scored here either
+    checked = app.client_data_validator.validate_frame(chunk)
+    valid = checked.valid
+    errors = validation_messages(checked, chunk.index)
+    X = pd.DataFrame({name: checked.columns[name][valid] for name in app.FEATURE_NAMES}, index=chunk.index[valid])
+    if X.empty:
+        # Same columns as any other chunk, all empty
+        names = ["risk_level", "risk_category"] + RECOMMENDATION_COLUMNS + (MONTE_CARLO_COLUMNS if monte_carlo else [])
+        names += [f"shap_{feature}" for feature in app.FEATURE_NAMES] if with_shap else []
+        scores = pd.DataFrame(np.nan, index=chunk.index, columns=names)
+        scores["validation_errors"] = errors
+        return with_scores(chunk, scores)
+    scores = pd.DataFrame(index=X.index)
+
+    predictions = app.predict_levels(X, bundle)
+    scores["risk_level"] = pd.array(predictions, dtype="Int64")
+    scores["risk_category"] = [app.get_risk_category(int(level)) for level in predictions]
+
+    horizons = (
+        pd.to_numeric(chunk["time_horizon"], errors="coerce").fillna(chunk["investment_horizon"])[valid]
+        if "time_horizon" in chunk else X["investment_horizon"]
+    ).to_numpy()
+    goals = {name: goal_column(chunk, name, default)[valid] for name, default in GOAL_DEFAULTS.items()}
+    recommendation = app.recommender.recommend(
+        age=X["age"].to_numpy(),
+        income=X["income"].to_numpy(),
+        risk_level=predictions,
+        time_horizon=horizons,
+        current_savings=goals["current_savings"],
+        monthly_expenses=goals["monthly_expenses"],
+        emergency_fund_months=goals["emergency_fund_months"],
+        target_amount=goals["target_amount"],
+    )
+    for asset in ("stocks", "bonds", "cash"):
+        scores[f"{asset}_pct"] = recommendation[asset]
+    for name in RECOMMENDATION_COLUMNS[3:]:
+        scores[name] = recommendation[name]
+
+    if monte_carlo:
+        columns = {name: [] for name in MONTE_CARLO_COLUMNS}
+        allocations = zip(*(recommendation[asset].tolist() for asset in ("stocks", "bonds", "cash")))
+        for i, (stocks, bonds, cash) in enumerate(allocations):
+            target = goals["target_amount"][i]
+            session = {"financial_goals": {
+                "current_savings": goals["current_savings"][i],
+                "time_horizon": int(horizons[i]),
+                "target_amount": None if np.isnan(target) else target,
+            }}
+            portfolio = {
+                "allocation": {"stocks": stocks, "bonds": bonds, "cash": cash},
+                "recommended_monthly_investment": recommendation["recommended_monthly_investment"][i],
+            }
+            simulation = app.calculate_projections(session, portfolio)["simulation"]
+            columns["p10_value"].append(simulation["final_value"]["p10"])
+            columns["p50_value"].append(simulation["final_value"]["p50"])
+            columns["p90_value"].append(simulation["final_value"]["p90"])
+            columns["probability_of_success"].append(simulation["probability_of_reaching_target"])
+        for name, values in columns.items():
+            scores[name] = values
+
+    if with_shap:
+        # Explain each distinct profile in the chunk once
+        distinct, first, inverse = np.unique(X.to_numpy(), axis=0, return_index=True, return_inverse=True)
+        distinct = pd.DataFrame(distinct, columns=app.FEATURE_NAMES)
+        shap_rows = np.asarray(app.shap_for_rows(distinct, predictions[first], bundle))[inverse.ravel()]
+        for j, feature in enumerate(app.FEATURE_NAMES):
+            scores[f"shap_{feature}"] = shap_rows[:, j]
+    scores = scores.reindex(chunk.index)
+    scores["validation_errors"] = errors
+    return with_scores(chunk, scores)
+
+
+def ordered_map(pool, fn, items, max_pending):
+    """pool.map that keeps at most max_pending items submitted, yielding results in input order"""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of client profiles")
+    parser.add_argument("input", help="CSV or Parquet (.parquet/.pq) file with the ClientData columns")
+    parser.add_argument("output", help="CSV or Parquet file to write")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes (-1: all cores)")
+    parser.add_argument("--shap", action="store_true", help="add predicted-class SHAP columns")
+    parser.add_argument("--monte-carlo", action="store_true",
+                        help="run the Monte Carlo projection per row (PROJECTION_PATHS paths each)")
+    parser.add_argument("--model-version", help="registry version to score with (default: the API's model)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = (os.cpu_count() or 1) if args.jobs == -1 else max(1, args.jobs)
+    if not os.path.exists(args.input):
+        raise SystemExit(f"{args.input} not found")
+
+    started = time.perf_counter()
+    bundle = load_bundle(args.model_version, with_explainer=args.shap)
+    load_seconds = time.perf_counter() - started
+    print(f"✅ Model {bundle.version} ready in {load_seconds:.1f}s")
+
+    score = partial(score_chunk, with_shap=args.shap, monte_carlo=args.monte_carlo)
+    chunks = iter_chunks(args.input, args.chunk_size)
+    pool = None
+    if jobs > 1:
+        methods = multiprocessing.get_all_start_methods()
+        pool = ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("fork" if "fork" in methods else None),
+            initializer=ensure_bundle,
+            initargs=(args.model_version, args.shap),
+        )
+        results = ordered_map(pool, score, chunks, max_pending=2 * jobs)
+    else:
+        results = map(score, chunks)
+
+    writer = ChunkWriter(args.output)
+    rows = unscored = 0
+    started = time.perf_counter()
+    try:
+        for scored in results:
+            writer.write(scored)
+            rows += len(scored)
+            unscored += int(scored["risk_level"].isna().sum()) if "risk_level" in scored else len(scored)
+            elapsed = time.perf_counter() - started
+            print(f"  {rows:,} rows ({rows / elapsed:,.0f} rows/s)")
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    seconds = time.perf_counter() - started
+
+    if rows == 0:
+        print(f"⚠️ {args.input} has no rows, nothing written")
+        return {"rows": 0}
+    report = {
+        "rows": rows,
+        "unscored": unscored,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds),
+        "jobs": jobs,
+        "model_version": bundle.version,
+    }
+    print(f"✅ Scored {rows:,} rows in {seconds:.1f}s ({rows / seconds:,.0f} rows/s, {jobs} "
+          f"{'process' if jobs == 1 else 'processes'}) -> {args.output}")
+    if unscored:
+        print(f"⚠️ {unscored:,} rows failed ClientData validation and were not scored (see validation_errors)")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""File size and load time of the compact model artifact versus model.joblib.
+
+Exports model.joblib with ``export_forest`` (unless --artifact points at an
+existing file), checks that the loaded ``CompiledForest`` gives bit-identical
+``predict_proba`` and SHAP values on synthetic_robo_advisor_data.csv plus a
+random sweep of the API's input domain, then reports:
+
+* file size of each format
+* in-process load time (median of --repeat loads)
+* cold load time in a fresh interpreter, including the imports each loader needs
+
+Usage: python benchmarks/bench_artifact.py [--repeat 20] [--model model.joblib]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from model_artifact import export_forest, load_forest  # noqa: E402
+
+COLD_LOAD = """
+import sys, time
+start = time.perf_counter()
+{imports}
+model = {loader}({path!r})
+print(time.perf_counter() - start)
+"""
+
+
+def random_profiles(n, seed=0):
+    """Random profiles spanning the ranges accepted by the assessment API"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "age": rng.integers(18, 101, n),
+        "income": rng.integers(20000, 50000001, n),
+        "risk_tolerance": rng.integers(1, 6, n),
+        "investment_horizon": rng.integers(1, 51, n),
+    })
+
+
+def check_parity(model, loaded):
+    X = pd.concat([
+        pd.read_csv("synthetic_robo_advisor_data.csv")[list(model.feature_names_in_)],
+        random_profiles(20000),
+    ], ignore_index=True)
+    if not np.array_equal(model.predict_proba(X), loaded.predict_proba(X)):
+        sys.exit("FAIL predict_proba differs")
+    print(f"OK   predict_proba bit-identical on {len(X):,} rows")
+    try:
+        import shap
+    except ImportError:
+        print("shap not installed; skipping SHAP parity")
+        return
+    sample = X.sample(500, random_state=0)
+    expected = shap.TreeExplainer(model).shap_values(sample)
+    actual = shap.TreeExplainer(loaded.shap_model()).shap_values(sample)
+    if not np.array_equal(np.asarray(expected), np.asarray(actual)):
+        sys.exit("FAIL SHAP values differ")
+    print(f"OK   SHAP values bit-identical on {len(sample)} rows")
+
+
+def median_load(loader, path, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loader(path)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def cold_load(imports, loader, path):
+    code = COLD_LOAD.format(imports=imports, loader=loader, path=path)
+    result = subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="model.joblib")
+    parser.add_argument("--artifact", help="existing compact artifact (default: export a fresh one)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = args.artifact or os.path.join(tmp, "model.forest")
+        if not args.artifact:
+            export_forest(model, artifact)
+        check_parity(model, load_forest(artifact))
+
+        formats = {
+            "joblib": (joblib.load, "from joblib import load", "load", args.model),
+            "compact": (load_forest, "from model_artifact import load_forest", "load_forest", artifact),
+        }
+        print(f"{'format':<10}{'size (KB)':>12}{'load (ms)':>12}{'cold (ms)':>12}")
+        for name, (loader, imports, loader_name, path) in formats.items():
+            warm = median_load(loader, path, args.repeat)
+            cold = cold_load(imports, loader_name, path)
+            print(f"{name:<10}{os.path.getsize(path) / 1024:>12.0f}{warm * 1000:>12.1f}{cold * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
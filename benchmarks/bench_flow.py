@@ -0,0 +1,437 @@
+"""Load test of the full assessment flow with per-endpoint and per-stage latency.
+
+Replays assessment flows built from synthetic_robo_advisor_data.csv (age,
+income, investment horizon and a questionnaire answered to match the row's
+risk tolerance) with --concurrency flows in flight, and reports throughput
+plus p50/p95/p99 latency for every endpoint.
+
+Modes:
+
+* ``asgi`` (default): drives the app in-process through httpx's ASGI
+  transport, lifespan included
+* ``uvicorn``: starts this script as a local uvicorn server
+  (``--serve``) and drives it over HTTP; ``--url`` targets a server that is
+  already running (no stage breakdown unless it was started with ``--serve``)
+
+Scenarios: ``steps`` (start, demographics, goals, questions, risk, recommendation),
+``assess`` (the single /assess call) or ``mixed`` (alternating).
+
+The stage breakdown times validation, predict, SHAP, allocation, projection
+and logging by wrapping the app functions that implement them. The wrappers
+are installed by this script and are not part of the app. ``--output`` saves the
+results as JSON. ``--baseline`` compares a run with a saved one, and
+``--max-regression PCT`` exits non-zero when an endpoint's p95 or the flow
+throughput regressed by more than PCT percent.
+
+Usage:
+    python benchmarks/bench_flow.py --flows 200 --concurrency 8 --output before.json
+    python benchmarks/bench_flow.py --mode uvicorn --baseline before.json --max-regression 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from functools import wraps
+
+import httpx
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+# App functions timed for each stage; missing names are skipped
+STAGES = {
+    # Field bounds are checked by Pydantic before an endpoint runs, so only the questionnaire scoring is wrapped
+    "validation": ["score_risk_responses"],
+    "predict": ["predict_levels"],
+    "shap": ["shap_for_rows"],
+    "allocation": ["generate_portfolio_allocation", "calculate_recommended_investment"],
+    "projection": ["calculate_projections"],
+    "logging": ["log_assessment_data"],
+}
+# Environment knobs recorded with every run so results are comparable
+CONFIG_ENV = ("INFERENCE_ENGINE", "INFERENCE_EXECUTOR", "INFERENCE_WORKERS", "MICROBATCH_ENABLED",
+              "SHAP_CACHE_SIZE", "PROJECTION_PATHS", "PROJECTION_SEED", "JSON_ENCODER", "SESSION_BACKEND")
+PRIMARY_GOALS = ["retirement", "home_purchase", "education", "wealth_building", "emergency_fund"]
+
+
+class StageTimer:
+    """Durations of the wrapped app functions, grouped by stage"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def install(self, app_module):
+        for stage, names in STAGES.items():
+            for name in names:
+                fn = getattr(app_module, name, None)
+                if fn is not None:
+                    setattr(app_module, name, self._wrap(stage, fn))
+
+    def _wrap(self, stage, fn):
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.samples[stage].append(elapsed)
+        return timed
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {stage: list(values) for stage, values in self.samples.items()}
+
+
+def summarize(seconds):
+    values = np.asarray(seconds) * 1000
+    return {
+        "count": int(len(values)),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "total_ms": round(float(values.sum()), 3),
+    }
+
+
+def build_flows(n, seed=0):
+    """Assessment payloads built from rows of the training data"""
+    rows = pd.read_csv("synthetic_robo_advisor_data.csv").sample(n, replace=n > 1000, random_state=seed)
+    rng = random.Random(seed)
+    flows = []
+    for row in rows.itertuples():
+        # Questionnaire total T maps to tolerance round(T / 5 + 1), so score each answer tolerance - 1
+        score = min(4, max(1, int(row.risk_tolerance) - 1))
+        flows.append({
+            "demographics": {
+                "age": int(row.age), "income": int(row.income),
+                "employment_status": rng.choice(["employed", "self_employed", "retired"]),
+                "location": rng.choice(["NY", "SF", "TX", "London"]),
+                "dependents": rng.randint(0, 4),
+                "marital_status": rng.choice(["single", "married", "divorced"]),
+            },
+            "financial_goals": {
+                "primary_goal": rng.choice(PRIMARY_GOALS),
+                "target_amount": rng.randrange(50000, 2000000, 1000),
+                "time_horizon": int(row.investment_horizon),
+                "current_savings": rng.randrange(0, 500000, 500),
+                "monthly_expenses": rng.randrange(1500, 12000, 100),
+                "existing_debt": rng.randrange(0, 100000, 500),
+                "emergency_fund_months": rng.randint(0, 12),
+            },
+            "answer_score": score,
+        })
+    return flows
+
+
+def risk_answers(questions, score):
+    answers = []
+    for question in questions:
+        option = min(question["options"], key=lambda o: abs(o["score"] - score))
+        answers.append({"question_id": question["id"], "selected_option": option["value"], "score": option["score"]})
+    return answers
+
+
+class LoadRunner:
+    """Runs flows against a client and records latency per endpoint"""
+
+    def __init__(self, client, scenario):
+        self.client = client
+        self.scenario = scenario
+        self.latency = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.questions = None
+
+    async def call(self, name, method, url, **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latency[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            raise RuntimeError(f"{name} returned {response.status_code}: {response.text[:200]}")
+        return response
+
+    async def steps_flow(self, flow):
+        session_id = (await self.call("POST /start-assessment", "POST", "/start-assessment")).json()["session_id"]
+        params = {"session_id": session_id}
+        await self.call("POST /submit-demographics", "POST", "/submit-demographics",
+                        params=params, json=flow["demographics"])
+        await self.call("POST /submit-financial-goals", "POST", "/submit-financial-goals",
+                        params=params, json=flow["financial_goals"])
+        questions = (await self.call("GET /get-risk-questions", "GET", "/get-risk-questions")).json()["questions"]
+        await self.call("POST /submit-risk-assessment", "POST", "/submit-risk-assessment",
+                        params=params, json=risk_answers(questions, flow["answer_score"]))
+        await self.call("POST /generate-recommendation", "POST", "/generate-recommendation", params=params)
+
+    async def assess_flow(self, flow):
+        if self.questions is None:
+            self.questions = (await self.client.get("/get-risk-questions")).json()["questions"]
+        await self.call("POST /assess", "POST", "/assess", json={
+            "demographics": flow["demographics"],
+            "financial_goals": flow["financial_goals"],
+            "risk_responses": risk_answers(self.questions, flow["answer_score"]),
+        })
+
+    async def run_flow(self, index, flow):
+        use_assess = self.scenario == "assess" or (self.scenario == "mixed" and index % 2)
+        await (self.assess_flow(flow) if use_assess else self.steps_flow(flow))
+
+    async def run(self, flows, concurrency):
+        """Run all flows with at most `concurrency` in flight; returns (wall seconds, failed flows)"""
+        queue = asyncio.Queue()
+        for item in enumerate(flows):
+            queue.put_nowait(item)
+        failed = []
+
+        async def worker():
+            while not queue.empty():
+                index, flow = queue.get_nowait()
+                try:
+                    await self.run_flow(index, flow)
+                except Exception as e:
+                    failed.append(str(e))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started, failed
+
+
+async def drive(client, args, flows, reset_stages, read_stages):
+    """Warm up, reset stage timers, then run the measured flows"""
+    warmup = LoadRunner(client, args.scenario)
+    await warmup.run(flows[:args.warmup], args.concurrency)
+    await reset_stages()
+    runner = LoadRunner(client, args.scenario)
+    wall, failed = await runner.run(flows[args.warmup:], args.concurrency)
+    return runner, wall, failed, await read_stages()
+
+
+async def run_asgi(args, flows):
+    import app as app_module
+    timer = StageTimer()
+    timer.install(app_module)
+
+    async def reset_stages():
+        timer.reset()
+
+    async def read_stages():
+        return timer.snapshot()
+
+    async with app_module.app.router.lifespan_context(app_module.app):
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await drive(client, args, flows, reset_stages, read_stages)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(client, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/readyz")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError("server did not become ready")
+
+
+async def run_uvicorn(args, flows):
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen([sys.executable, "-W", "ignore", os.path.abspath(__file__), "--serve", "--port", str(port)],
+                                  cwd=ROOT, stdout=subprocess.DEVNULL)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+            await wait_ready(client)
+
+            async def reset_stages():
+                await client.post("/__bench/stages/reset")
+
+            async def read_stages():
+                response = await client.get("/__bench/stages")
+                return response.json() if response.status_code == 200 else {}
+
+            return await drive(client, args, flows, reset_stages, read_stages)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def serve(port):
+    """Run the app under uvicorn with stage timers and two benchmark-only routes"""
+    import uvicorn
+    import app as app_module
+    timer = StageTimer()
+    timer.install(app_module)
+
+    @app_module.app.get("/__bench/stages", include_in_schema=False)
+    async def bench_stages():
+        return timer.snapshot()
+
+    @app_module.app.post("/__bench/stages/reset", include_in_schema=False)
+    async def bench_stages_reset():
+        timer.reset()
+        return {"reset": True}
+
+    uvicorn.run(app_module.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(args, runner, wall, failed, stages):
+    n_flows = args.flows - len(failed)
+    n_requests = sum(len(values) for values in runner.latency.values())
+    stage_summary = {stage: summarize(values) for stage, values in stages.items() if values}
+    total_stage_ms = sum(summary["total_ms"] for summary in stage_summary.values()) or 1
+    for summary in stage_summary.values():
+        summary["share"] = round(summary["total_ms"] / total_stage_ms, 4)
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": git_revision(),
+            "mode": args.mode,
+            "scenario": args.scenario,
+            "flows": args.flows,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "env": {name: os.environ[name] for name in CONFIG_ENV if name in os.environ},
+        },
+        "throughput": {
+            "wall_seconds": round(wall, 3),
+            "flows_per_second": round(n_flows / wall, 2),
+            "requests_per_second": round(n_requests / wall, 2),
+            "failed_flows": len(failed),
+        },
+        "endpoints": {
+            name: {**summarize(values), "errors": runner.errors.get(name, 0)}
+            for name, values in sorted(runner.latency.items())
+        },
+        "stages": stage_summary,
+    }
+
+
+def print_report(report):
+    t = report["throughput"]
+    print(f"{report['meta']['mode']} / {report['meta']['scenario']}: {report['meta']['flows']} flows, "
+          f"concurrency {report['meta']['concurrency']}")
+    print(f"{t['flows_per_second']:.1f} flows/s, {t['requests_per_second']:.1f} requests/s, "
+          f"{t['failed_flows']} failed flows")
+    print(f"{'endpoint':<32}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for name, s in report["endpoints"].items():
+        print(f"{name:<32}{s['count']:>7}{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['errors']:>8}")
+    if report["stages"]:
+        print(f"{'stage':<32}{'calls':>7}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}{'share':>8}")
+        for stage in STAGES:
+            s = report["stages"].get(stage)
+            if s:
+                print(f"{stage:<32}{s['count']:>7}{s['p50_ms']:>9.3f}{s['p95_ms']:>9.3f}{s['mean_ms']:>9.3f}"
+                      f"{s['share'] * 100:>7.1f}%")
+
+
+def compare(report, baseline, max_regression=None):
+    """Print changes against a baseline; returns the list of regressions beyond max_regression"""
+    def change(new, old):
+        return (new / old - 1) * 100 if old else 0.0
+
+    regressions = []
+    base_fps, new_fps = baseline["throughput"]["flows_per_second"], report["throughput"]["flows_per_second"]
+    delta = change(new_fps, base_fps)
+    print(f"baseline {baseline['meta'].get('git_revision')} ({baseline['meta']['timestamp']}): "
+          f"flows/s {base_fps:.1f} -> {new_fps:.1f} ({delta:+.1f}%)")
+    if max_regression is not None and -delta > max_regression:
+        regressions.append(f"throughput {delta:+.1f}%")
+
+    print(f"{'endpoint':<32}{'p50':>18}{'p95':>18}{'p99':>18}")
+    for name, new in report["endpoints"].items():
+        old = baseline["endpoints"].get(name)
+        if old is None:
+            continue
+        cells = [f"{new[key]:.1f} ({change(new[key], old[key]):+.0f}%)" for key in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{name:<32}" + "".join(f"{cell:>18}" for cell in cells))
+        p95_delta = change(new["p95_ms"], old["p95_ms"])
+        if max_regression is not None and p95_delta > max_regression:
+            regressions.append(f"{name} p95 {p95_delta:+.1f}%")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--scenario", choices=["steps", "assess", "mixed"], default="steps")
+    parser.add_argument("--flows", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="uvicorn mode: benchmark an already running server")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="compare with results saved by --output")
+    parser.add_argument("--max-regression", type=float, metavar="PCT",
+                        help="exit 1 if p95 or throughput regressed by more than PCT percent")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=8000, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+    if args.url:
+        args.mode = "uvicorn"
+
+    flows = build_flows(args.flows + args.warmup, seed=args.seed)
+    run = run_asgi if args.mode == "asgi" else run_uvicorn
+    runner, wall, failed, stages = asyncio.run(run(args, flows))
+    report = build_report(args, runner, wall, failed, stages)
+    print_report(report)
+    if failed:
+        print(f"first failure: {failed[0]}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            sys.exit("REGRESSION " + "; ".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
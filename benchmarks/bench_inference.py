@@ -0,0 +1,68 @@
+"""Compare the compiled forest engine with sklearn's predict path.
+
+Times ``predict`` for both engines at several batch sizes, the numbers behind
+app.py's COMPILED_MAX_ROWS cut-over. Parity with ``model.predict`` and
+``model.predict_proba`` is checked by tests/test_forest_engine.py.
+
+Usage: python benchmarks/bench_inference.py [--repeat 200] [--sizes 1,64,256,1000,5000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from forest_engine import CompiledForest  # noqa: E402
+
+FEATURE_NAMES = ["age", "income", "risk_tolerance", "investment_horizon"]
+
+
+def random_profiles(n, seed=0):
+    """Random profiles spanning the ranges accepted by the assessment API"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "age": rng.integers(18, 101, n),
+        "income": rng.integers(20000, 50000001, n),
+        "risk_tolerance": rng.integers(1, 6, n),
+        "investment_horizon": rng.integers(1, 51, n),
+    })
+
+
+def time_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=os.path.join(ROOT, "model.joblib"))
+    parser.add_argument("--data", default=os.path.join(ROOT, "synthetic_robo_advisor_data.csv"))
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--sizes", default="1,64,256,1000,5000")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    start = time.perf_counter()
+    engine = CompiledForest.from_sklearn(model)
+    print(f"compiled {engine.n_trees} trees / {len(engine.feature)} nodes in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    data = pd.read_csv(args.data)[FEATURE_NAMES]
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(f"{'rows':>8}{'sklearn (ms)':>15}{'compiled (ms)':>15}")
+    for size in sizes:
+        rows = data.iloc[:size] if size <= len(data) else random_profiles(size)
+        repeat = max(1, args.repeat // max(1, size // 100))
+        timings = [time_call(lambda: scorer.predict(rows), repeat) * 1000 for scorer in (model, engine)]
+        print(f"{size:>8}{timings[0]:>15.3f}{timings[1]:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
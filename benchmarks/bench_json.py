@@ -0,0 +1,102 @@
+"""Response encoding cost of the recommendation payload.
+
+Builds one /generate-recommendation payload (with its NumPy values, as the
+handler produces it) and times turning it into response bytes:
+
+* ``fastapi``: the generic path, i.e. converting NumPy values by hand,
+  re-validating against the response model, ``jsonable_encoder`` and
+  Starlette's JSONResponse
+* ``stdlib`` / ``orjson``: FastJSONResponse with each available encoder
+
+It checks that every encoder produces the same document before timing.
+
+Usage: python benchmarks/bench_json.py [--repeat 2000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("PROJECTION_SEED", "0")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import app  # noqa: E402
+import json_response  # noqa: E402
+from session_store import AssessmentSession  # noqa: E402
+
+
+def build_payload():
+    session = AssessmentSession(session_id="benchmark", created_at="")
+    session.set_demographics({
+        "age": 32, "income": 85000, "employment_status": "employed",
+        "location": "SF", "dependents": 1, "marital_status": "married",
+    })
+    session.set_financial_goals({
+        "primary_goal": "retirement", "target_amount": 1000000, "time_horizon": 50,
+        "current_savings": 50000, "monthly_expenses": 4500, "existing_debt": 15000, "emergency_fund_months": 6,
+    })
+    session.set_risk_responses([
+        {"question_id": q["id"], "selected_option": q["options"][2]["value"], "score": q["options"][2]["score"]}
+        for q in app.RISK_QUESTIONS
+    ])
+    return asyncio.run(app.build_recommendation(session))
+
+
+def to_builtin(value):
+    """The float()/.tolist() conversions handlers needed before the fast path"""
+    if isinstance(value, dict):
+        return {key: to_builtin(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_builtin(item) for item in value]
+    return json_response.numpy_default(value) if isinstance(value, (np.generic, np.ndarray)) else value
+
+
+def generic_render(payload):
+    plain = to_builtin(payload)
+    validated = app.RecommendationResponse.model_validate(plain).model_dump(mode="json")
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def time_call(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    payload = build_payload()
+    renderers = {"fastapi": generic_render}
+    for name, dumps in json_response.ENCODERS.items():
+        renderers[name] = dumps
+    if "orjson" not in renderers:
+        print("orjson not installed; timing stdlib only")
+
+    reference = json.loads(renderers["fastapi"](payload))
+    for name, render in renderers.items():
+        if json.loads(render(payload)) != reference:
+            sys.exit(f"FAIL {name} output differs from the generic path")
+    print(f"OK   {len(renderers)} encoders produce the same document")
+
+    print(f"{'encoder':<10}{'us/response':>14}{'bytes':>10}")
+    for name, render in renderers.items():
+        seconds = time_call(lambda: render(payload), args.repeat)
+        print(f"{name:<10}{seconds * 1e6:>14.1f}{len(render(payload)):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Throughput of the Monte Carlo projection engine versus horizon length.
+
+For each horizon up to the 50-year maximum accepted by /submit-financial-goals
+the script times a full (uncapped, unbudgeted) simulation and reports paths
+per second, then times the default seeded projection, whose path count is
+capped by --max-path-years, and shows how many unseeded paths fit in the
+configured latency budget. It also checks that seeded runs are reproducible and that the
+simulated mean matches the closed-form future value.
+
+Usage: python benchmarks/bench_projections.py [--paths 5000] [--budget-ms 50] [--max-path-years 125000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from json_response import dumps_stdlib  # noqa: E402
+from projection_engine import MAX_PATH_YEARS, MonteCarloProjector, portfolio_parameters  # noqa: E402
+
+ALLOCATION = {"stocks": 60, "bonds": 35, "cash": 5}
+CURRENT_VALUE = 50000
+MONTHLY_CONTRIBUTION = 1000
+TARGET = 1000000
+
+
+def closed_form_mean(annual_return, years):
+    """Expected terminal value with end-of-month contributions"""
+    monthly_growth = (1 + annual_return) ** (1 / 12)
+    months = years * 12
+    return CURRENT_VALUE * (1 + annual_return) ** years + \
+        MONTHLY_CONTRIBUTION * (monthly_growth ** months - 1) / (monthly_growth - 1)
+
+
+def check_simulation(years=30, n_paths=200000):
+    annual_return, volatility = portfolio_parameters(ALLOCATION)
+    projector = MonteCarloProjector(n_paths=n_paths, budget_ms=0, max_path_years=0)
+    values = projector.simulate_paths(CURRENT_VALUE, MONTHLY_CONTRIBUTION, annual_return, volatility,
+                                      years, n_paths, np.random.default_rng(0))
+    simulated, expected = values[:, -1].mean(), closed_form_mean(annual_return, years)
+    print(f"mean after {years}y: simulated {simulated:,.0f} vs closed form {expected:,.0f} "
+          f"({(simulated / expected - 1) * 100:+.2f}%)")
+
+    first = projector.project(CURRENT_VALUE, MONTHLY_CONTRIBUTION, ALLOCATION, years, TARGET, seed=42)
+    second = projector.project(CURRENT_VALUE, MONTHLY_CONTRIBUTION, ALLOCATION, years, TARGET, seed=42)
+    if dumps_stdlib(first) != dumps_stdlib(second):
+        sys.exit("FAIL seeded projections differ between runs")
+    print("OK   seeded projections are reproducible")
+
+
+def time_call(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=5000)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--max-path-years", type=int, default=MAX_PATH_YEARS)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[1, 5, 10, 20, 30, 40, 50])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    check_simulation()
+
+    full = MonteCarloProjector(n_paths=args.paths, budget_ms=0, max_path_years=0)
+    seeded = MonteCarloProjector(n_paths=args.paths, budget_ms=args.budget_ms, max_path_years=args.max_path_years)
+    print(f"{'years':>6}{'full (ms)':>11}{'paths/s':>12}{'seeded (ms)':>13}{'seeded paths':>14}"
+          f"{'paths in ' + str(args.budget_ms) + ' ms':>18}")
+    for years in args.horizons:
+        seconds = time_call(
+            lambda: full.project(CURRENT_VALUE, MONTHLY_CONTRIBUTION, ALLOCATION, years, TARGET, seed=0),
+            args.repeat
+        )
+        seeded_seconds = time_call(
+            lambda: seeded.project(CURRENT_VALUE, MONTHLY_CONTRIBUTION, ALLOCATION, years, TARGET), args.repeat
+        )
+        fitted = seeded.project(CURRENT_VALUE, MONTHLY_CONTRIBUTION, ALLOCATION, years, TARGET, fresh=True)["paths"]
+        print(f"{years:>6}{seconds * 1000:>11.1f}{args.paths / seconds:>12,.0f}{seeded_seconds * 1000:>13.1f}"
+              f"{seeded.paths_for(years):>14}{fitted:>18}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Cost of the post-model part of /generate-recommendation, before and after the lookup tables.
+
+"Before" is the original per-request implementation of generate_portfolio_allocation
+and the closed-form projection (rebuilding the allocation dicts and recomputing
+returns and compound factors every call). "After" is the table-driven code in
+app.py. The script first checks that both produce identical allocations and
+future values for every (risk level, age > 60, emergency fund < 3) combination
+and horizon, then times them, and finally times the whole post-model path
+(allocation, projections including the Monte Carlo simulation, explanation and
+next steps) to show where the remaining time goes.
+
+The last part compares the per-session functions with the columnar
+``recommender`` (recommendation_engine.py) behind /recommendations/recompute.
+It checks that allocations, contributions, future values (bit for bit),
+explanation texts, next steps and questionnaire scores agree on --sessions
+random sessions spanning the API's input ranges. Then it times both for the
+whole set.
+
+Usage: python benchmarks/bench_recommendation.py [--repeat 20000] [--sessions 100000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import app  # noqa: E402
+from recommendation_engine import questionnaire_risk_tolerance  # noqa: E402
+from session_store import AssessmentSession  # noqa: E402
+
+
+def allocation_before(risk_level, session):
+    base_allocations = {
+        1: {"stocks": 20, "bonds": 70, "cash": 10},
+        2: {"stocks": 40, "bonds": 50, "cash": 10},
+        3: {"stocks": 60, "bonds": 35, "cash": 5},
+        4: {"stocks": 80, "bonds": 20, "cash": 0},
+        5: {"stocks": 90, "bonds": 10, "cash": 0}
+    }
+    allocation = base_allocations[risk_level].copy()
+    if session["demographics"]["age"] > 60:
+        allocation["bonds"] += 10
+        allocation["stocks"] -= 10
+    if session["financial_goals"]["emergency_fund_months"] < 3:
+        allocation["cash"] += 10
+        allocation["stocks"] -= 10
+    total = sum(allocation.values())
+    if total != 100:
+        allocation["stocks"] += 100 - total
+    return {
+        "allocation": allocation,
+        "recommended_monthly_investment": app.calculate_recommended_investment(session),
+        "rebalancing_frequency": "quarterly"
+    }
+
+
+def future_value_before(session, portfolio_allocation):
+    expected_returns = {"stocks": 0.08, "bonds": 0.04, "cash": 0.02}
+    allocation = portfolio_allocation["allocation"]
+    annual_rate = sum([allocation[asset] / 100 * expected_returns[asset] for asset in allocation])
+    present_value = session["financial_goals"]["current_savings"]
+    monthly_payment = portfolio_allocation["recommended_monthly_investment"]
+    years = session["financial_goals"]["time_horizon"]
+    monthly_rate = annual_rate / 12
+    months = years * 12
+    fv_present = present_value * (1 + annual_rate) ** years
+    if monthly_rate > 0:
+        fv_payments = monthly_payment * (((1 + monthly_rate) ** months - 1) / monthly_rate)
+    else:
+        fv_payments = monthly_payment * months
+    return annual_rate, fv_present + fv_payments
+
+
+def future_value_after(session, portfolio_allocation):
+    allocation = portfolio_allocation["allocation"]
+    annual_rate = app.PORTFOLIO_RETURNS[tuple(allocation.values())]
+    financial_goals = session["financial_goals"]
+    future_value = app.calculate_future_value(
+        financial_goals["current_savings"], portfolio_allocation["recommended_monthly_investment"],
+        annual_rate, financial_goals["time_horizon"]
+    )
+    return annual_rate, future_value
+
+
+def make_session(age, emergency_fund_months, time_horizon):
+    return {
+        "demographics": {"age": age, "income": 85000},
+        "financial_goals": {
+            "current_savings": 50000, "monthly_expenses": 4500, "existing_debt": 15000,
+            "emergency_fund_months": emergency_fund_months, "time_horizon": time_horizon,
+            "target_amount": 1000000,
+        },
+    }
+
+
+def check_parity():
+    cases = 0
+    for risk_level in app.BASE_ALLOCATIONS:
+        for age in (35, 65):
+            for emergency in (1, 6):
+                for years in range(1, 51):
+                    session = make_session(age, emergency, years)
+                    before = allocation_before(risk_level, session)
+                    after = app.generate_portfolio_allocation(risk_level, session)
+                    if before != after:
+                        sys.exit(f"FAIL allocation differs for risk {risk_level}, age {age}, emergency {emergency}")
+                    if future_value_before(session, before) != future_value_after(session, after):
+                        sys.exit(f"FAIL future value differs for risk {risk_level}, {years} years")
+                    cases += 1
+    print(f"OK   {cases} allocation/future-value cases identical")
+
+
+def random_sessions(n, seed=0):
+    """(AssessmentSessions with complete assessments, risk levels) spanning the validated input ranges"""
+    rng = np.random.default_rng(seed)
+    incomes = np.where(rng.random(n) < 0.9, rng.integers(20000, 300001, n), rng.integers(20000, 50000001, n))
+    expenses = np.where(rng.random(n) < 0.9, rng.integers(0, 15001, n), rng.integers(0, 1000001, n))
+    sessions = []
+    for i in range(n):
+        session = AssessmentSession(session_id=str(i), created_at="")
+        session.set_demographics({
+            "age": int(rng.integers(18, 101)), "income": int(incomes[i]), "employment_status": "employed",
+            "location": "", "dependents": 0, "marital_status": "single",
+        })
+        savings = int(rng.integers(0, 2000001))
+        session.set_financial_goals({
+            "primary_goal": "retirement",
+            "target_amount": None if rng.random() < 0.2 else int(rng.integers(1000, 5000001)),
+            "time_horizon": int(rng.integers(1, 51)),
+            "current_savings": savings,
+            # Ties with current_savings exercise the strict comparison
+            "existing_debt": savings if rng.random() < 0.05 else int(rng.integers(0, 2000001)),
+            "monthly_expenses": int(expenses[i]),
+            "emergency_fund_months": int(rng.integers(0, 13)),
+        })
+        session.set_risk_responses([
+            {"question_id": q, "selected_option": "", "score": int(rng.integers(1, 5))}
+            for q in range(int(rng.integers(1, 6)))
+        ])
+        sessions.append(session)
+    return sessions, rng.integers(1, 6, n)
+
+
+def questionnaire_before(risk_responses):
+    """build_recommendation's questionnaire score"""
+    total_score = sum([r["score"] for r in risk_responses])
+    max_possible_score = len(risk_responses) * 4
+    normalized_score = (total_score / max_possible_score) * 4 + 1
+    return max(1, min(5, round(normalized_score)))
+
+
+def per_session(sessions, levels):
+    """Recommendation fields for each session through the per-session functions"""
+    rows = []
+    for stored, level in zip(sessions, levels):
+        session = stored.as_dict()
+        portfolio = app.generate_portfolio_allocation(level, session)
+        annual_rate, future_value = future_value_after(session, portfolio)
+        target = session["financial_goals"]["target_amount"]
+        rows.append((
+            tuple(portfolio["allocation"].values()), portfolio["recommended_monthly_investment"], annual_rate,
+            future_value, future_value >= target if target else True,
+            app.generate_explanation(session, {}, level), app.generate_next_steps(session),
+            questionnaire_before(session["risk_responses"]),
+        ))
+    return rows
+
+
+def columnar(sessions, levels):
+    """The same fields through session_columns and the columnar recommender"""
+    columns = app.session_columns(sessions)
+    result = app.recommender.recommend(
+        age=columns["age"], income=columns["income"], risk_level=levels,
+        time_horizon=columns["time_horizon"], current_savings=columns["current_savings"],
+        monthly_expenses=columns["monthly_expenses"], emergency_fund_months=columns["emergency_fund_months"],
+        existing_debt=columns["existing_debt"], target_amount=columns["target_amount"],
+    )
+    return columns, result
+
+
+def check_columnar_parity(sessions, levels):
+    expected = per_session(sessions, levels.tolist())
+    columns, result = columnar(sessions, levels)
+    values = {name: column.tolist() for name, column in result.items()}
+    for i, (allocation, monthly, rate, future_value, reached, explanation, steps, questionnaire) in enumerate(expected):
+        level = int(levels[i])
+        actual = (
+            (values["stocks"][i], values["bonds"][i], values["cash"][i]), values["recommended_monthly_investment"][i],
+            values["expected_annual_return"][i], values["projected_value"][i], values["projected_to_reach_target"][i],
+            app.explanation_variant(level, values["age_band"][i]),
+            list(app.next_steps_variant(values["needs_emergency_fund"][i], values["debt_exceeds_savings"][i])),
+            int(columns["questionnaire_risk_tolerance"][i]),
+        )
+        expected_row = (allocation, monthly, rate, future_value, reached, explanation, steps, questionnaire)
+        if actual != expected_row:
+            sys.exit(f"FAIL columnar recommendation differs for session {i}:\n  {expected_row}\n  {actual}")
+    print(f"OK   {len(sessions):,} sessions identical between per-session and columnar recommendations")
+
+
+def measure(fn, repeat):
+    """(microseconds per call, peak bytes allocated during one call)"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    fn()
+    allocated = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return elapsed * 1e6, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--sessions", type=int, default=100000)
+    args = parser.parse_args()
+
+    check_parity()
+    session = make_session(65, 1, 25)
+
+    def before():
+        future_value_before(session, allocation_before(3, session))
+
+    def after():
+        future_value_after(session, app.generate_portfolio_allocation(3, session))
+
+    print(f"{'allocation + future value':<28}{'us/call':>10}{'peak bytes':>12}")
+    for name, fn in (("before", before), ("after", after)):
+        micros, allocated = measure(fn, args.repeat)
+        print(f"{name:<28}{micros:>10.2f}{allocated:>12.0f}")
+
+    feature_importance = dict(zip(app.FEATURE_NAMES, [0.1, -0.05, 0.2, 0.03]))
+    session["risk_responses"] = []
+
+    def post_model():
+        portfolio_allocation = app.generate_portfolio_allocation(3, session)
+        app.calculate_projections(session, portfolio_allocation)
+        app.generate_explanation(session, feature_importance, 3)
+        app.generate_next_steps(session)
+
+    micros, _ = measure(post_model, max(1, args.repeat // 1000))
+    print(f"full post-model path (with {app.projector.n_paths} simulated paths): {micros / 1000:.2f} ms")
+
+    sessions, levels = random_sessions(args.sessions)
+    check_columnar_parity(sessions, levels)
+    started = time.perf_counter()
+    per_session(sessions, levels.tolist())
+    loop = time.perf_counter() - started
+    started = time.perf_counter()
+    app.session_columns(sessions)
+    gathered = time.perf_counter() - started
+    started = time.perf_counter()
+    columnar(sessions, levels)
+    total = time.perf_counter() - started
+    print(f"{len(sessions):,} sessions: per-session {loop:.2f}s, columnar {total:.2f}s "
+          f"({gathered:.2f}s gathering fields, {total - gathered:.2f}s maths), {loop / total:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Cold-start time of the API, broken down by phase.
+
+Every measurement runs in a fresh interpreter so module caches do not carry
+over. The phase breakdown imports the web/data stack, loads model.joblib,
+imports SHAP and builds the TreeExplainer one step at a time. The app-level
+runs compare ``STARTUP_MODE=eager`` (everything at import) with
+``STARTUP_MODE=lazy`` (serve first, load in the background), reporting time
+until the app is importable, until /readyz answers 200 and until the first
+/explain completes.
+
+Usage: python benchmarks/bench_startup.py [--runs 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = """
+import json, time, warnings
+warnings.filterwarnings("ignore")
+timings = {}
+start = time.perf_counter()
+import numpy, pandas, sklearn, fastapi, joblib
+timings["import_stack"] = time.perf_counter() - start
+start = time.perf_counter()
+model = joblib.load("model.joblib")
+timings["model_load"] = time.perf_counter() - start
+start = time.perf_counter()
+import shap
+timings["import_shap"] = time.perf_counter() - start
+start = time.perf_counter()
+shap.TreeExplainer(model)
+timings["explainer_build"] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+APP = """
+import json, time, warnings
+warnings.filterwarnings("ignore")
+timings = {}
+start = time.perf_counter()
+import app
+timings["import_app"] = time.perf_counter() - start
+from fastapi.testclient import TestClient
+with TestClient(app.app) as client:
+    timings["serving"] = time.perf_counter() - start
+    while client.get("/readyz").status_code != 200:
+        time.sleep(0.01)
+    timings["ready"] = time.perf_counter() - start
+    profile = {"age": 35, "income": 85000, "risk_tolerance": 3, "investment_horizon": 15}
+    client.post("/explain", json=profile)
+    timings["first_explain"] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def run_snippet(code, env=None):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=dict(os.environ, **(env or {})),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median_timings(code, runs, env=None):
+    samples = [run_snippet(code, env) for _ in range(runs)]
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print("phase breakdown (median seconds)")
+    for phase, seconds in median_timings(PHASES, args.runs).items():
+        print(f"  {phase:<18}{seconds:>8.2f}")
+
+    print(f"{'mode':<8}{'import app':>12}{'serving':>10}{'ready':>10}{'1st explain':>13}")
+    for mode in ("eager", "lazy"):
+        t = median_timings(APP, args.runs, {"STARTUP_MODE": mode})
+        print(f"{mode:<8}{t['import_app']:>12.2f}{t['serving']:>10.2f}{t['ready']:>10.2f}{t['first_explain']:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
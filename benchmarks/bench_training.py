@@ -0,0 +1,71 @@
+"""Fit time of the training pipeline versus row count and core count.
+
+Generates the synthetic dataset at each size, then times
+``fit_model`` with ``n_jobs`` set to each requested core count and reports
+rows per second and the speedup over one core. It also times adding trees
+with ``--add-trees`` (warm start) against refitting the enlarged forest from
+scratch, and streaming a CSV through ``load_training_data``.
+
+Usage: python benchmarks/bench_training.py [--rows 10000 100000 1000000] [--jobs 1 2 4]
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+spec = importlib.util.spec_from_file_location("train_script", os.path.join(ROOT, "train-script.py"))
+train_script = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(train_script)
+
+
+def time_fit(X, y, **params):
+    started = time.perf_counter()
+    model = train_script.fit_model(X, y, **params)
+    return time.perf_counter() - started, model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 300000])
+    parser.add_argument("--jobs", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--add-trees", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.n_estimators} trees")
+    print(f"{'rows':>10}{'n_jobs':>8}{'fit (s)':>10}{'rows/s':>12}{'speedup':>9}")
+    for rows in args.rows:
+        df = train_script.generate_synthetic(rows)
+        X, y = df[train_script.FEATURE_NAMES], df[train_script.TARGET].to_numpy()
+        single = None
+        for jobs in args.jobs:
+            seconds, _ = time_fit(X, y, n_estimators=args.n_estimators, n_jobs=jobs)
+            single = single or seconds
+            print(f"{rows:>10,}{jobs:>8}{seconds:>10.2f}{rows / seconds:>12,.0f}{single / seconds:>8.2f}x")
+
+    rows = args.rows[-1]
+    df = train_script.generate_synthetic(rows)
+    X, y = df[train_script.FEATURE_NAMES], df[train_script.TARGET].to_numpy()
+    _, base = time_fit(X, y, n_estimators=args.n_estimators)
+    warm, model = time_fit(X, y, n_estimators=args.add_trees, base_model=base)
+    cold, _ = time_fit(X, y, n_estimators=args.n_estimators + args.add_trees)
+    print(f"+{args.add_trees} trees on {rows:,} rows: warm start {warm:.2f}s vs refit {cold:.2f}s "
+          f"({len(model.estimators_)} trees)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.csv")
+        df.to_csv(path, index=False)
+        started = time.perf_counter()
+        X_loaded, _, _ = train_script.load_training_data([path])
+        seconds = time.perf_counter() - started
+        print(f"streamed {len(X_loaded):,} CSV rows in {seconds:.2f}s "
+              f"({X_loaded.memory_usage(index=False).sum() / 2**20:.1f} MB of features)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Cost of request validation, per request and per 10k-row batch.
+
+Per request, "before" is the original path: unconstrained DemographicInfo /
+FinancialGoals models, then the manual range checks that raised 400s, then the
+deprecated ``.dict()``. "After" is the models in app.py, whose bounds are
+declared as ``Field(ge=..., le=...)`` and checked in Pydantic's single
+validation pass, followed by ``.model_dump()``, from a parsed dict and with
+``model_validate_json``.
+
+Per batch, a ``List[ClientData]`` / ``List[DemographicInfo]`` TypeAdapter
+(what FastAPI did for /predict/batch, one model per row) is compared with
+``BulkValidator`` (bulk_validation.py), which checks the rows column by column.
+Before timing, the script checks that the bulk validator accepts and rejects
+exactly the rows, fields and error types Pydantic does on --rows random rows
+mixing valid values, boundaries, out-of-range numbers, numeric strings, floats,
+nulls, wrong types and missing keys.
+
+Usage: python benchmarks/bench_validation.py [--repeat 20000] [--rows 10000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import app  # noqa: E402
+from bulk_validation import BulkValidator  # noqa: E402
+
+
+class DemographicsBefore(BaseModel):
+    age: int
+    income: int
+    employment_status: str
+    location: str
+    dependents: int
+    marital_status: str
+
+
+class FinancialGoalsBefore(BaseModel):
+    primary_goal: str
+    target_amount: Optional[int] = None
+    time_horizon: int
+    current_savings: int
+    monthly_expenses: int
+    existing_debt: int
+    emergency_fund_months: int
+
+
+def validate_before(demographics, financial_goals):
+    """The removed manual range checks"""
+    if not (18 <= demographics.age <= 100):
+        raise HTTPException(status_code=400, detail="Age must be between 18 and 100")
+    if not (20000 <= demographics.income <= 50000000):
+        raise HTTPException(status_code=400, detail="Income must be between $20,000 and $50 million")
+    if not (0 <= demographics.dependents <= 20):
+        raise HTTPException(status_code=400, detail="Number of dependents must be between 0 and 20")
+    if financial_goals.target_amount is not None and not (1000 <= financial_goals.target_amount <= 100000000):
+        raise HTTPException(status_code=400, detail="Target amount must be between $1,000 and $100 million")
+    if not (1 <= financial_goals.time_horizon <= 50):
+        raise HTTPException(status_code=400, detail="Time horizon must be between 1 and 50 years")
+    if not (0 <= financial_goals.current_savings <= 50000000):
+        raise HTTPException(status_code=400, detail="Current savings must be between $0 and $50 million")
+    if not (0 <= financial_goals.monthly_expenses <= 1000000):
+        raise HTTPException(status_code=400, detail="Monthly expenses must be between $0 and $1 million")
+    if not (0 <= financial_goals.existing_debt <= 50000000):
+        raise HTTPException(status_code=400, detail="Existing debt must be between $0 and $50 million")
+    if not (0 <= financial_goals.emergency_fund_months <= 12):
+        raise HTTPException(status_code=400, detail="Emergency fund must be between 0 and 12 months")
+
+
+DEMOGRAPHICS = {"age": 32, "income": 85000, "employment_status": "employed", "location": "SF",
+                "dependents": 1, "marital_status": "married"}
+FINANCIAL_GOALS = {"primary_goal": "retirement", "target_amount": 1000000, "time_horizon": 25,
+                   "current_savings": 50000, "monthly_expenses": 4500, "existing_debt": 15000,
+                   "emergency_fund_months": 6}
+# Marks a key left out of a random row
+MISSING = object()
+
+
+def random_value(rng, rule):
+    """A valid, boundary or invalid value for a field rule, or the MISSING marker"""
+    choice = rng.random()
+    if rule.kind is str:
+        if choice < 0.9:
+            return "value"
+        return [None, 5, b"bytes", ["list"], MISSING][rng.integers(5)]
+    low, high = rule.ge, rule.le
+    if choice < 0.75:
+        return int(rng.integers(low, high + 1))
+    return [
+        low, high, low - 1, high + 1, -10 ** 30, str(low + 1), f" {high} ", f"{low}.0", float(high),
+        low + 0.5, "abc", "1e3", None, True, [low], MISSING,
+    ][rng.integers(16)]
+
+
+def random_rows(model, n, seed=0):
+    rng = np.random.default_rng(seed)
+    rules = BulkValidator(model).rules
+    rows = []
+    for _ in range(n):
+        row = {}
+        for rule in rules:
+            value = random_value(rng, rule)
+            if value is not MISSING:
+                row[rule.name] = value
+        rows.append(row)
+    return rows
+
+
+def pydantic_errors(model, rows):
+    try:
+        TypeAdapter(List[model]).validate_python(rows, from_attributes=True)
+    except ValidationError as e:
+        return {(tuple(error["loc"]), error["type"]) for error in e.errors()}
+    return set()
+
+
+def check_parity(rows):
+    for model in (app.ClientData, app.DemographicInfo, app.FinancialGoals):
+        sample = random_rows(model, rows)
+        sample[:3] = [5, "row", None]
+        expected = pydantic_errors(model, sample)
+        checked = BulkValidator(model).validate_rows(sample, loc=())
+        actual = {(tuple(error["loc"]), error["type"]) for error in checked.errors}
+        if actual != expected:
+            sys.exit(f"FAIL {model.__name__}: only pydantic {sorted(expected - actual)[:5]}, "
+                     f"only bulk {sorted(actual - expected)[:5]}")
+        # Valid rows come back with Pydantic's values
+        valid = [row for row, ok in zip(sample, checked.valid) if ok]
+        dumped = [profile.model_dump() for profile in TypeAdapter(List[model]).validate_python(valid)]
+        columns = {name: values[checked.valid].tolist() for name, values in checked.columns.items()}
+        if columns != {name: [row[name] for row in dumped] for name in columns}:
+            sys.exit(f"FAIL {model.__name__}: valid row values differ")
+        print(f"OK   {model.__name__}: {len(sample) - int(checked.valid.sum())} of {len(sample)} rows rejected, "
+              f"{len(actual)} errors identical")
+
+
+def measure(fn, repeat):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    check_parity(args.rows)
+
+    demographics_json, goals_json = json.dumps(DEMOGRAPHICS), json.dumps(FINANCIAL_GOALS)
+
+    def before():
+        demographics = DemographicsBefore(**DEMOGRAPHICS)
+        financial_goals = FinancialGoalsBefore(**FINANCIAL_GOALS)
+        validate_before(demographics, financial_goals)
+        demographics.dict(), financial_goals.dict()
+
+    def after():
+        app.DemographicInfo.model_validate(DEMOGRAPHICS).model_dump()
+        app.FinancialGoals.model_validate(FINANCIAL_GOALS).model_dump()
+
+    def after_json():
+        app.DemographicInfo.model_validate_json(demographics_json).model_dump()
+        app.FinancialGoals.model_validate_json(goals_json).model_dump()
+
+    print(f"{'per request (demographics + goals)':<40}{'us':>8}")
+    for name, fn in (("before: model + manual checks + .dict()", before),
+                     ("after: constrained model + model_dump()", after),
+                     ("after, model_validate_json", after_json)):
+        print(f"{name:<40}{measure(fn, args.repeat):>8.2f}")
+
+    repeat = max(1, args.repeat // 1000)
+    print(f"\n{'per ' + format(args.rows, ',') + ' rows':<40}{'ms':>8}")
+    for model in (app.ClientData, app.DemographicInfo):
+        rng = np.random.default_rng(1)
+        rules = BulkValidator(model).rules
+        rows = [{rule.name: int(rng.integers(rule.ge, rule.le + 1)) if rule.kind is int else "value" for rule in rules}
+                for _ in range(args.rows)]
+        adapter = TypeAdapter(List[model])
+        validator = BulkValidator(model)
+        names = [rule.name for rule in rules]
+
+        def per_row():
+            profiles = adapter.validate_python(rows)
+            return pd.DataFrame([profile.model_dump() for profile in profiles], columns=names)
+
+        def bulk():
+            checked = validator.validate_rows(rows)
+            return pd.DataFrame(checked.columns, columns=names)
+
+        if not per_row().equals(bulk()):
+            sys.exit(f"FAIL {model.__name__}: frames differ")
+        per_row_ms, bulk_ms = measure(per_row, repeat) / 1000, measure(bulk, repeat) / 1000
+        print(f"{model.__name__ + ': model per row':<40}{per_row_ms:>8.2f}")
+        print(f"{model.__name__ + ': BulkValidator':<40}{bulk_ms:>8.2f}   {per_row_ms / bulk_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
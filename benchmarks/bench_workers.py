@@ -0,0 +1,154 @@
+"""Per-worker memory and throughput of the gunicorn deployment at several worker counts.
+
+For each worker count the script starts ``gunicorn app:app -c gunicorn.conf.py``,
+waits for every worker to accept traffic, records each worker's RSS and PSS
+(proportional set size, which splits shared pages between the processes that
+map them), then drives ``/predict`` from a pool of keep-alive clients.
+
+Linux only (reads /proc). Usage:
+    python benchmarks/bench_workers.py --workers 1 2 4 8 --duration 10
+    python benchmarks/bench_workers.py --no-preload        # compare without pre-fork loading
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILE = json.dumps({"age": 35, "income": 85000, "risk_tolerance": 3, "investment_horizon": 15})
+
+
+def child_pids(pid):
+    """Direct children of a process"""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def memory_kb(pid):
+    """(RSS, PSS) of a process in kB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0]] = int(parts[1])
+    return values.get("Rss:", 0), values.get("Pss:", 0)
+
+
+def wait_ready(port, master, n_workers, timeout):
+    """Block until all workers are forked and the app answers"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if master.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        if len(child_pids(master.pid)) >= n_workers:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+                conn.request("GET", "/")
+                if conn.getresponse().status == 200:
+                    return
+            except OSError:
+                pass
+        time.sleep(0.2)
+    raise RuntimeError("gunicorn did not become ready in time")
+
+
+def drive_load(port, concurrency, duration):
+    """Requests per second sustained by ``concurrency`` keep-alive clients"""
+    counts = [0] * concurrency
+    errors = [0] * concurrency
+    stop_at = time.time() + duration
+
+    def client(slot):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        headers = {"Content-Type": "application/json"}
+        while time.time() < stop_at:
+            try:
+                conn.request("POST", "/predict", body=PROFILE, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    counts[slot] += 1
+                else:
+                    errors[slot] += 1
+            except OSError:
+                errors[slot] += 1
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / duration, sum(errors)
+
+
+def run(n_workers, args):
+    env = dict(os.environ, WEB_CONCURRENCY=str(n_workers), PORT=str(args.port),
+               PRELOAD_APP="0" if args.no_preload else "1")
+    start = time.time()
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(args.port, master, n_workers, args.startup_timeout)
+        startup = time.time() - start
+        workers = child_pids(master.pid)
+        usage = [memory_kb(pid) for pid in workers]
+        rps, errors = drive_load(args.port, args.concurrency, args.duration)
+        return {
+            "workers": n_workers,
+            "startup_s": round(startup, 2),
+            "worker_rss_mb": round(sum(r for r, _ in usage) / len(usage) / 1024, 1),
+            "worker_pss_mb": round(sum(p for _, p in usage) / len(usage) / 1024, 1),
+            "total_pss_mb": round((sum(p for _, p in usage) + memory_kb(master.pid)[1]) / 1024, 1),
+            "requests_per_s": round(rps, 1),
+            "errors": errors,
+        }
+    finally:
+        master.terminate()
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--startup-timeout", type=float, default=180.0)
+    parser.add_argument("--no-preload", action="store_true", help="load the model in every worker")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    columns = ["workers", "startup_s", "worker_rss_mb", "worker_pss_mb", "total_pss_mb", "requests_per_s", "errors"]
+    print("".join(f"{c:>16}" for c in columns))
+    for n_workers in args.workers:
+        result = run(n_workers, args)
+        results.append(result)
+        print("".join(f"{result[c]:>16}" for c in columns))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"preload": not args.no_preload, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,9 +10,10 @@ pip install -r requirements-deploy.txt
 # Install dependencies
 pip install -r requirements-deploy.txt
 
-# Always retrain model to ensure compatibility
+# Train with the pinned scikit-learn. model.joblib.train.json is not committed, so a fresh
+# checkout always trains; reruns in the same tree skip when nothing changed
 echo "🔄 Training model with current environment..."
-python train-script.py
+python train-script.py --n-jobs -1
 
 echo "✅ Build completed successfully"
 
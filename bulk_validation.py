@@ -0,0 +1,251 @@
+"""Validate many request rows against a Pydantic model's constraints, one column at a time.
+
+FastAPI validates a ``List[Model]`` body by building one model instance per
+row. ``BulkValidator`` reads the model's declared fields once: int, optional
+int or str types, required or defaulted, and ``Field(ge=..., le=...)``
+bounds. It then checks a whole batch field by field with NumPy and returns
+the values as typed columns. Per-row errors come back in FastAPI's 422
+format, and no per-row object is created.
+
+Ints follow Pydantic's lax rules: bools, whole-number floats and integer
+strings are accepted. A column holding only ints, the usual case for JSON
+bodies, is checked without a per-value Python loop. Extra keys are ignored,
+as Pydantic does by default. benchmarks/bench_validation.py checks that the
+same rows and fields are rejected as by Pydantic.
+"""
+import re
+import types
+import typing
+from dataclasses import dataclass, field
+
+import annotated_types
+import numpy as np
+import pandas as pd
+
+# Marks a key absent from a row
+MISSING = object()
+
+OK, MISSING_CODE, INT_TYPE, INT_PARSING, INT_FROM_FLOAT, FINITE_NUMBER, STRING_TYPE, BELOW, ABOVE = range(9)
+ERRORS = {
+    MISSING_CODE: ("missing", "Field required"),
+    INT_TYPE: ("int_type", "Input should be a valid integer"),
+    INT_PARSING: ("int_parsing", "Input should be a valid integer, unable to parse string as an integer"),
+    INT_FROM_FLOAT: ("int_from_float", "Input should be a valid integer, got a number with a fractional part"),
+    FINITE_NUMBER: ("finite_number", "Input should be a finite number"),
+    STRING_TYPE: ("string_type", "Input should be a valid string"),
+    BELOW: ("greater_than_equal", "Input should be greater than or equal to {ge}"),
+    ABOVE: ("less_than_equal", "Input should be less than or equal to {le}"),
+}
+# Whole-number strings Pydantic accepts that int() does not, such as "5.0"
+WHOLE_DECIMAL = re.compile(r"\s*([+-]?\d+)\.0*\s*")
+
+
+@dataclass
+class FieldRule:
+    name: str
+    kind: type  # int or str
+    required: bool
+    default: object = None
+    nullable: bool = False
+    ge: object = None
+    le: object = None
+
+
+def compile_rules(model):
+    """FieldRules for a Pydantic model, or TypeError for a field this module cannot check"""
+    rules = []
+    for name, info in model.model_fields.items():
+        annotation = info.annotation
+        nullable = False
+        if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+            args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+            nullable = len(args) < len(typing.get_args(annotation))
+            annotation = args[0] if len(args) == 1 else annotation
+        if annotation not in (int, str):
+            raise TypeError(f"{model.__name__}.{name}: unsupported type {info.annotation!r}")
+        rule = FieldRule(name, annotation, info.is_required(), None if info.is_required() else info.default, nullable)
+        for constraint in info.metadata:
+            if isinstance(constraint, annotated_types.Ge):
+                rule.ge = constraint.ge
+            elif isinstance(constraint, annotated_types.Le):
+                rule.le = constraint.le
+            else:
+                raise TypeError(f"{model.__name__}.{name}: unsupported constraint {constraint!r}")
+        rules.append(rule)
+    return rules
+
+
+def coerce_int(value):
+    """(number, error code) for one value, following Pydantic's lax int rules"""
+    kind = type(value)
+    if kind is int or kind is bool:
+        return float(value), OK
+    if kind is float:
+        if not np.isfinite(value):
+            return 0.0, FINITE_NUMBER
+        return (value, OK) if value.is_integer() else (0.0, INT_FROM_FLOAT)
+    if kind is str or kind is bytes:
+        text = value.decode() if kind is bytes else value
+        try:
+            return float(int(text)), OK
+        except ValueError:
+            match = WHOLE_DECIMAL.fullmatch(text)
+            return (float(int(match.group(1))), OK) if match else (0.0, INT_PARSING)
+    return 0.0, INT_TYPE
+
+
+@dataclass
+class BulkValidationResult:
+    """Typed columns (zero / None in invalid rows), a per-row valid mask and FastAPI-style errors"""
+    columns: dict
+    valid: np.ndarray
+    errors: list = field(default_factory=list)
+
+
+class BulkValidator:
+    """Checks batches of rows against a model's field types and bounds without building models"""
+
+    def __init__(self, model):
+        self.model = model
+        self.rules = compile_rules(model)
+
+    def validate_rows(self, rows, loc=("body",)):
+        """Validate a parsed JSON list of objects; error locations are loc + (row, field)"""
+        loc = list(loc)
+        if not isinstance(rows, list):
+            return BulkValidationResult({}, np.zeros(0, dtype=bool), [
+                {"type": "list_type", "loc": loc, "msg": "Input should be a valid list", "input": rows}
+            ])
+        not_objects = [i for i, row in enumerate(rows) if type(row) is not dict]
+        if not_objects:
+            rows = [row if type(row) is dict else {} for row in rows]
+        n = len(rows)
+        columns, codes = {}, {}
+        for rule in self.rules:
+            raw = [row.get(rule.name, MISSING) for row in rows]
+            if rule.kind is int:
+                columns[rule.name], codes[rule.name] = self.int_column(rule, raw)
+            else:
+                columns[rule.name], codes[rule.name] = self.str_column(rule, raw)
+
+        errors, valid = self.collect_errors(codes, n, loc, lambda i, name: rows[i].get(name, MISSING))
+        if not_objects:
+            skipped = set(not_objects)
+            errors = [error for error in errors if error["loc"][len(loc)] not in skipped]
+        for i in not_objects:
+            valid[i] = False
+            errors.append({
+                "type": "model_attributes_type", "loc": loc + [i],
+                "msg": "Input should be a valid dictionary or object to extract fields from",
+            })
+        if not_objects:
+            errors.sort(key=lambda error: error["loc"][len(loc)])
+        return BulkValidationResult(columns, valid, errors)
+
+    def validate_frame(self, frame, loc=()):
+        """Validate the rows of a DataFrame, such as a CSV chunk; empty cells count as missing"""
+        loc = list(loc)
+        n = len(frame)
+        columns, codes = {}, {}
+        for rule in self.rules:
+            if rule.name not in frame:
+                values = np.full(n, rule.default, dtype=object)
+                code = np.full(n, MISSING_CODE if rule.required else OK, dtype=np.int8)
+            elif rule.kind is int:
+                column = frame[rule.name]
+                absent = column.isna().to_numpy()
+                numbers = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64)
+                code = np.full(n, OK, dtype=np.int8)
+                code[np.isnan(numbers)] = INT_PARSING
+                code[np.isinf(numbers)] = FINITE_NUMBER
+                code[np.isfinite(numbers) & (numbers != np.floor(numbers))] = INT_FROM_FLOAT
+                code[absent] = MISSING_CODE if rule.required else OK
+                values, code = self.check_bounds(rule, numbers, code, absent)
+            else:
+                values = frame[rule.name].to_numpy(dtype=object)
+                code = np.array([OK if type(v) is str else STRING_TYPE for v in values], dtype=np.int8)
+                absent = pd.isna(values) & (code != OK)
+                code[absent] = MISSING_CODE if rule.required else OK
+                values[absent] = rule.default
+            columns[rule.name], codes[rule.name] = values, code
+
+        errors, valid = self.collect_errors(codes, n, loc, lambda i, name: frame[name].iloc[i])
+        return BulkValidationResult(columns, valid, errors)
+
+    def int_column(self, rule, raw):
+        """(int64 values, error codes) for one int field of a list of rows"""
+        if all(type(value) is int for value in raw):
+            try:
+                numbers = np.array(raw, dtype=np.float64)
+            except OverflowError:
+                pass
+            else:
+                return self.check_bounds(rule, numbers, np.zeros(len(raw), dtype=np.int8))
+        numbers = np.zeros(len(raw), dtype=np.float64)
+        code = np.zeros(len(raw), dtype=np.int8)
+        absent = np.zeros(len(raw), dtype=bool)
+        for i, value in enumerate(raw):
+            if value is MISSING:
+                absent[i] = True
+                code[i] = MISSING_CODE if rule.required else OK
+            elif value is None and rule.nullable:
+                absent[i] = True
+            else:
+                numbers[i], code[i] = coerce_int(value)
+        return self.check_bounds(rule, numbers, code, absent)
+
+    def str_column(self, rule, raw):
+        """(object array of strings, error codes) for one str field of a list of rows"""
+        values = np.empty(len(raw), dtype=object)
+        code = np.zeros(len(raw), dtype=np.int8)
+        for i, value in enumerate(raw):
+            if type(value) is str:
+                values[i] = value
+            elif value is MISSING:
+                values[i] = rule.default
+                code[i] = MISSING_CODE if rule.required else OK
+            elif type(value) is bytes:
+                values[i] = value.decode()
+            elif value is None and rule.nullable:
+                values[i] = None
+            else:
+                code[i] = STRING_TYPE
+        return values, code
+
+    @staticmethod
+    def check_bounds(rule, numbers, code, absent=None):
+        """Flag out-of-range numbers and convert the column to int64 (object with None when nullable)"""
+        checked = code == OK if absent is None else (code == OK) & ~absent
+        if rule.ge is not None:
+            code[checked & (numbers < rule.ge)] = BELOW
+        if rule.le is not None:
+            code[checked & (numbers > rule.le)] = ABOVE
+        values = np.where(code == OK, numbers, 0).astype(np.int64)
+        # Only accepted absences (optional fields) take the default; missing required values are errors
+        defaulted = None if absent is None else absent & (code == OK)
+        if defaulted is not None and defaulted.any():
+            values = values.astype(object)
+            values[defaulted] = rule.default
+        return values, code
+
+    def collect_errors(self, codes, n, loc, value_at):
+        """(errors in row order, valid mask) from per-field error code arrays"""
+        invalid = np.zeros(n, dtype=bool)
+        for code in codes.values():
+            invalid |= code != OK
+        errors = []
+        rules = {rule.name: rule for rule in self.rules}
+        for i in np.flatnonzero(invalid).tolist():
+            for name, code in codes.items():
+                if code[i] == OK:
+                    continue
+                kind, msg = ERRORS[int(code[i])]
+                error = {"type": kind, "loc": loc + [i, name], "msg": msg}
+                if code[i] in (BELOW, ABOVE):
+                    bound = {"ge": rules[name].ge} if code[i] == BELOW else {"le": rules[name].le}
+                    error["msg"] = msg.format(**bound)
+                    error["ctx"] = bound
+                if code[i] != MISSING_CODE:
+                    error["input"] = value_at(i, name)
+                errors.append(error)
+        return errors, ~invalid
@@ -0,0 +1,94 @@
+"""LRU cache of SHAP explanations keyed on the model's decision region.
+
+TreeExplainer's path-dependent SHAP values depend on an input only through
+which side of every split threshold each feature falls on (including splits
+off the input's own leaf path), so the cache key is the tuple of per-feature
+threshold buckets. Every input in the same region shares the same prediction
+and the same SHAP vector, which makes the key both exact and much coarser than
+the raw feature values.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from forest_engine import compile_forest, floor_float32
+
+
+class ExplanationCache:
+    """Thread-safe LRU cache of predicted-class SHAP vectors"""
+
+    def __init__(self, model, max_size=4096):
+        """Region keys come from model's split thresholds; each loaded model gets its own cache"""
+        self.max_size = max(0, int(max_size))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        forest = compile_forest(model)
+        trees = forest.trees()
+        self.feature_names = list(forest.feature_names)
+        self._edges = [
+            np.unique(floor_float32(np.concatenate([t.threshold[t.feature == i] for t in trees])))
+            for i in range(len(self.feature_names))
+        ]
+
+    def keys(self, X):
+        """Decision-region key for each input row"""
+        if hasattr(X, "columns"):
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32).reshape(-1, len(self._edges))
+        regions = np.column_stack([
+            np.searchsorted(edges, X[:, i], side="left") for i, edges in enumerate(self._edges)
+        ]).astype(np.int32)
+        return [row.tobytes() for row in regions]
+
+    def lookup(self, X, predictions, compute):
+        """SHAP rows for ``X``, calling ``compute(rows, predictions)`` once for all cache misses"""
+        keys = self.keys(X)
+        result = [None] * len(keys)
+        missing = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    result[i] = cached
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+                    self.misses += 1
+
+        if missing:
+            # One explainer call for the first row of each distinct missing region
+            first_rows = [rows[0] for rows in missing.values()]
+            subset = X.iloc[first_rows] if hasattr(X, "iloc") else np.asarray(X)[first_rows]
+            computed = compute(subset, np.asarray(predictions)[first_rows])
+            with self._lock:
+                for (key, rows), values in zip(missing.items(), computed):
+                    values = np.array(values, copy=True)
+                    values.flags.writeable = False
+                    for i in rows:
+                        result[i] = values
+                    self._entries[key] = values
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return np.stack(result) if result else np.empty((0, len(self._edges)))
+
+    def stats(self):
+        """Hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,293 @@
+"""Array-backed inference engine for the risk-level RandomForest.
+
+All trees of a fitted ``RandomForestClassifier`` are flattened into one set of
+contiguous NumPy node arrays so that single rows and batches can be scored
+without going through sklearn's per-estimator dispatch. The arithmetic mirrors
+sklearn exactly (float32 inputs, per-tree normalised leaf distributions summed
+in estimator order), so predictions are bit-identical to ``model.predict``.
+
+``trees()`` hands the nodes back one tree at a time in sklearn's layout, and
+``shap_model()`` describes the forest as the tree dictionary
+``shap.TreeExplainer`` accepts, so a forest loaded without sklearn (see
+model_artifact.py) can still be explained, indexed and cached.
+"""
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+
+import numpy as np
+
+# Arrays written by CompiledForest.save, one .npy file each
+ARRAY_FIELDS = ("feature", "threshold", "children_left", "children_right", "leaf_values", "roots", "classes_")
+
+# Rows evaluated per pass; bounds the (rows, trees, classes) scratch array
+CHUNK_ROWS = 4096
+# Below this many rows a single accumulate call beats a per-tree Python loop
+SMALL_BATCH_ROWS = 64
+
+
+def floor_float32(values):
+    """Round float64 thresholds down to the nearest float32
+
+    Trees compare float32 inputs, so ``x <= t`` is the same test as
+    ``x <= floor_float32(t)``.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    return np.where(too_high, np.nextafter(rounded, np.float32(-np.inf)), rounded).astype(np.float32)
+
+
+@dataclass
+class TreeNodes:
+    """One tree in sklearn's node layout (leaves have children -1 and feature -2)"""
+    feature: np.ndarray
+    threshold: np.ndarray
+    children_left: np.ndarray
+    children_right: np.ndarray
+    # Per-node class probabilities, normalised as DecisionTreeClassifier.predict_proba does
+    proba: np.ndarray
+    # Weighted training samples per node (None when unknown)
+    weights: np.ndarray = None
+
+
+def node_proba(values):
+    """Per-node class distributions normalised to probabilities, as sklearn does at predict time"""
+    proba = np.array(values, dtype=np.float64)
+    normalizer = proba.sum(axis=1)[:, np.newaxis]
+    normalizer[normalizer == 0.0] = 1.0
+    proba /= normalizer
+    return proba
+
+
+def sklearn_trees(model):
+    """TreeNodes for every estimator of a fitted sklearn RandomForestClassifier, read from public tree_ attributes"""
+    n_classes = len(model.classes_)
+    return [
+        TreeNodes(
+            feature=estimator.tree_.feature,
+            threshold=estimator.tree_.threshold,
+            children_left=estimator.tree_.children_left,
+            children_right=estimator.tree_.children_right,
+            proba=node_proba(estimator.tree_.value[:, 0, :n_classes]),
+            weights=estimator.tree_.weighted_n_node_samples,
+        )
+        for estimator in model.estimators_
+    ]
+
+
+def compile_forest(model):
+    """model itself if it is already a CompiledForest, else the flattened sklearn forest"""
+    return model if isinstance(model, CompiledForest) else CompiledForest.from_sklearn(model)
+
+
+class CompiledForest:
+    """Flattened RandomForest that evaluates all trees with array operations"""
+
+    def __init__(self, feature, threshold, children_left, children_right,
+                 leaf_values, roots, classes, feature_names=None, max_depth=None, node_weights=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.classes_ = classes
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.n_trees = len(roots)
+        self.max_depth = max_depth if max_depth is not None else self._depth()
+        self.node_weights = node_weights
+        self._children = np.stack([children_left, children_right], axis=1).ravel()
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a fitted sklearn RandomForestClassifier"""
+        return cls.from_trees(sklearn_trees(model), model.classes_, getattr(model, "feature_names_in_", None),
+                              max_depth=max(estimator.tree_.max_depth for estimator in model.estimators_))
+
+    @classmethod
+    def from_trees(cls, trees, classes, feature_names=None, max_depth=None):
+        """Flatten TreeNodes (from sklearn or a compact artifact) into one set of node arrays"""
+        features, thresholds, lefts, rights, values, weights, roots = [], [], [], [], [], [], []
+        offset = 0
+
+        for tree in trees:
+            n_nodes = len(tree.feature)
+            node_ids = np.arange(n_nodes)
+            is_leaf = np.asarray(tree.children_left) == -1
+
+            # Leaves point back at themselves so every row can take max_depth steps
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(tree.proba)
+            weights.append(tree.weights)
+            roots.append(offset)
+            offset += n_nodes
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            children_left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            children_right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            leaf_values=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            classes=np.asarray(classes),
+            feature_names=feature_names,
+            max_depth=max_depth,
+            node_weights=None if any(w is None for w in weights) else np.concatenate(weights).astype(np.float64),
+        )
+
+    def trees(self):
+        """Each tree's nodes in sklearn's layout, with tree-local child indices"""
+        bounds = np.append(self.roots, len(self.feature))
+        trees = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            node_ids = np.arange(start, stop)
+            left, right = self.children_left[start:stop], self.children_right[start:stop]
+            is_leaf = left == node_ids
+            trees.append(TreeNodes(
+                feature=np.where(is_leaf, -2, self.feature[start:stop]),
+                threshold=np.where(is_leaf, -2.0, self.threshold[start:stop]),
+                children_left=np.where(is_leaf, -1, left - start),
+                children_right=np.where(is_leaf, -1, right - start),
+                proba=self.leaf_values[start:stop],
+                weights=None if self.node_weights is None else self.node_weights[start:stop],
+            ))
+        return trees
+
+    def shap_model(self):
+        """The forest as the tree dictionary shap.TreeExplainer accepts, with the values and
+        scaling TreeExplainer derives from a RandomForestClassifier"""
+        if self.node_weights is None:
+            raise ValueError("SHAP needs per-node sample weights, which this forest was loaded without")
+        scaling = 1.0 / self.n_trees
+        return {
+            "trees": [{
+                "children_left": tree.children_left,
+                "children_right": tree.children_right,
+                "children_default": tree.children_left,
+                "features": tree.feature,
+                "thresholds": tree.threshold.astype(np.float64),
+                "values": tree.proba * scaling,
+                "node_sample_weight": tree.weights.astype(np.float64),
+            } for tree in self.trees()],
+            "tree_output": "probability",
+            "input_dtype": np.float32,
+            "internal_dtype": np.float64,
+            "base_offset": 0.0,
+        }
+
+    @property
+    def feature_names_in_(self):
+        """Feature names in sklearn's attribute name, so callers can treat either forest alike"""
+        return np.asarray(self.feature_names, dtype=object) if self.feature_names is not None else None
+
+    def save(self, path, metadata=None):
+        """Write the node arrays as uncompressed .npy files that can be memory-mapped"""
+        parent = os.path.dirname(os.path.abspath(path))
+        staging = tempfile.mkdtemp(prefix=".forest-", dir=parent)
+        try:
+            for field in ARRAY_FIELDS:
+                np.save(os.path.join(staging, f"{field}.npy"), getattr(self, field))
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump({
+                    "feature_names": self.feature_names,
+                    "max_depth": self.max_depth,
+                    **(metadata or {}),
+                }, f)
+            # Swap the finished directory into place so readers never see a partial export
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            os.replace(staging, path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    @staticmethod
+    def read_metadata(path):
+        """Metadata stored alongside saved arrays, or None if there is no export"""
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """Load saved arrays; with mmap_mode="r" the pages are shared by every process"""
+        arrays = {field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode=mmap_mode)
+                  for field in ARRAY_FIELDS}
+        meta = cls.read_metadata(path) or {}
+        return cls(
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            children_left=arrays["children_left"],
+            children_right=arrays["children_right"],
+            leaf_values=arrays["leaf_values"],
+            roots=arrays["roots"],
+            classes=np.asarray(arrays["classes_"]),
+            feature_names=meta.get("feature_names"),
+            max_depth=meta.get("max_depth"),
+        )
+
+    def _depth(self):
+        """Longest root-to-leaf path, used when arrays are loaded without metadata"""
+        depth = np.zeros(len(self.feature), dtype=np.intp)
+        for node in range(len(self.feature)):
+            for child in (self.children_left[node], self.children_right[node]):
+                if child != node:
+                    depth[child] = depth[node] + 1
+        return int(depth.max()) if len(depth) else 0
+
+    def _as_matrix(self, X):
+        """Convert input rows to the float32 matrix sklearn's trees compare against"""
+        if hasattr(X, "columns") and self.feature_names is not None:
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X
+
+    def _apply(self, X):
+        """Leaf node index reached by each row in each tree, shape (n_rows, n_trees)"""
+        # Interleaved (left, right) children so each step is a single gather
+        children = self._children
+        n_features = X.shape[1]
+        flat_X = X.ravel()
+        row_offsets = (np.arange(len(X)) * n_features)[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = children[2 * nodes + go_right]
+        return nodes
+
+    def apply(self, X):
+        """Global leaf node indices for each row and tree"""
+        return self._apply(self._as_matrix(X))
+
+    def predict_proba(self, X):
+        """Class probabilities, identical to RandomForestClassifier.predict_proba"""
+        X = self._as_matrix(X)
+        proba = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_ROWS):
+            tree_values = self.leaf_values[self._apply(X[start:start + CHUNK_ROWS]).T]
+            # Sequential accumulation over trees matches sklearn's summation order
+            if len(tree_values[0]) <= SMALL_BATCH_ROWS:
+                summed = np.add.accumulate(tree_values, axis=0)[-1]
+            else:
+                summed = tree_values[0].copy()
+                for values in tree_values[1:]:
+                    summed += values
+            proba[start:start + CHUNK_ROWS] = summed / self.n_trees
+        return proba
+
+    def predict(self, X):
+        """Predicted class labels, identical to RandomForestClassifier.predict"""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
@@ -0,0 +1,16 @@
+# Gunicorn settings for the Render / Procfile deployment.
+#
+# With preload_app the master imports app.py once (model, SHAP explainer and the
+# compiled forest) before forking, so workers share that memory copy-on-write.
+# Set MODEL_ARRAYS_PATH together with INFERENCE_ENGINE=compiled to serve the
+# forest from a read-only memory-mapped export that stays shared for the life
+# of every worker. Run more than one worker with SESSION_BACKEND=sqlite so all
+# workers see the same assessment sessions.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.environ.get("PRELOAD_APP", "1") == "1"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+keepalive = 2
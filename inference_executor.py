@@ -0,0 +1,77 @@
+"""Bounded executor for CPU-bound model work.
+
+Model and SHAP calls are submitted to a dedicated thread or process pool
+instead of Starlette's shared threadpool, so async endpoints that only touch
+session state never queue behind inference. Admission is bounded: once
+``max_workers + max_queue`` calls are running or waiting, further calls fail
+immediately with ``ExecutorOverloaded`` so the API can answer 503.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+
+class ExecutorOverloaded(Exception):
+    """Raised when the inference queue is full"""
+
+
+class InferenceExecutor:
+    """Thread or process pool with a bounded number of pending calls"""
+
+    def __init__(self, max_workers=None, max_queue=None, kind="thread"):
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = self.max_workers * 4 if max_queue is None else max_queue
+        if kind == "process":
+            # Forked workers inherit the already-loaded model instead of reloading it
+            context = multiprocessing.get_context("fork")
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn`` on the pool, or raise ExecutorOverloaded if the queue is full"""
+        # Only the event loop thread touches the counters, so no lock is needed
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise ExecutorOverloaded(f"{self.in_flight} inference calls already pending")
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, partial(fn, *args, **kwargs))
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self, wait=True):
+        """Stop the pool; with wait=False, calls already submitted still finish in the background"""
+        self._pool.shutdown(wait=wait, cancel_futures=wait)
+
+
+def create_inference_executor():
+    """Build the executor configured by INFERENCE_EXECUTOR / INFERENCE_WORKERS / INFERENCE_QUEUE_SIZE"""
+    max_queue = os.environ.get("INFERENCE_QUEUE_SIZE")
+    return InferenceExecutor(
+        max_workers=int(os.environ.get("INFERENCE_WORKERS", 0)) or None,
+        max_queue=int(max_queue) if max_queue is not None else None,
+        kind=os.environ.get("INFERENCE_EXECUTOR", "thread").lower(),
+    )
@@ -0,0 +1,67 @@
+"""Fast JSON responses for the large recommendation and explanation payloads.
+
+Endpoints that return ``FastJSONResponse`` directly bypass FastAPI's
+``jsonable_encoder`` walk and response-model re-validation; their declared
+``response_model`` still documents the schema. NumPy scalars and arrays are
+serialized natively, so handlers do not need ``float()`` / ``.tolist()``
+conversions.
+
+``JSON_ENCODER`` selects the encoder: ``orjson`` (used by ``auto`` when the
+package is installed) or ``stdlib`` (``json`` with a NumPy-aware default).
+"""
+import json
+import os
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def numpy_default(obj):
+    """Convert NumPy values the encoders do not handle natively"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_stdlib(content) -> bytes:
+    # Same output options as Starlette's JSONResponse
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"), default=numpy_default
+    ).encode("utf-8")
+
+
+def dumps_orjson(content) -> bytes:
+    return orjson.dumps(content, default=numpy_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+ENCODERS = {"stdlib": dumps_stdlib}
+if orjson is not None:
+    ENCODERS["orjson"] = dumps_orjson
+
+
+def select_encoder(name=None):
+    """(name, dumps) for JSON_ENCODER=auto|orjson|stdlib"""
+    name = (name or os.environ.get("JSON_ENCODER", "auto")).lower()
+    if name == "auto":
+        name = "orjson" if orjson is not None else "stdlib"
+    if name not in ENCODERS:
+        print(f"⚠️ JSON encoder '{name}' not available, using stdlib")
+        name = "stdlib"
+    return name, ENCODERS[name]
+
+
+JSON_ENCODER, dumps = select_encoder()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the selected encoder"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,178 @@
+"""SQLite index over the assessment log segments.
+
+The log writer records, for every entry it flushes, the segment file and the
+byte offset/length of its JSON line together with the fields the admin API
+filters on (timestamp, completion state, final risk category). Queries run
+against the index and only the matching lines are read back from the
+segments, so paging through the log never loads it into memory. Rotated and
+compressed segments stay readable: the writer renames the segment in the
+index when it moves the file, and gzip/zstd segments are read with forward
+seeks in offset order.
+"""
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class LogIndex:
+    """Offset index of assessment log entries, shared by worker processes"""
+
+    def __init__(self, path="assessment_logs.idx.db"):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS segments (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, completed INTEGER NOT NULL, "
+            "risk_category TEXT, session_id TEXT, segment_id INTEGER NOT NULL, "
+            "offset INTEGER NOT NULL, length INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_risk_category ON entries (risk_category, id)")
+        conn.commit()
+
+    def _connection(self):
+        # Connections must not cross a fork, so they are keyed by process as well as thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def add(self, segment, placements):
+        """Index a flushed batch given as [(entry, offset, length), ...]"""
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO segments (path) VALUES (?)", (segment,))
+            segment_id = conn.execute("SELECT id FROM segments WHERE path = ?", (segment,)).fetchone()[0]
+            rows = []
+            for entry, offset, length in placements:
+                summary = entry.get("recommendation") or {}
+                rows.append((
+                    entry.get("timestamp", ""), int(bool(entry.get("completed"))),
+                    summary.get("final_risk_category"), entry.get("session_id"),
+                    segment_id, offset, length,
+                ))
+            conn.executemany(
+                "INSERT INTO entries (timestamp, completed, risk_category, session_id, segment_id, offset, length) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def rename_segment(self, old_path, new_path):
+        """Point indexed entries at a segment's new location after rotation or compression"""
+        conn = self._connection()
+        with conn:
+            conn.execute("UPDATE segments SET path = ? WHERE path = ?", (new_path, old_path))
+
+    def _where(self, start=None, end=None, completed=None, risk_category=None, after=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        if completed is not None:
+            clauses.append("completed = ?")
+            params.append(int(completed))
+        if risk_category is not None:
+            clauses.append("risk_category = ?")
+            params.append(risk_category)
+        if after is not None:
+            clauses.append("entries.id > ?")
+            params.append(after)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        return self._connection().execute(f"SELECT COUNT(*) FROM entries{where}", params).fetchone()[0]
+
+    def page(self, limit=100, after=None, **filters):
+        """Up to ``limit`` entries with id > ``after`` in log order, and the cursor for the next page"""
+        where, params = self._where(after=after, **filters)
+        rows = self._connection().execute(
+            f"SELECT entries.id, segment_id, offset, length, session_id FROM entries{where} "
+            "ORDER BY entries.id LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        entries = self._read(rows)
+        next_cursor = rows[-1][0] if has_more else None
+        return entries, next_cursor
+
+    def iter_entries(self, after=None, page_size=500, **filters):
+        """Every matching entry from ``after`` onwards, read one page at a time"""
+        while True:
+            entries, after = self.page(limit=page_size, after=after, **filters)
+            yield from entries
+            if after is None:
+                return
+
+    def _segment_paths(self, segment_ids):
+        marks = ",".join("?" * len(segment_ids))
+        return dict(self._connection().execute(
+            f"SELECT id, path FROM segments WHERE id IN ({marks})", list(segment_ids)
+        ).fetchall())
+
+    def _read(self, rows):
+        """Load the JSON lines for index rows, opening each segment once"""
+        by_segment = {}
+        for entry_id, segment_id, offset, length, session_id in rows:
+            by_segment.setdefault(segment_id, []).append((offset, length, entry_id, session_id))
+        loaded = {}
+        for segment_id, spans in by_segment.items():
+            spans.sort()
+            # A segment can be moved by a concurrent rotation; re-resolve its path and retry
+            for attempt in range(3):
+                path = self._segment_paths([segment_id]).get(segment_id)
+                try:
+                    loaded.update(read_spans(path, spans))
+                    break
+                except (OSError, ValueError):
+                    time.sleep(0.05 * (attempt + 1))
+        return [loaded[entry_id] for entry_id, *_ in rows if entry_id in loaded]
+
+
+def open_segment(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise OSError("zstandard is required to read " + path)
+        return zstandard.open(path, "rb")
+    return open(path, "rb")
+
+
+def read_spans(path, spans):
+    """{entry_id: entry} for (offset, length, entry_id, session_id) spans sorted by offset"""
+    if path is None:
+        raise OSError("segment not indexed")
+    entries = {}
+    with open_segment(path) as f:
+        for offset, length, entry_id, session_id in spans:
+            # Forward seeks only, so compressed segments are decompressed at most once
+            f.seek(offset)
+            entry = json.loads(f.read(length))
+            if entry.get("session_id") != session_id:
+                raise ValueError(f"{path} no longer holds entry {entry_id}")
+            entries[entry_id] = entry
+    return entries
+
+
+def create_log_index():
+    """Build the index configured by ASSESSMENT_LOG_INDEX_PATH"""
+    return LogIndex(os.environ.get("ASSESSMENT_LOG_INDEX_PATH", "assessment_logs.idx.db"))
@@ -0,0 +1,219 @@
+"""Background writer for the assessment JSONL log.
+
+Requests only enqueue their log entry. A daemon thread serializes queued
+entries and appends them with one buffered write per batch (every
+``flush_interval`` seconds or ``batch_size`` entries, whichever comes first),
+rotating the active file by size or age and optionally compressing rotated
+segments with gzip or zstd. ``close()`` drains the queue and flushes.
+
+Offsets and rotation assume one writing process per file. Use ``{pid}`` in the
+path to give each worker process its own file; ``create_log_writer`` adds it
+when ``WEB_CONCURRENCY`` runs more than one gunicorn worker. When an
+``index`` (see log_index.py) is given, every flushed line and every segment
+move is recorded in it. ``on_flush(seconds, entries)``, if given, is called
+after each batch is written, e.g. to feed a latency histogram.
+"""
+import atexit
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSED_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+_STOP = object()
+
+
+class AssessmentLogWriter:
+    """Batches log entries onto disk from a background thread"""
+
+    def __init__(self, path="assessment_logs.jsonl", flush_interval=1.0, batch_size=256,
+                 max_bytes=64 * 1024 * 1024, rotate_interval=None, compression=None, max_queue=100000, index=None,
+                 on_flush=None):
+        if compression not in (None, "gzip", "zstd"):
+            raise ValueError(f"unsupported log compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            print("⚠️ zstandard not installed, rotated logs will be gzip-compressed")
+            compression = "gzip"
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.compression = compression
+        self.index = index
+        self.on_flush = on_flush
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._opened_at = 0.0
+        self._rotation_seq = 0
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self.flushes = 0
+        self._thread = threading.Thread(target=self._run, name="assessment-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, entry: dict):
+        """Queue an entry without blocking; entries are dropped if the queue is full"""
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            if stopping:
+                # Drain whatever was queued before close()
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+            if batch:
+                try:
+                    started = time.perf_counter()
+                    self._flush(batch)
+                    if self.on_flush is not None:
+                        self.on_flush(time.perf_counter() - started, len(batch))
+                except Exception as e:
+                    print(f"⚠️ Assessment log write failed: {e}")
+            elif self._file is not None and self._should_rotate(0):
+                self._rotate()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        self._opened_at = time.time()
+
+    def _should_rotate(self, incoming_bytes):
+        if self._file is None:
+            return False
+        size = self._file.tell()
+        if size and self.max_bytes and size + incoming_bytes > self.max_bytes:
+            return True
+        return bool(size and self.rotate_interval and time.time() - self._opened_at >= self.rotate_interval)
+
+    def _rotate(self):
+        """Move the active file aside and compress it if configured"""
+        self._file.close()
+        self._file = None
+        self._rotation_seq += 1
+        stem, ext = os.path.splitext(self.path)
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        rotated = f"{stem}-{stamp}-{self._rotation_seq}{ext}"
+        # The index moves first so readers never resolve the old path to the new active file
+        self._rename_indexed(self.path, rotated)
+        os.replace(self.path, rotated)
+        self.rotations += 1
+        if self.compression:
+            self._compress(rotated)
+
+    def _rename_indexed(self, old_path, new_path):
+        if self.index is not None:
+            try:
+                self.index.rename_segment(old_path, new_path)
+            except Exception as e:
+                print(f"⚠️ Assessment log index update failed: {e}")
+
+    def _compress(self, path):
+        target = path + COMPRESSED_SUFFIXES[self.compression]
+        with open(path, "rb") as src:
+            if self.compression == "gzip":
+                with gzip.open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            else:
+                with open(target, "wb") as raw:
+                    with zstandard.ZstdCompressor().stream_writer(raw) as dst:
+                        shutil.copyfileobj(src, dst)
+        self._rename_indexed(path, target)
+        os.remove(path)
+        return target
+
+    def _flush(self, batch):
+        lines = [(json.dumps(entry, default=str) + "\n").encode() for entry in batch]
+        payload = b"".join(lines)
+        if self._should_rotate(len(payload)):
+            self._rotate()
+        if self._file is None:
+            self._open()
+        offset = self._file.tell()
+        self._file.write(payload)
+        self._file.flush()
+        self.written += len(batch)
+        self.flushes += 1
+        if self.index is not None:
+            placements = []
+            for entry, line in zip(batch, lines):
+                placements.append((entry, offset, len(line)))
+                offset += len(line)
+            try:
+                self.index.add(self.path, placements)
+            except Exception as e:
+                print(f"⚠️ Assessment log index update failed: {e}")
+
+    def close(self, timeout=10.0):
+        """Flush everything queued so far and stop the writer thread"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "queue_depth": self.queue_depth(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "rotations": self.rotations,
+        }
+
+
+def create_log_writer(index=None, on_flush=None):
+    """Build the writer configured by the ASSESSMENT_LOG_* environment variables"""
+    rotate_interval = os.environ.get("ASSESSMENT_LOG_ROTATE_SECONDS")
+    path = os.environ.get("ASSESSMENT_LOG_PATH", "assessment_logs.jsonl")
+    if int(os.environ.get("WEB_CONCURRENCY", 1)) > 1 and "{pid}" not in path:
+        # Workers appending to one file would index each other's lines at wrong offsets and rotate it independently
+        stem, ext = os.path.splitext(path)
+        path = f"{stem}-{{pid}}{ext}"
+    return AssessmentLogWriter(
+        path=path,
+        flush_interval=float(os.environ.get("ASSESSMENT_LOG_FLUSH_SECONDS", 1.0)),
+        batch_size=int(os.environ.get("ASSESSMENT_LOG_BATCH_SIZE", 256)),
+        max_bytes=int(float(os.environ.get("ASSESSMENT_LOG_MAX_MB", 64)) * 1024 * 1024),
+        rotate_interval=float(rotate_interval) if rotate_interval else None,
+        compression=os.environ.get("ASSESSMENT_LOG_COMPRESSION") or None,
+        index=index,
+        on_flush=on_flush,
+    )
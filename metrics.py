@@ -0,0 +1,367 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Hot-path timings use ``time.perf_counter`` and fixed-bucket histograms: an
+observation is one bisect and three additions under a lock, and nothing is
+logged per request. ``MetricsMiddleware`` counts requests by route and status,
+times them and tracks the number in flight. Gauges can be backed by a
+callback, so values such as the session count are only computed on scrape.
+
+``SlowRequestProfiler`` is opt-in. For a sampled fraction of requests it
+captures the stacks of all busy threads every few milliseconds once the
+request has run longer than the threshold, and keeps the collapsed stacks
+(``frame;frame;frame count``, flame-graph input) of the slowest recent ones.
+
+Each process keeps its own metrics: with several gunicorn workers, every
+scrape sees one worker. Work done in ``INFERENCE_EXECUTOR=process`` pool
+workers is not recorded.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as TallyCounter, deque
+from datetime import datetime
+from functools import wraps
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; an implicit +Inf bucket follows the last bound
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """Monotonic count per label set, or read from a callback returning {labels: value} / a number"""
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._values = {}
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        if self.callback is not None:
+            value = self.callback()
+            return value.items() if isinstance(value, dict) else [((), value)]
+        with self._lock:
+            return list(self._values.items())
+
+    def collect(self):
+        return self.header() + [
+            f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+            for labels, value in sorted(self.samples())
+        ]
+
+
+class Gauge(Counter):
+    """Current value per label set; set/inc/dec, or read from a callback on scrape"""
+    kind = "gauge"
+
+    def set(self, value, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def dec(self, *labelvalues, amount=1):
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Timer:
+    """Observes its duration into a histogram; a context manager, or a decorator timing each call"""
+    __slots__ = ("histogram", "labelvalues", "started")
+
+    def __init__(self, histogram, labelvalues):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labelvalues)
+
+    def __call__(self, fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Timer(self.histogram, self.labelvalues):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+class Histogram(Metric):
+    """Fixed-bucket histogram with cumulative Prometheus buckets"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series = {}
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.bounds) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labelvalues):
+        return Timer(self, labelvalues)
+
+    def labelsets(self):
+        with self._lock:
+            return list(self._series)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self, *labelvalues):
+        """Count, mean and bucket-bound quantiles of one label set, in milliseconds"""
+        with self._lock:
+            series = self._series.get(labelvalues)
+            counts, total, count = (list(series[0]), series[1], series[2]) if series else (
+                [0] * (len(self.bounds) + 1), 0.0, 0)
+
+        def quantile(q):
+            # Upper bound of the bucket holding the q-th observation; None if empty or in the +Inf bucket
+            seen = 0
+            for bound, bucket_count in zip(self.bounds, counts):
+                seen += bucket_count
+                if count and seen >= q * count:
+                    return round(bound * 1000, 3)
+            return None
+
+        labels = [f"le_{bound * 1000:g}ms" for bound in self.bounds] + [f"gt_{self.bounds[-1] * 1000:g}ms"]
+        return {
+            "count": count,
+            "mean_ms": round(total / count * 1000, 3) if count else None,
+            "p50_ms": quantile(0.5),
+            "p95_ms": quantile(0.95),
+            "p99_ms": quantile(0.99),
+            "buckets": dict(zip(labels, counts)),
+        }
+
+    def collect(self):
+        lines = self.header()
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.bounds + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labels, (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.collect())
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {escape_label(e)}")
+        return "\n".join(lines) + "\n"
+
+
+def instrument_methods(obj, histogram, methods):
+    """Time obj's methods in place; methods maps method name -> label value"""
+    for name, label in methods.items():
+        setattr(obj, name, histogram.time(label)(getattr(obj, name)))
+    return obj
+
+
+def collapse_stack(frame):
+    """'file:function;...' from the outermost frame to frame"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+# Threads whose innermost frame is in one of these files are blocked, not working
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+
+class SlowRequestProfiler:
+    """Samples thread stacks during a fraction of requests that run past a latency threshold"""
+
+    def __init__(self, sample_rate=0.0, threshold_ms=500, interval_ms=5, keep=20):
+        self.sample_rate = sample_rate
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.profiles = deque(maxlen=keep)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0
+
+    def begin(self):
+        """Token for a request chosen for sampling, else None"""
+        if random.random() >= self.sample_rate:
+            return None
+        token = object()
+        with self._lock:
+            self._active[token] = (time.perf_counter(), TallyCounter())
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._sample, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+        return token
+
+    def end(self, token, label, duration):
+        if token is None:
+            return
+        with self._lock:
+            _, stacks = self._active.pop(token)
+        if duration >= self.threshold and stacks:
+            self.profiles.append({
+                "request": label,
+                "duration_ms": round(duration * 1000, 1),
+                "finished_at": datetime.now().isoformat(),
+                "samples": sum(stacks.values()),
+                "stacks": dict(stacks.most_common()),
+            })
+
+    def _sample(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                slow = [stacks for started, stacks in self._active.values() if now - started >= self.threshold]
+            if not slow:
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            captured = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me or os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue
+                captured.append(f"{names.get(ident, ident)};{collapse_stack(frame)}")
+            with self._lock:
+                for stacks in slow:
+                    stacks.update(captured)
+
+    def recent(self):
+        return list(self.profiles)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: request count, latency and in-flight gauge per route, plus the slow-request profiler"""
+
+    def __init__(self, app, requests, latency, in_flight, profiler=None):
+        self.app = app
+        self.requests = requests
+        self.latency = latency
+        self.in_flight = in_flight
+        self.profiler = profiler if profiler is not None and profiler.enabled else None
+        self._routes = None
+
+    def route_label(self, scope):
+        """Route template rather than the raw path, so ids don't create new series"""
+        route = scope.get("route")
+        if route is not None and hasattr(route, "path"):
+            return route.path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._routes is None:
+            self._routes = {getattr(r, "endpoint", None): r.path for r in scope["app"].routes if hasattr(r, "path")}
+        return self._routes.get(endpoint, getattr(endpoint, "__name__", "unmatched"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        token = self.profiler.begin() if self.profiler else None
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            self.in_flight.dec()
+            method, route = scope["method"], self.route_label(scope)
+            self.requests.inc(method, route, str(status[0]))
+            self.latency.observe(duration, method, route)
+            if token is not None:
+                self.profiler.end(token, f"{method} {route}", duration)
+
+
+def create_slow_request_profiler():
+    """Profiler configured by SLOW_REQUEST_PROFILE_RATE / _THRESHOLD_MS / _INTERVAL_MS / _KEEP (off by default)"""
+    return SlowRequestProfiler(
+        sample_rate=float(os.environ.get("SLOW_REQUEST_PROFILE_RATE", 0)),
+        threshold_ms=float(os.environ.get("SLOW_REQUEST_PROFILE_THRESHOLD_MS", 500)),
+        interval_ms=float(os.environ.get("SLOW_REQUEST_PROFILE_INTERVAL_MS", 5)),
+        keep=int(os.environ.get("SLOW_REQUEST_PROFILE_KEEP", 20)),
+    )
@@ -0,0 +1,82 @@
+"""Request-coalescing scheduler for model scoring.
+
+Concurrent requests submit one row each; the batcher holds them for at most
+``max_wait_ms`` (or until ``max_rows`` rows are waiting), hands the stacked rows
+to a single async ``process`` call and fans the per-row results back to the
+waiting requests. Rows are scored independently, so coalescing does not change
+any request's result.
+"""
+import asyncio
+
+
+class MicroBatcher:
+    """Collects rows from concurrent callers into batches for one ``process`` call"""
+
+    def __init__(self, process, max_rows=64, max_wait_ms=2.0):
+        self.process = process
+        self.max_rows = max(1, int(max_rows))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.rows = 0
+        self.max_batch_size = 0
+        # Power-of-two batch size buckets: "1", "2", "4", ... -> count
+        self.size_histogram = {}
+
+    async def submit(self, item):
+        """Queue one row and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_rows:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        """Send everything waiting as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        self._record(len(batch))
+        try:
+            results = await self.process([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _record(self, size):
+        self.batches += 1
+        self.rows += size
+        self.max_batch_size = max(self.max_batch_size, size)
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+        self.size_histogram[str(bucket)] = self.size_histogram.get(str(bucket), 0) + 1
+
+    def stats(self):
+        return {
+            "max_rows": self.max_rows,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "batch_size_histogram": dict(sorted(self.size_histogram.items(), key=lambda kv: int(kv[0]))),
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,209 @@
+"""Compact, pickle-free artifact format for the risk-level RandomForest.
+
+``model.joblib`` pickles sklearn objects, so it is large, slow to unpickle and
+only loads under a compatible scikit-learn. ``export_forest`` writes the same
+forest as flat little-endian arrays with narrow dtypes in one file:
+
+    b"RAFOREST" | uint32 header length | JSON header | padding | arrays (64-byte aligned)
+
+The header lists each array's dtype, shape and offset plus the feature names,
+so ``load_forest`` memory-maps the arrays and builds a ``CompiledForest``
+(forest_engine.py) from them. Loading needs only NumPy: no sklearn object or
+private ``Tree`` state is rebuilt, so one file serves every scikit-learn
+version, and ``CompiledForest.shap_model()`` feeds ``shap.TreeExplainer``.
+Per node it stores:
+
+* ``feature`` / ``children_left`` / ``children_right``: smallest int dtype that fits
+* ``threshold``: float32, rounded down (trees compare float32 inputs, so
+  ``x <= t`` and ``x <= floor_float32(t)`` agree)
+* ``class_counts``: weighted class counts as the smallest unsigned int dtype.
+  Fractions and node weights are recomputed with the same float64 division
+  sklearn uses, so predictions and SHAP values are bit-identical. Forests
+  with non-integer sample weights fall back to float64 ``class_values``.
+
+Exporting reads only public ``tree_`` attributes of the fitted forest.
+"""
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from forest_engine import CompiledForest, TreeNodes, floor_float32, node_proba
+
+MAGIC = b"RAFOREST"
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+
+
+class ModelArtifactError(Exception):
+    """Raised for files that are not compact forest artifacts"""
+
+
+def narrow_int(values, signed=True):
+    """values cast to the smallest integer dtype that holds them"""
+    values = np.asarray(values)
+    low, high = (int(values.min()), int(values.max())) if values.size else (0, 0)
+    candidates = (np.int8, np.int16, np.int32, np.int64) if signed else (np.uint8, np.uint16, np.uint32, np.uint64)
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    raise ValueError("values do not fit in 64 bits")
+
+
+def tree_fractions(tree):
+    """(n_nodes, n_classes) class fractions, whichever convention the installed sklearn uses"""
+    import sklearn
+    values = tree.value[:, 0, :]
+    # Before 1.4, classifier trees stored weighted class counts in tree_.value instead of fractions
+    if tuple(int(part) for part in sklearn.__version__.split(".")[:2]) >= (1, 4):
+        return values
+    return values / tree.weighted_n_node_samples[:, np.newaxis]
+
+
+def encode_class_values(trees):
+    """Integer weighted class counts if they reproduce sklearn's fractions exactly, else float64 fractions"""
+    fractions = np.concatenate([tree_fractions(tree) for tree in trees])
+    weights = np.concatenate([tree.weighted_n_node_samples for tree in trees])
+    counts = np.round(fractions * weights[:, np.newaxis])
+    if np.array_equal(counts.sum(axis=1), weights) and np.array_equal(counts / weights[:, np.newaxis], fractions):
+        return "class_counts", narrow_int(counts, signed=False)
+    return "class_values", fractions
+
+
+def forest_arrays(model):
+    """Flat node arrays of a fitted RandomForestClassifier"""
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    values_name, values = encode_class_values(trees)
+    arrays = {
+        "node_offsets": np.cumsum([0] + [tree.node_count for tree in trees]).astype(np.int64),
+        "tree_depths": narrow_int([tree.max_depth for tree in trees]),
+        "feature": narrow_int(np.concatenate([tree.feature for tree in trees])),
+        "threshold": floor_float32(np.concatenate([tree.threshold for tree in trees])),
+        "children_left": narrow_int(np.concatenate([tree.children_left for tree in trees])),
+        "children_right": narrow_int(np.concatenate([tree.children_right for tree in trees])),
+        "classes": np.asarray(model.classes_),
+        values_name: values,
+    }
+    if values_name == "class_values":
+        arrays["weighted_n_node_samples"] = np.concatenate([tree.weighted_n_node_samples for tree in trees])
+    return arrays
+
+
+def json_params(model):
+    """Hyperparameters that survive a JSON round trip"""
+    params = {}
+    for name, value in model.get_params(deep=False).items():
+        try:
+            json.dumps(value)
+            params[name] = value
+        except TypeError:
+            pass
+    return params
+
+
+def export_forest(model, path, metadata=None):
+    """Write a fitted RandomForestClassifier to path; returns the file size in bytes"""
+    import sklearn
+    arrays = forest_arrays(model)
+    header = {
+        "format_version": FORMAT_VERSION,
+        "model_type": type(model).__name__,
+        "n_features": int(model.n_features_in_),
+        "feature_names": [str(name) for name in getattr(model, "feature_names_in_", [])] or None,
+        "params": json_params(model),
+        # Informational only; loading does not depend on the scikit-learn version
+        "trained_with": f"scikit-learn {sklearn.__version__}",
+        "metadata": metadata or {},
+        "arrays": {},
+    }
+    # Offsets are relative to the start of the data section, which follows the padded header
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        header["arrays"][name] = {"dtype": array.dtype.newbyteorder("<").str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(len(MAGIC) + 4 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, staging = tempfile.mkstemp(prefix=".forest-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+            for name, array in arrays.items():
+                f.seek(data_start + header["arrays"][name]["offset"])
+                f.write(array.astype(array.dtype.newbyteorder("<"), copy=False).tobytes())
+            f.truncate(data_start + offset)
+        os.chmod(staging, 0o644)
+        # Readers never see a partially written artifact
+        os.replace(staging, path)
+    except Exception:
+        os.remove(staging)
+        raise
+    return os.path.getsize(path)
+
+
+def read_header(path):
+    """(header, data_start) of an artifact"""
+    with open(path, "rb") as f:
+        prefix = f.read(len(MAGIC) + 4)
+        if len(prefix) < len(MAGIC) + 4 or not prefix.startswith(MAGIC):
+            raise ModelArtifactError(f"{path} is not a compact forest artifact")
+        (header_length,) = struct.unpack("<I", prefix[len(MAGIC):])
+        header = json.loads(f.read(header_length))
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ModelArtifactError(f"Unsupported artifact format version {header.get('format_version')}")
+    return header, -(-(len(MAGIC) + 4 + header_length) // ALIGNMENT) * ALIGNMENT
+
+
+def load_arrays(path, mmap=True):
+    """(header, {name: array}); arrays are read-only memory maps unless mmap=False"""
+    header, data_start = read_header(path)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+        if mmap and int(np.prod(shape)) > 0:
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=data_start + spec["offset"], shape=shape)
+        else:
+            arrays[name] = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)),
+                                       offset=data_start + spec["offset"]).reshape(shape)
+    return header, arrays
+
+
+def load_forest(path, mmap=True):
+    """CompiledForest from an artifact written by export_forest, without importing sklearn"""
+    header, arrays = load_arrays(path, mmap=mmap)
+    if "class_counts" in arrays:
+        counts = np.asarray(arrays["class_counts"], dtype=np.float64)
+        weights = counts.sum(axis=1)
+        fractions = counts / weights[:, np.newaxis]
+    else:
+        weights = np.asarray(arrays["weighted_n_node_samples"], dtype=np.float64)
+        fractions = np.asarray(arrays["class_values"], dtype=np.float64)
+
+    offsets = arrays["node_offsets"]
+    trees = []
+    for start, stop in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+        trees.append(TreeNodes(
+            feature=arrays["feature"][start:stop],
+            threshold=arrays["threshold"][start:stop],
+            children_left=arrays["children_left"][start:stop],
+            children_right=arrays["children_right"][start:stop],
+            # The fractions sklearn stores in tree_.value, normalised as predict_proba does
+            proba=node_proba(fractions[start:stop]),
+            weights=weights[start:stop],
+        ))
+    return CompiledForest.from_trees(trees, np.asarray(arrays["classes"]), header.get("feature_names"),
+                                     max_depth=int(np.max(arrays["tree_depths"])) if len(trees) else 0)
+
+
+def artifact_metadata(path):
+    """Metadata recorded by export_forest, or None if path is not an artifact"""
+    try:
+        return read_header(path)[0]["metadata"]
+    except (OSError, ValueError, ModelArtifactError):
+        return None
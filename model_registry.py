@@ -0,0 +1,201 @@
+"""Local registry of versioned model artifacts.
+
+Layout::
+
+    model_registry/
+        ACTIVE                  # name of the version workers should serve
+        20240101T120000-3f2a9c1e/
+            model.joblib
+            metadata.json       # features, classes, training accuracy, content hash, ...
+
+Versions are immutable once registered: they are staged in a temporary
+directory and renamed into place, and ``load`` refuses an artifact whose
+content hash no longer matches its metadata. ``ACTIVE`` is replaced
+atomically, so every worker process sees either the old or the new version.
+
+Register an artifact from the command line:
+    python model_registry.py register model.joblib --accuracy 0.93
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import joblib
+
+from model_artifact import artifact_metadata, export_forest, load_forest
+
+ARTIFACT_NAME = "model.joblib"
+# Pickle-free copy of the same forest, loaded in preference to the pickle when present
+COMPACT_NAME = "model.forest"
+METADATA_NAME = "metadata.json"
+ACTIVE_NAME = "ACTIVE"
+
+
+class ModelRegistryError(Exception):
+    """Raised for unknown versions and corrupted artifacts"""
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def describe_model(model):
+    """Metadata that can be read off a fitted classifier"""
+    description = {
+        "model_type": type(model).__name__,
+        "feature_names": [str(name) for name in getattr(model, "feature_names_in_", [])],
+        "classes": [int(label) for label in getattr(model, "classes_", [])],
+    }
+    if hasattr(model, "estimators_"):
+        description["n_estimators"] = len(model.estimators_)
+    return description
+
+
+class ModelRegistry:
+    """Directory of immutable model versions plus a pointer to the active one"""
+
+    def __init__(self, root="model_registry"):
+        self.root = root
+
+    def _version_dir(self, version):
+        if not version or os.sep in version or version.startswith("."):
+            raise ModelRegistryError(f"Invalid model version: {version!r}")
+        return os.path.join(self.root, version)
+
+    def register(self, artifact_path, training_accuracy=None, source=None, version=None, extra=None):
+        """Copy an artifact into the registry and return its metadata"""
+        content_hash = file_digest(artifact_path)
+        for existing in self.list_versions():
+            if existing["content_hash"] == content_hash:
+                return existing
+        model = joblib.load(artifact_path)
+        version = version or f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{content_hash[:8]}"
+        target = self._version_dir(version)
+        if os.path.exists(target):
+            raise ModelRegistryError(f"Model version {version} already exists")
+
+        metadata = {
+            "version": version,
+            "created_at": datetime.now().isoformat(),
+            "content_hash": content_hash,
+            "size_bytes": os.path.getsize(artifact_path),
+            "training_accuracy": training_accuracy,
+            "source": source or os.path.abspath(artifact_path),
+            **describe_model(model),
+            **(extra or {}),
+        }
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            shutil.copyfile(artifact_path, os.path.join(staging, ARTIFACT_NAME))
+            try:
+                export_forest(model, os.path.join(staging, COMPACT_NAME), metadata={"source_digest": content_hash})
+            except Exception as e:
+                print(f"⚠️ No compact artifact for version {version}: {e}")
+            with open(os.path.join(staging, METADATA_NAME), "w") as f:
+                json.dump(metadata, f, indent=2)
+            os.rename(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return metadata
+
+    def metadata(self, version):
+        path = os.path.join(self._version_dir(version), METADATA_NAME)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ModelRegistryError(f"Unknown model version: {version}")
+
+    def list_versions(self):
+        """Metadata of every registered version, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        versions = []
+        for name in sorted(os.listdir(self.root)):
+            if not name.startswith(".") and os.path.isfile(os.path.join(self.root, name, METADATA_NAME)):
+                versions.append(self.metadata(name))
+        return sorted(versions, key=lambda meta: meta["created_at"])
+
+    def load(self, version):
+        """(model, metadata) for a version, after checking the artifact's content hash"""
+        metadata = self.metadata(version)
+        path = os.path.join(self._version_dir(version), ARTIFACT_NAME)
+        if file_digest(path) != metadata["content_hash"]:
+            raise ModelRegistryError(f"Artifact for model version {version} does not match its content hash")
+        compact = os.path.join(self._version_dir(version), COMPACT_NAME)
+        compact_meta = artifact_metadata(compact)
+        if compact_meta and compact_meta.get("source_digest") == metadata["content_hash"]:
+            return load_forest(compact), metadata
+        return joblib.load(path), metadata
+
+    def active_version(self):
+        try:
+            with open(os.path.join(self.root, ACTIVE_NAME)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_active(self, version):
+        """Point ACTIVE at a registered version"""
+        self.metadata(version)
+        os.makedirs(self.root, exist_ok=True)
+        fd, staging = tempfile.mkstemp(prefix=".active-", dir=self.root)
+        with os.fdopen(fd, "w") as f:
+            f.write(version + "\n")
+        os.replace(staging, os.path.join(self.root, ACTIVE_NAME))
+
+    def clear_active(self):
+        """Remove the ACTIVE pointer, so workers fall back to model.joblib"""
+        try:
+            os.remove(os.path.join(self.root, ACTIVE_NAME))
+        except FileNotFoundError:
+            pass
+
+
+def create_model_registry():
+    """Registry at MODEL_REGISTRY_PATH"""
+    return ModelRegistry(os.environ.get("MODEL_REGISTRY_PATH", "model_registry"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local model registry")
+    commands = parser.add_subparsers(dest="command", required=True)
+    register = commands.add_parser("register", help="add an artifact as a new version")
+    register.add_argument("artifact", nargs="?", default=ARTIFACT_NAME)
+    register.add_argument("--accuracy", type=float)
+    register.add_argument("--activate", action="store_true", help="also make it the active version")
+    commands.add_parser("list", help="show registered versions")
+    activate = commands.add_parser("activate", help="set the active version")
+    activate.add_argument("version")
+    args = parser.parse_args()
+
+    registry = create_model_registry()
+    if args.command == "register":
+        metadata = registry.register(args.artifact, training_accuracy=args.accuracy)
+        if args.activate:
+            registry.set_active(metadata["version"])
+        print(f"✅ Registered model version {metadata['version']}")
+    elif args.command == "activate":
+        registry.set_active(args.version)
+        print(f"✅ Active model version is now {args.version}")
+    else:
+        active = registry.active_version()
+        for metadata in registry.list_versions():
+            marker = "*" if metadata["version"] == active else " "
+            print(f"{marker} {metadata['version']}  accuracy={metadata['training_accuracy']}  "
+                  f"classes={metadata['classes']}  hash={metadata['content_hash'][:12]}")
+
+
+if __name__ == "__main__":
+    main()
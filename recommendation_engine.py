@@ -0,0 +1,149 @@
+"""Columnar recommendation maths for many sessions at once.
+
+``generate_portfolio_allocation``, ``calculate_recommended_investment`` and
+``calculate_future_value`` in app.py each work on one session dict.
+``ColumnarRecommender`` computes the same values for arrays of sessions with
+NumPy:
+
+* allocations and expected returns are gathered from the app's allocation
+  table, indexed by (risk level, age > 60, emergency fund < 3 months)
+* recommended contributions use the same clipping and half-to-even rounding
+* compound-growth factors come from the scalar ``future_value_factors``,
+  called once per distinct (return, horizon) pair and then gathered. Future
+  values are therefore bit-identical to the per-session path, which a
+  vectorized ``np.power`` does not guarantee on every CPU.
+
+It also returns the codes that select the text of ``generate_explanation``
+(age band) and ``generate_next_steps`` (emergency fund and debt flags), so
+callers render each distinct text once. tests/test_recommendation_engine.py
+checks parity with the per-session functions over a grid of sessions, and
+benchmarks/bench_recommendation.py repeats the check on random sessions.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from session_store import DEMOGRAPHIC_FIELDS, FINANCIAL_GOAL_FIELDS, RISK_RESPONSE_FIELDS
+
+ASSETS = ("stocks", "bonds", "cash")
+# An age inside each of generate_explanation's bands: under 30, 30-55, over 55
+AGE_BAND_AGES = (25, 40, 60)
+
+
+@lru_cache(maxsize=4096)
+def future_value_factors(annual_rate, years):
+    """(growth factor of a lump sum, annuity factor of the monthly payments) for a rate and horizon"""
+    monthly_rate = annual_rate / 12
+    months = years * 12
+
+    # Future value of present amount
+    growth = (1 + annual_rate) ** years
+
+    # Future value of monthly payments (annuity)
+    if monthly_rate > 0:
+        annuity = ((1 + monthly_rate) ** months - 1) / monthly_rate
+    else:
+        annuity = months
+
+    return growth, annuity
+
+
+def questionnaire_risk_tolerance(total_score, n_questions):
+    """Risk tolerance (1-5) from summed questionnaire scores, as build_recommendation derives it"""
+    normalized = np.asarray(total_score) / (np.asarray(n_questions) * 4) * 4 + 1
+    return np.clip(np.round(normalized), 1, 5).astype(np.int64)
+
+
+def session_columns(sessions):
+    """Per-field arrays for AssessmentSessions that have demographics, financial goals and risk responses"""
+    demographic = {name: DEMOGRAPHIC_FIELDS.index(name) for name in ("age", "income")}
+    goal = {name: FINANCIAL_GOAL_FIELDS.index(name) for name in (
+        "time_horizon", "current_savings", "monthly_expenses", "existing_debt",
+        "emergency_fund_months", "target_amount")}
+    score = RISK_RESPONSE_FIELDS.index("score")
+    columns = {name: np.array([s.demographics[i] for s in sessions], dtype=np.int64) for name, i in demographic.items()}
+    for name, i in goal.items():
+        if name == "target_amount":
+            columns[name] = np.array([np.nan if s.financial_goals[i] is None else s.financial_goals[i] for s in sessions],
+                                     dtype=np.float64)
+        else:
+            columns[name] = np.array([s.financial_goals[i] for s in sessions], dtype=np.int64)
+    columns["questionnaire_risk_tolerance"] = questionnaire_risk_tolerance(
+        np.array([sum(r[score] for r in s.risk_responses) for s in sessions], dtype=np.int64),
+        np.array([len(s.risk_responses) for s in sessions], dtype=np.int64),
+    )
+    return columns
+
+
+class ColumnarRecommender:
+    """Allocation, contribution and future-value maths over arrays of sessions"""
+
+    def __init__(self, allocation_table, portfolio_returns):
+        """allocation_table: {(risk level, age > 60, emergency fund < 3): allocation};
+        portfolio_returns: {allocation percentages tuple: expected annual return}"""
+        self.levels = np.array(sorted({level for level, _, _ in allocation_table}))
+        shape = (len(self.levels), 2, 2)
+        self.allocations = np.zeros(shape + (len(ASSETS),), dtype=np.int64)
+        self.returns = np.zeros(shape)
+        for (level, older, low_fund), allocation in allocation_table.items():
+            index = (int(np.searchsorted(self.levels, level)), int(older), int(low_fund))
+            self.allocations[index] = [allocation[asset] for asset in ASSETS]
+            self.returns[index] = portfolio_returns[tuple(allocation.values())]
+
+    def level_index(self, risk_level):
+        risk_level = np.asarray(risk_level)
+        index = np.searchsorted(self.levels, risk_level)
+        known = (index < len(self.levels)) & (self.levels[np.minimum(index, len(self.levels) - 1)] == risk_level)
+        if not known.all():
+            raise ValueError(f"Unknown risk levels: {sorted(set(risk_level[~known].tolist()))}")
+        return index
+
+    def future_value_factors(self, rate_index, years):
+        """(growth, annuity) arrays, computed once per distinct (rate, horizon) pair"""
+        pairs, inverse = np.unique(np.stack([rate_index, years]), axis=1, return_inverse=True)
+        factors = np.array(
+            [future_value_factors(float(self.returns.flat[rate]), int(horizon)) for rate, horizon in pairs.T],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+        selected = factors[inverse.ravel()]
+        return selected[:, 0], selected[:, 1]
+
+    def recommend(self, age, income, risk_level, time_horizon, current_savings, monthly_expenses,
+                  emergency_fund_months, existing_debt=None, target_amount=None):
+        """Dict of per-session arrays; target_amount is NaN (or omitted) where a session has no target"""
+        age = np.asarray(age)
+        emergency_fund_months = np.asarray(emergency_fund_months)
+        current_savings = np.asarray(current_savings, dtype=np.float64)
+        years = np.asarray(time_horizon, dtype=np.int64)
+
+        index = (self.level_index(risk_level), (age > 60).astype(np.intp), (emergency_fund_months < 3).astype(np.intp))
+        allocation = self.allocations[index]
+        annual_return = self.returns[index]
+
+        # calculate_recommended_investment: 20% of the monthly surplus, between $100 and $2000
+        surplus = np.asarray(income) / 12 - np.asarray(monthly_expenses)
+        monthly = np.round(np.clip(surplus * 0.2, 100, 2000))
+
+        growth, annuity = self.future_value_factors(np.ravel_multi_index(index, self.returns.shape), years)
+        future_value = current_savings * growth + monthly * annuity
+
+        if target_amount is None:
+            reaches_target = np.ones(len(age), dtype=bool)
+        else:
+            target_amount = np.asarray(target_amount, dtype=np.float64)
+            reaches_target = np.isnan(target_amount) | (future_value >= target_amount)
+
+        columns = {asset: allocation[:, i] for i, asset in enumerate(ASSETS)}
+        columns.update({
+            "expected_annual_return": annual_return,
+            "recommended_monthly_investment": monthly,
+            "projected_value": future_value,
+            # Deterministic counterpart of the Monte Carlo goal check: sessions without a target count as reached
+            "projected_to_reach_target": reaches_target,
+            # Codes selecting generate_explanation's and generate_next_steps' text
+            "age_band": np.where(age < 30, 0, np.where(age > 55, 2, 1)),
+            "needs_emergency_fund": emergency_fund_months < 6,
+        })
+        if existing_debt is not None:
+            columns["debt_exceeds_savings"] = np.asarray(existing_debt) > current_savings
+        return columns
@@ -0,0 +1,249 @@
+"""Precomputed lookup-table scoring over the bounded model input domain.
+
+Every tree split compares a float32 feature value against a threshold, so the
+forest is piecewise constant between the thresholds it actually uses. The index
+buckets each feature by those thresholds (integer features are additionally
+restricted to their validated range), precomputes the predicted class for every
+bucket combination and turns a prediction into a handful of array lookups.
+The table is filled from each leaf's grid box with difference arrays; cells
+whose top two class scores are nearly tied are re-scored with the compiled
+forest so the table agrees exactly with ``model.predict``.
+
+Inputs outside the indexed domain are scored by a fallback model instead.
+"""
+import itertools
+
+import numpy as np
+
+from forest_engine import compile_forest, floor_float32
+
+# Integer ranges accepted by the assessment API; None means "any value" (bucketed only)
+DEFAULT_DOMAIN = {
+    "age": (18, 100),
+    "income": None,
+    "risk_tolerance": (1, 5),
+    "investment_horizon": (1, 50),
+}
+
+# Default cap on the memory used by the table (and its build scratch space)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Cells whose two best summed class scores are closer than this are re-scored exactly
+NEAR_TIE_MARGIN = 1e-6
+
+
+class ScoringIndexTooLarge(Exception):
+    """Raised when the table would exceed the configured memory budget"""
+
+
+class _Axis:
+    """Mapping from one feature's values to table coordinates"""
+
+    def __init__(self, thresholds, domain):
+        # x <= t on a float32 input is the same test as x <= t rounded down to float32
+        edges = np.unique(floor_float32(thresholds))
+        self.domain = domain
+        self.edges = edges
+        if domain is None:
+            # One bucket per threshold interval; each edge is a member of its own bucket
+            upper = np.nextafter(edges[-1], np.float32(np.inf)) if len(edges) else np.float32(0)
+            self.representatives = np.append(edges, upper).astype(np.float32)
+            self.value_map = None
+        else:
+            lo, hi = domain
+            values = np.arange(lo, hi + 1, dtype=np.float32)
+            buckets = np.searchsorted(edges, values, side="left")
+            _, first, compressed = np.unique(buckets, return_index=True, return_inverse=True)
+            self.representatives = values[first]
+            self.value_map = compressed.astype(np.intp)
+        self.size = len(self.representatives)
+
+    def split_point(self, threshold):
+        """Number of leading coordinates that go left at a split on this feature"""
+        return int(np.searchsorted(self.representatives, floor_float32(threshold), side="right"))
+
+    def coordinates(self, values):
+        """Table coordinates for float32 values and a mask of in-domain values"""
+        if self.value_map is None:
+            return np.searchsorted(self.edges, values, side="left"), np.isfinite(values)
+        lo, hi = self.domain
+        in_domain = (values >= lo) & (values <= hi) & (values == np.round(values))
+        offsets = np.where(in_domain, values - lo, 0).astype(np.intp)
+        return self.value_map[offsets], in_domain
+
+
+class ScoringIndex:
+    """O(1) prediction table for a fitted RandomForestClassifier or CompiledForest"""
+
+    def __init__(self, model, domain=None, max_bytes=DEFAULT_MAX_BYTES, explainer=None):
+        forest = compile_forest(model)
+        self.feature_names = list(forest.feature_names)
+        self.classes_ = np.asarray(forest.classes_)
+        domain = domain or DEFAULT_DOMAIN
+        trees = forest.trees()
+
+        self.axes = []
+        for feature_idx, name in enumerate(self.feature_names):
+            thresholds = np.concatenate([t.threshold[t.feature == feature_idx] for t in trees])
+            self.axes.append(_Axis(thresholds, domain.get(name)))
+        self.shape = tuple(axis.size for axis in self.axes)
+        self.n_cells = int(np.prod(self.shape))
+
+        table_bytes = self.n_cells * np.dtype(np.int8).itemsize
+        if explainer is not None:
+            table_bytes += self.n_cells * len(self.feature_names) * np.dtype(np.float64).itemsize
+        if table_bytes > max_bytes:
+            raise ScoringIndexTooLarge(
+                f"scoring index needs {table_bytes / 2**20:.1f} MB for {self.n_cells:,} cells "
+                f"(budget {max_bytes / 2**20:.1f} MB)"
+            )
+        self.nbytes = table_bytes
+
+        self.class_table = self._build_class_table(forest, trees, max_bytes - table_bytes)
+        self.shap_table = self._build_shap_table(explainer) if explainer is not None else None
+
+    def _leaf_boxes(self, trees):
+        """Grid box covered by every leaf of every tree, with its class distribution"""
+        lows, highs, values = [], [], []
+        for tree in trees:
+            proba = tree.proba
+            stack = [(0, [(0, size) for size in self.shape])]
+            while stack:
+                node, box = stack.pop()
+                feature = tree.feature[node]
+                if tree.children_left[node] == -1:
+                    lows.append([lo for lo, _ in box])
+                    highs.append([hi for _, hi in box])
+                    values.append(proba[node])
+                    continue
+                split = self.axes[feature].split_point(tree.threshold[node])
+                lo, hi = box[feature]
+                if lo < split:
+                    left = list(box)
+                    left[feature] = (lo, min(hi, split))
+                    stack.append((tree.children_left[node], left))
+                if split < hi:
+                    right = list(box)
+                    right[feature] = (max(lo, split), hi)
+                    stack.append((tree.children_right[node], right))
+        return np.array(lows, dtype=np.intp), np.array(highs, dtype=np.intp), np.array(values)
+
+    def _build_class_table(self, model, trees, scratch_bytes):
+        """Sum leaf distributions over the grid with difference arrays, slab by slab"""
+        n_classes = len(self.classes_)
+        n_axes = len(self.shape)
+        lows, highs, values = self._leaf_boxes(trees)
+        corners = np.array(list(itertools.product((0, 1), repeat=n_axes)), dtype=bool)
+        signs = np.where(corners.sum(axis=1) % 2 == 0, 1.0, -1.0)
+
+        # Slab along the largest axis so the float64 scratch array fits the budget
+        slab_axis = int(np.argmax(self.shape))
+        cell_bytes = n_classes * np.dtype(np.float64).itemsize
+        slab_cells = int(np.prod([size + 1 for i, size in enumerate(self.shape) if i != slab_axis]))
+        slab_size = max(1, min(self.shape[slab_axis], scratch_bytes // max(1, slab_cells * cell_bytes) - 1))
+
+        class_table = np.empty(self.shape, dtype=np.int8)
+        for start in range(0, self.shape[slab_axis], slab_size):
+            stop = min(start + slab_size, self.shape[slab_axis])
+            slab_lows, slab_highs = lows.copy(), highs.copy()
+            slab_lows[:, slab_axis] = np.clip(lows[:, slab_axis], start, stop) - start
+            slab_highs[:, slab_axis] = np.clip(highs[:, slab_axis], start, stop) - start
+            keep = slab_lows[:, slab_axis] < slab_highs[:, slab_axis]
+            slab_lows, slab_highs, slab_values = slab_lows[keep], slab_highs[keep], values[keep]
+
+            slab_shape = list(self.shape)
+            slab_shape[slab_axis] = stop - start
+            diff = np.zeros([size + 1 for size in slab_shape] + [n_classes], dtype=np.float64)
+            for corner, sign in zip(corners, signs):
+                index = tuple(np.where(corner[i], slab_highs[:, i], slab_lows[:, i]) for i in range(n_axes))
+                np.add.at(diff, index, sign * slab_values)
+            for axis in range(n_axes):
+                np.cumsum(diff, axis=axis, out=diff)
+            totals = diff[tuple(slice(0, size) for size in slab_shape)]
+
+            # Difference arrays round differently from sklearn's per-tree sums, so cells
+            # whose two best classes are nearly tied are re-scored exactly
+            ranked = np.sort(totals, axis=-1)
+            slab_classes = np.argmax(totals, axis=-1).astype(np.int8)
+            near_tie = np.argwhere(ranked[..., -1] - ranked[..., -2] <= NEAR_TIE_MARGIN)
+            if len(near_tie):
+                coords = near_tie.copy()
+                coords[:, slab_axis] += start
+                rows = np.column_stack([axis.representatives[coords[:, i]] for i, axis in enumerate(self.axes)])
+                exact = np.searchsorted(self.classes_, model.predict(rows))
+                slab_classes[tuple(near_tie.T)] = exact
+
+            region = [slice(None)] * n_axes
+            region[slab_axis] = slice(start, stop)
+            class_table[tuple(region)] = slab_classes
+        return class_table
+
+    def _build_shap_table(self, explainer, chunk_rows=4096):
+        """SHAP vector of the predicted class for every grid cell"""
+        import pandas as pd
+        n_features = len(self.feature_names)
+        shap_table = np.empty((self.n_cells, n_features), dtype=np.float64)
+        grid = np.indices(self.shape).reshape(len(self.shape), -1).T
+        class_indices = self.class_table.ravel()
+        for start in range(0, self.n_cells, chunk_rows):
+            coords = grid[start:start + chunk_rows]
+            rows = np.column_stack([axis.representatives[coords[:, i]] for i, axis in enumerate(self.axes)])
+            values = explainer.shap_values(pd.DataFrame(rows, columns=self.feature_names))
+            chunk_classes = class_indices[start:start + chunk_rows]
+            picked = np.arange(len(coords))
+            if isinstance(values, list):
+                shap_table[start:start + chunk_rows] = np.stack(values, axis=-1)[picked, :, chunk_classes]
+            else:
+                shap_table[start:start + chunk_rows] = np.asarray(values)[picked, :, chunk_classes]
+        return shap_table.reshape(self.shape + (n_features,))
+
+    def locate(self, X):
+        """Table coordinates for input rows and a mask of rows inside the indexed domain"""
+        if hasattr(X, "columns"):
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        coords, in_domain = [], np.ones(len(X), dtype=bool)
+        for i, axis in enumerate(self.axes):
+            axis_coords, axis_in_domain = axis.coordinates(X[:, i])
+            coords.append(axis_coords)
+            in_domain &= axis_in_domain
+        return tuple(coords), in_domain
+
+    def predict(self, X, fallback=None):
+        """Predicted class labels; out-of-domain rows are scored by ``fallback``"""
+        coords, in_domain = self.locate(X)
+        predictions = self.classes_.take(self.class_table[coords])
+        if not in_domain.all():
+            if fallback is None:
+                raise ValueError("input outside the scoring index domain and no fallback model given")
+            outside = ~in_domain
+            rows = X.iloc[outside] if hasattr(X, "iloc") else np.asarray(X)[outside]
+            predictions[outside] = fallback.predict(rows)
+        return predictions
+
+    def shap_values(self, X):
+        """Predicted-class SHAP vectors and an in-domain mask, or None without a SHAP table"""
+        if self.shap_table is None:
+            return None
+        coords, in_domain = self.locate(X)
+        return self.shap_table[coords], in_domain
+
+    def validate(self, model, X=None, n_samples=20000, seed=0):
+        """Compare table predictions with ``model.predict``; returns the number of mismatches"""
+        import pandas as pd
+        rng = np.random.default_rng(seed)
+        # Random cell representatives, plus any caller-supplied rows
+        rows = np.column_stack([
+            axis.representatives[rng.integers(0, axis.size, n_samples)] for axis in self.axes
+        ])
+        samples = [pd.DataFrame(rows, columns=self.feature_names)]
+        if X is not None:
+            samples.append(X[self.feature_names] if hasattr(X, "columns") else pd.DataFrame(X, columns=self.feature_names))
+        mismatches = 0
+        for sample in samples:
+            _, in_domain = self.locate(sample)
+            sample = sample[in_domain]
+            mismatches += int(np.sum(self.predict(sample) != model.predict(sample)))
+        return mismatches
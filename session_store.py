@@ -0,0 +1,274 @@
+"""Assessment session storage.
+
+Sessions are kept as fixed-field ``AssessmentSession`` records rather than
+nested dicts. Two backends are provided:
+
+- ``MemorySessionStore``: per-process, with TTL expiry and a size cap.
+- ``SQLiteSessionStore``: a shared SQLite database in WAL mode, so several
+  workers can serve the steps of one assessment flow.
+
+``create_session_store()`` picks the backend from the environment
+(``SESSION_BACKEND``, ``SESSION_TTL_SECONDS``, ``SESSION_MAX_COUNT``,
+``SESSION_DB_PATH``).
+"""
+import json
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Field order of the compact demographics / financial goals tuples
+DEMOGRAPHIC_FIELDS = ("age", "income", "employment_status", "location", "dependents", "marital_status")
+FINANCIAL_GOAL_FIELDS = (
+    "primary_goal", "target_amount", "time_horizon", "current_savings",
+    "monthly_expenses", "existing_debt", "emergency_fund_months",
+)
+RISK_RESPONSE_FIELDS = ("question_id", "selected_option", "score")
+
+
+@dataclass(slots=True)
+class AssessmentSession:
+    """One assessment flow, stored as flat tuples in fixed field order"""
+    session_id: str
+    created_at: str
+    status: str = "started"
+    demographics: Optional[tuple] = None
+    financial_goals: Optional[tuple] = None
+    risk_responses: Tuple[tuple, ...] = ()
+    completed: bool = False
+    completed_at: Optional[str] = None
+    # (questionnaire_risk_score, ml_predicted_risk_score) once a recommendation exists
+    risk_scores: Optional[tuple] = None
+
+    def set_demographics(self, values: dict):
+        self.demographics = tuple(values[f] for f in DEMOGRAPHIC_FIELDS)
+
+    def set_financial_goals(self, values: dict):
+        self.financial_goals = tuple(values.get(f) for f in FINANCIAL_GOAL_FIELDS)
+
+    def set_risk_responses(self, responses):
+        self.risk_responses = tuple(tuple(r[f] for f in RISK_RESPONSE_FIELDS) for r in responses)
+
+    def demographics_dict(self):
+        return dict(zip(DEMOGRAPHIC_FIELDS, self.demographics)) if self.demographics else None
+
+    def financial_goals_dict(self):
+        return dict(zip(FINANCIAL_GOAL_FIELDS, self.financial_goals)) if self.financial_goals else None
+
+    def risk_responses_list(self):
+        return [dict(zip(RISK_RESPONSE_FIELDS, r)) for r in self.risk_responses]
+
+    def as_dict(self):
+        """Dict view in the shape the recommendation helpers expect"""
+        return {
+            "session_id": self.session_id,
+            "created_at": self.created_at,
+            "status": self.status,
+            "demographics": self.demographics_dict(),
+            "financial_goals": self.financial_goals_dict(),
+            "risk_responses": self.risk_responses_list(),
+            "completed": self.completed,
+        }
+
+    def to_record(self):
+        """Compact JSON array encoding used by shared backends"""
+        return json.dumps([
+            self.session_id, self.created_at, self.status, self.demographics,
+            self.financial_goals, self.risk_responses, self.completed,
+            self.completed_at, self.risk_scores,
+        ], separators=(",", ":"))
+
+    @classmethod
+    def from_record(cls, record: str):
+        (session_id, created_at, status, demographics, financial_goals,
+         risk_responses, completed, completed_at, risk_scores) = json.loads(record)
+        return cls(
+            session_id=session_id,
+            created_at=created_at,
+            status=status,
+            demographics=tuple(demographics) if demographics is not None else None,
+            financial_goals=tuple(financial_goals) if financial_goals is not None else None,
+            risk_responses=tuple(tuple(r) for r in risk_responses),
+            completed=completed,
+            completed_at=completed_at,
+            risk_scores=tuple(risk_scores) if risk_scores is not None else None,
+        )
+
+
+class SessionStore(ABC):
+    """Interface shared by the session backends"""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[AssessmentSession]:
+        """The live session with this id, or None if it is unknown or expired"""
+
+    @abstractmethod
+    def save(self, session: AssessmentSession):
+        """Insert or replace a session and reset its idle timer"""
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Remove a session if it exists"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of live sessions"""
+
+    @abstractmethod
+    def iter_sessions(self):
+        """Iterate over all live sessions"""
+
+    def __contains__(self, session_id: str):
+        return self.get(session_id) is not None
+
+    def __len__(self):
+        return self.count()
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process store with idle TTL expiry and a maximum session count"""
+
+    def __init__(self, ttl_seconds: float = 3600, max_sessions: int = 100000):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        # session_id -> (last_touched, session), oldest first
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge(self, now):
+        """Drop expired sessions from the front and enforce the size cap"""
+        while self._sessions:
+            session_id, (touched, _) = next(iter(self._sessions.items()))
+            if now - touched <= self.ttl_seconds and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            touched, session = entry
+            if now - touched > self.ttl_seconds:
+                del self._sessions[session_id]
+                return None
+            return session
+
+    def save(self, session):
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session.session_id] = (now, session)
+            self._sessions.move_to_end(session.session_id)
+            self._purge(now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def count(self):
+        with self._lock:
+            self._purge(time.monotonic())
+            return len(self._sessions)
+
+    def iter_sessions(self):
+        with self._lock:
+            self._purge(time.monotonic())
+            sessions = [session for _, session in self._sessions.values()]
+        return iter(sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store shared between worker processes through a SQLite database in WAL mode"""
+
+    def __init__(self, path: str = "sessions.db", ttl_seconds: float = 3600, max_sessions: int = 100000,
+                 purge_interval: float = 60.0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._last_purge = 0.0
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, touched_at REAL NOT NULL, record TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_touched_at ON sessions (touched_at)")
+        conn.commit()
+
+    def _connection(self):
+        # Connections must not cross a fork, so they are keyed by process as well as thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _purge(self, conn, now):
+        """Delete expired rows and trim to the size cap, at most once per purge interval"""
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        conn.execute("DELETE FROM sessions WHERE touched_at < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM sessions WHERE session_id IN ("
+            "SELECT session_id FROM sessions ORDER BY touched_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,)
+        )
+
+    def get(self, session_id):
+        row = self._connection().execute(
+            "SELECT touched_at, record FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None or time.time() - row[0] > self.ttl_seconds:
+            return None
+        return AssessmentSession.from_record(row[1])
+
+    def save(self, session):
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, touched_at, record) VALUES (?, ?, ?)",
+                (session.session_id, now, session.to_record())
+            )
+            self._purge(conn, now)
+
+    def delete(self, session_id):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def count(self):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM sessions WHERE touched_at >= ?", (time.time() - self.ttl_seconds,)
+        ).fetchone()[0]
+
+    def iter_sessions(self):
+        rows = self._connection().execute(
+            "SELECT record FROM sessions WHERE touched_at >= ?", (time.time() - self.ttl_seconds,)
+        )
+        for (record,) in rows:
+            yield AssessmentSession.from_record(record)
+
+
+def create_session_store():
+    """Build the session store selected by the environment"""
+    backend = os.environ.get("SESSION_BACKEND", "memory").lower()
+    ttl_seconds = float(os.environ.get("SESSION_TTL_SECONDS", 3600))
+    max_sessions = int(os.environ.get("SESSION_MAX_COUNT", 100000))
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            path=os.environ.get("SESSION_DB_PATH", "sessions.db"),
+            ttl_seconds=ttl_seconds,
+            max_sessions=max_sessions,
+        )
+    return MemorySessionStore(ttl_seconds=ttl_seconds, max_sessions=max_sessions)
@@ -0,0 +1,157 @@
+"""Shadow and canary scoring of a candidate model against production traffic.
+
+Shadow mode: a ``SHADOW_FRACTION`` of scored requests is re-scored by the
+candidate on a dedicated background thread after the primary response has
+been computed. The request never waits for it, and when ``SHADOW_MAX_PENDING``
+comparisons are already queued further samples are dropped rather than
+queued. Agreement rate and (primary, candidate) confusion counts are kept in
+``ShadowStats``. Per-model prediction latency goes into a metrics.py
+``Histogram`` labelled by role that covers the current candidate only and is
+cleared when a new one is loaded. Every observation is also passed to the
+histogram the app exports at /metrics, which is never cleared, so its
+counters stay monotonic.
+
+Canary mode: ``CANARY_PERCENT`` of users are served by the candidate. The
+choice is a stable hash of a routing key (the session id for assessments), so
+a user sees the same model on every request.
+"""
+import hashlib
+import os
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import DEFAULT_BUCKETS, Histogram
+
+
+class ShadowStats:
+    """Agreement, confusion and latency counters, safe to update from any thread"""
+
+    def __init__(self, latency=None):
+        self._lock = threading.Lock()
+        # Per-candidate buckets for the shadow report, with the same bounds as the exported histogram
+        buckets = latency.bounds if latency is not None else DEFAULT_BUCKETS
+        self.latency = Histogram("shadow_model_latency_seconds", "Prediction latency by model role", ("role",),
+                                 buckets=buckets)
+        self.exported_latency = latency
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.compared = 0
+            self.agreed = 0
+            self.confusion = Counter()
+            self.latency.clear()
+            self.served = Counter()
+            self.dropped = 0
+            self.errors = 0
+
+    def record_latency(self, role, seconds):
+        self.latency.observe(seconds, role)
+        if self.exported_latency is not None:
+            self.exported_latency.observe(seconds, role)
+
+    def record_served(self, role, rows=1):
+        with self._lock:
+            self.served[role] += rows
+
+    def record_comparison(self, primary, candidate):
+        with self._lock:
+            for primary_level, candidate_level in zip(primary, candidate):
+                self.compared += 1
+                self.agreed += primary_level == candidate_level
+                self.confusion[(int(primary_level), int(candidate_level))] += 1
+
+    def record_drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "served_rows": dict(self.served),
+                "compared": self.compared,
+                "agreement_rate": round(self.agreed / self.compared, 4) if self.compared else None,
+                # "primary->candidate": count
+                "confusion": {f"{p}->{c}": n for (p, c), n in sorted(self.confusion.items())},
+                "latency": {role: self.latency.snapshot(role) for (role,) in sorted(self.latency.labelsets())},
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
+
+
+class ShadowRouter:
+    """Decides which requests are shadowed or served by the candidate, and runs shadow work"""
+
+    def __init__(self, shadow_fraction=0.0, canary_percent=0.0, max_pending=64, seed=None, latency=None):
+        self.stats = ShadowStats(latency)
+        self.configure(shadow_fraction, canary_percent)
+        self.max_pending = max(1, int(max_pending))
+        self._random = random.Random(seed)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def configure(self, shadow_fraction=None, canary_percent=None):
+        if shadow_fraction is not None:
+            self.shadow_fraction = min(1.0, max(0.0, float(shadow_fraction)))
+        if canary_percent is not None:
+            self.canary_percent = min(100.0, max(0.0, float(canary_percent)))
+
+    def serve_canary(self, key):
+        """Whether the user identified by key is in the canary group"""
+        if self.canary_percent <= 0:
+            return False
+        bucket = int.from_bytes(hashlib.sha1(str(key).encode()).digest()[:4], "big") % 10000
+        return bucket < self.canary_percent * 100
+
+    def sample_shadow(self):
+        return self.shadow_fraction > 0 and self._random.random() < self.shadow_fraction
+
+    def submit(self, fn, *args):
+        """Run fn(*args) on the shadow thread, or drop it if too much shadow work is queued"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.stats.record_drop()
+                return False
+            self._pending += 1
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._pool.submit(self._run, fn, *args)
+        return True
+
+    def _run(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception:
+            self.stats.record_error()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def config(self):
+        return {
+            "shadow_fraction": self.shadow_fraction,
+            "canary_percent": self.canary_percent,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_shadow_router(latency=None):
+    """Build the router configured by SHADOW_FRACTION / CANARY_PERCENT / SHADOW_MAX_PENDING"""
+    return ShadowRouter(
+        shadow_fraction=float(os.environ.get("SHADOW_FRACTION", 0)),
+        canary_percent=float(os.environ.get("CANARY_PERCENT", 0)),
+        max_pending=int(os.environ.get("SHADOW_MAX_PENDING", 64)),
+        latency=latency,
+    )
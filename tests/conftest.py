@@ -0,0 +1,28 @@
+"""Shared setup: import the app from the repository root with its state files in a temp directory."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+STATE_DIR = tempfile.mkdtemp(prefix="robo-advisor-tests-")
+for name, filename in (("MODEL_REGISTRY_PATH", "model_registry"), ("ASSESSMENT_LOG_PATH", "assessment_logs.jsonl"),
+                       ("ASSESSMENT_LOG_INDEX_PATH", "assessment_logs.idx.db"), ("SESSION_DB_PATH", "sessions.db")):
+    os.environ.setdefault(name, os.path.join(STATE_DIR, filename))
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app_module):
+    from fastapi.testclient import TestClient
+    with TestClient(app_module.app) as test_client:
+        yield test_client
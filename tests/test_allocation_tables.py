@@ -0,0 +1,76 @@
+import itertools
+
+import pytest
+
+
+def original_allocation(risk_level, age, emergency_fund_months):
+    """The per-request allocation logic the lookup table replaced"""
+    allocation = {
+        1: {"stocks": 20, "bonds": 70, "cash": 10},
+        2: {"stocks": 40, "bonds": 50, "cash": 10},
+        3: {"stocks": 60, "bonds": 35, "cash": 5},
+        4: {"stocks": 80, "bonds": 20, "cash": 0},
+        5: {"stocks": 90, "bonds": 10, "cash": 0}
+    }[risk_level].copy()
+    if age > 60:
+        allocation["bonds"] += 10
+        allocation["stocks"] -= 10
+    if emergency_fund_months < 3:
+        allocation["cash"] += 10
+        allocation["stocks"] -= 10
+    total = sum(allocation.values())
+    if total != 100:
+        allocation["stocks"] += 100 - total
+    return allocation
+
+
+def original_projection(allocation, present_value, monthly_payment, years):
+    """(annual rate, future value) as calculate_projections computed them before the tables"""
+    expected_returns = {"stocks": 0.08, "bonds": 0.04, "cash": 0.02}
+    annual_rate = sum([allocation[asset] / 100 * expected_returns[asset] for asset in allocation])
+    monthly_rate = annual_rate / 12
+    months = years * 12
+    fv_present = present_value * (1 + annual_rate) ** years
+    if monthly_rate > 0:
+        fv_payments = monthly_payment * (((1 + monthly_rate) ** months - 1) / monthly_rate)
+    else:
+        fv_payments = monthly_payment * months
+    return annual_rate, fv_present + fv_payments
+
+
+def session(age, emergency_fund_months, years=20):
+    return {
+        "demographics": {"age": age, "income": 85000},
+        "financial_goals": {"current_savings": 50000, "monthly_expenses": 4500, "existing_debt": 0,
+                            "emergency_fund_months": emergency_fund_months, "time_horizon": years,
+                            "target_amount": None},
+    }
+
+
+@pytest.mark.parametrize("risk_level,age,emergency_fund_months",
+                         itertools.product(range(1, 6), (60, 61), (2, 3)))
+def test_allocation_table_matches_the_original_rules(app_module, risk_level, age, emergency_fund_months):
+    portfolio = app_module.generate_portfolio_allocation(risk_level, session(age, emergency_fund_months))
+    expected = original_allocation(risk_level, age, emergency_fund_months)
+    assert list(portfolio["allocation"].items()) == list(expected.items())
+    assert sum(portfolio["allocation"].values()) == 100
+    assert portfolio["recommended_monthly_investment"] == 517
+
+
+def test_returns_and_future_values_are_bit_identical(app_module):
+    for allocation in app_module.ALLOCATION_TABLE.values():
+        for years in range(1, 51):
+            rate, future_value = original_projection(allocation, 50000, 517, years)
+            assert app_module.PORTFOLIO_RETURNS[tuple(allocation.values())] == rate
+            assert app_module.calculate_future_value(50000, 517, rate, years) == future_value
+
+
+def test_projection_of_an_unlisted_allocation_is_computed(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.projector, "project", lambda *args, **kwargs: {
+        "final_value": {"p10": 0, "p50": 0, "p90": 0}, "probability_of_reaching_target": None})
+    allocation = {"stocks": 50, "bonds": 50, "cash": 0}
+    projections = app_module.calculate_projections(session(35, 6), {"allocation": allocation,
+                                                                    "recommended_monthly_investment": 517})
+    rate, future_value = original_projection(allocation, 50000, 517, 20)
+    assert projections["expected_annual_return"] == f"{rate:.1%}"
+    assert projections["goal_achievement"]["projected_amount"] == future_value
@@ -0,0 +1,68 @@
+import pytest
+
+DEMOGRAPHICS = {"age": 32, "income": 85000, "employment_status": "employed", "location": "SF",
+                "dependents": 1, "marital_status": "married"}
+FINANCIAL_GOALS = {"primary_goal": "retirement", "target_amount": 1000000, "time_horizon": 25,
+                   "current_savings": 50000, "monthly_expenses": 4500, "existing_debt": 15000,
+                   "emergency_fund_months": 6}
+
+
+@pytest.fixture(scope="module")
+def risk_responses(client):
+    questions = client.get("/get-risk-questions").json()["questions"]
+    return [{"question_id": q["id"], "selected_option": q["options"][2]["value"], "score": q["options"][2]["score"]}
+            for q in questions]
+
+
+def five_step_flow(client, risk_responses):
+    session_id = client.post("/start-assessment").json()["session_id"]
+    for endpoint, body in (("submit-demographics", DEMOGRAPHICS), ("submit-financial-goals", FINANCIAL_GOALS),
+                           ("submit-risk-assessment", risk_responses)):
+        assert client.post(f"/{endpoint}?session_id={session_id}", json=body).status_code == 200
+    response = client.post(f"/generate-recommendation?session_id={session_id}")
+    assert response.status_code == 200
+    return response.json()
+
+
+def assess(client, risk_responses, **params):
+    return client.post("/assess", params=params, json={
+        "demographics": DEMOGRAPHICS, "financial_goals": FINANCIAL_GOALS, "risk_responses": risk_responses,
+    })
+
+
+def test_assess_matches_the_five_step_flow(client, risk_responses):
+    expected = five_step_flow(client, risk_responses)
+    response = assess(client, risk_responses)
+    assert response.status_code == 200
+    actual = response.json()
+    assert actual.pop("session_id") != expected.pop("session_id")
+    assert actual == expected
+
+
+def test_session_is_stored_only_with_persist(client, risk_responses):
+    transient = assess(client, risk_responses).json()["session_id"]
+    assert client.get(f"/session-status/{transient}").status_code == 404
+
+    persisted = assess(client, risk_responses, persist="true").json()["session_id"]
+    status = client.get(f"/session-status/{persisted}").json()
+    # Stored in the same state the five-step flow leaves its session in
+    assert (status["status"], status["completed"]) == ("risk_assessment_complete", True)
+
+
+def test_client_session_id_never_overwrites_a_session(client, risk_responses):
+    existing = client.post("/start-assessment").json()["session_id"]
+    response = client.post("/assess", params={"persist": "true"}, json={
+        "session_id": existing, "demographics": DEMOGRAPHICS, "financial_goals": FINANCIAL_GOALS,
+        "risk_responses": risk_responses,
+    })
+    assert response.status_code == 200
+    assert response.json()["session_id"] != existing
+    assert client.get(f"/session-status/{existing}").json()["status"] == "started"
+
+
+def test_assess_validates_answers_like_the_flow(client, risk_responses):
+    unknown = [dict(risk_responses[0], selected_option="guess")] + risk_responses[1:]
+    response = assess(client, unknown)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Unknown option 'guess'")
+    assert assess(client, risk_responses + risk_responses[:1]).status_code == 400
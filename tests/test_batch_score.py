@@ -0,0 +1,31 @@
+import importlib.util
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope="module")
+def batch_score(app_module):
+    spec = importlib.util.spec_from_file_location("batch_score", "batch-score.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_rows_the_api_rejects_are_not_scored(batch_score, client):
+    chunk = pd.DataFrame({
+        "age": [35, 35.7, 40, np.nan, 100],
+        "income": [85000, 85000, -5, 60000, 50000000],
+        "risk_tolerance": [3, 3, 9, 2, 5],
+        "investment_horizon": [15, 15, 10, 5, 50],
+    })
+    scored = batch_score.score_chunk(chunk)
+    assert scored["risk_level"].isna().tolist() == [False, True, True, True, False]
+    assert scored["validation_errors"].isna().tolist() == [True, False, False, False, True]
+    assert scored.loc[2, "validation_errors"].startswith("income: Input should be greater than or equal to 20000")
+
+    # Valid rows get the API's prediction
+    for i in (0, 4):
+        profile = {name: int(chunk.loc[i, name]) for name in chunk.columns}
+        assert client.post("/predict", json=profile).json()["predicted_risk_level"] == scored.loc[i, "risk_level"]
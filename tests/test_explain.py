@@ -0,0 +1,20 @@
+PROFILE = {"age": 35, "income": 85000, "risk_tolerance": 3, "investment_horizon": 15}
+
+
+def test_explain_matches_response_model(client):
+    response = client.post("/explain", json=PROFILE)
+    assert response.status_code == 200
+    assert set(response.json()) >= {"predicted_risk_level", "risk_category", "feature_importance"}
+
+
+def test_explain_without_explainer_is_503(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module.active_bundle, "explainer", None)
+    monkeypatch.setattr(app_module.active_bundle, "scoring_index", None)
+    monkeypatch.setattr(app_module, "SHAP_AVAILABLE", False)
+    monkeypatch.setattr(app_module, "MICROBATCH_ENABLED", False)
+    bundle = app_module.active_bundle
+    monkeypatch.setattr(bundle, "explanation_cache", app_module.ExplanationCache(bundle.model, max_size=0))
+
+    response = client.post("/explain", json=PROFILE)
+    assert response.status_code == 503
+    assert response.json()["detail"].startswith("Explanation generation failed")
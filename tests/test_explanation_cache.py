@@ -0,0 +1,92 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from explanation_cache import ExplanationCache
+
+FEATURE_NAMES = ["age", "income", "risk_tolerance", "investment_horizon"]
+PROFILE = {"age": 35, "income": 85000, "risk_tolerance": 3, "investment_horizon": 15}
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load("model.joblib")
+
+
+@pytest.fixture(scope="module")
+def explainer(model):
+    shap = pytest.importorskip("shap")
+    return shap.TreeExplainer(model)
+
+
+class Computer:
+    """Predicted-class SHAP rows from the explainer, recording the rows of every call"""
+
+    def __init__(self, model, explainer):
+        self.model, self.explainer, self.calls = model, explainer, []
+
+    def __call__(self, rows, predictions):
+        self.calls.append(len(rows))
+        values = np.asarray(self.explainer.shap_values(rows))
+        return values[np.arange(len(rows)), :, np.searchsorted(self.model.classes_, predictions)]
+
+
+def frame(*risk_tolerances, **overrides):
+    return pd.DataFrame([dict(PROFILE, risk_tolerance=risk, **overrides) for risk in risk_tolerances],
+                        columns=FEATURE_NAMES)
+
+
+def test_cached_values_match_the_explainer(model, explainer):
+    cache = ExplanationCache(model)
+    compute = Computer(model, explainer)
+    X = pd.read_csv("synthetic_robo_advisor_data.csv")[FEATURE_NAMES].head(300)
+    predictions = model.predict(X)
+
+    first = cache.lookup(X, predictions, compute)
+    second = cache.lookup(X, predictions, compute)
+    assert np.array_equal(first, compute(X, predictions))
+    assert np.array_equal(second, first)
+    # One explainer call per distinct region on the first pass, none on the second
+    assert compute.calls[:1] == [len(set(cache.keys(X)))] and len(compute.calls) == 2
+    assert cache.stats()["hits"] == len(X)
+
+
+def test_least_recently_used_entry_is_evicted(model, explainer):
+    cache = ExplanationCache(model, max_size=2)
+    compute = Computer(model, explainer)
+    first, second, third = (frame(risk) for risk in (1, 3, 5))
+    assert len({cache.keys(X)[0] for X in (first, second, third)}) == 3
+
+    for X in (first, second, first, third):
+        cache.lookup(X, model.predict(X), compute)
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 1, "misses": 3, "hit_rate": 0.25, "evictions": 1}
+
+    # ``second`` was the least recently used entry, ``first`` was refreshed by its hit
+    calls = len(compute.calls)
+    cache.lookup(first, model.predict(first), compute)
+    assert len(compute.calls) == calls
+    cache.lookup(second, model.predict(second), compute)
+    assert len(compute.calls) == calls + 1
+
+
+def test_cached_rows_are_read_only(model, explainer):
+    cache = ExplanationCache(model)
+    X = frame(3)
+    cache.lookup(X, model.predict(X), Computer(model, explainer))
+    row = cache.lookup(X, model.predict(X), Computer(model, explainer))[0]
+    stored = next(iter(cache._entries.values()))
+    with pytest.raises(ValueError):
+        stored[0] = 1.0
+    assert np.array_equal(row, stored)
+
+
+def test_stats_endpoint_reports_the_active_cache(client, app_module):
+    cache = app_module.active_bundle.explanation_cache
+    before = cache.stats()
+    assert client.post("/explain", json=PROFILE).status_code == 200
+    assert client.post("/explain", json=PROFILE).status_code == 200
+    stats = client.get("/explanation-cache/stats").json()
+    assert set(stats) == {"size", "max_size", "hits", "misses", "hit_rate", "evictions"}
+    assert stats["hits"] + stats["misses"] == before["hits"] + before["misses"] + 2
+    assert stats["hits"] >= before["hits"] + 1
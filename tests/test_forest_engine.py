@@ -0,0 +1,59 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from forest_engine import CompiledForest, compile_forest
+
+FEATURE_NAMES = ["age", "income", "risk_tolerance", "investment_horizon"]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load("model.joblib")
+
+
+@pytest.fixture(scope="module")
+def engine(model):
+    return CompiledForest.from_sklearn(model)
+
+
+def random_profiles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "age": rng.integers(18, 101, n),
+        "income": rng.integers(20000, 50000001, n),
+        "risk_tolerance": rng.integers(1, 6, n),
+        "investment_horizon": rng.integers(1, 51, n),
+    })
+
+
+@pytest.mark.parametrize("rows", ["training", "random", "single"])
+def test_compiled_forest_matches_sklearn(model, engine, rows):
+    if rows == "training":
+        X = pd.read_csv("synthetic_robo_advisor_data.csv")[FEATURE_NAMES]
+    elif rows == "random":
+        X = random_profiles(20000)
+    else:
+        X = random_profiles(1, seed=1)
+    assert np.array_equal(model.predict(X), engine.predict(X))
+    assert np.array_equal(model.predict_proba(X), engine.predict_proba(X))
+
+
+def test_saved_arrays_match_sklearn(model, engine, tmp_path):
+    path = os.path.join(tmp_path, "arrays")
+    engine.save(path)
+    X = random_profiles(2000, seed=2)
+    assert np.array_equal(model.predict_proba(X), CompiledForest.load(path).predict_proba(X))
+
+
+def test_batches_above_the_cut_over_use_sklearn(app_module, monkeypatch):
+    bundle = app_module.active_bundle
+    monkeypatch.setattr(bundle, "compiled_forest", compile_forest(bundle.model))
+    small = random_profiles(app_module.COMPILED_MAX_ROWS)
+    large = random_profiles(app_module.COMPILED_MAX_ROWS + 1)
+    assert app_module.forest_engine_for(small, bundle) is bundle.compiled_forest
+    assert app_module.forest_engine_for(large, bundle) is bundle.model
+    assert np.array_equal(app_module.predict_probabilities(large, bundle), bundle.model.predict_proba(large))
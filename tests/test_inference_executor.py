@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import pytest
+
+from inference_executor import ExecutorOverloaded, InferenceExecutor, create_inference_executor
+
+PROFILE = {"age": 35, "income": 85000, "risk_tolerance": 3, "investment_horizon": 15}
+
+
+def test_calls_beyond_capacity_are_rejected():
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert executor.in_flight == 2
+        with pytest.raises(ExecutorOverloaded):
+            await executor.run(sum, [1, 2])
+        release.set()
+        await asyncio.gather(*running)
+        # Capacity is available again once the pending calls finish
+        return await executor.run(sum, [1, 2])
+
+    try:
+        assert asyncio.run(scenario()) == 3
+    finally:
+        release.set()
+        executor.shutdown()
+    assert executor.stats() == {"kind": "thread", "max_workers": 1, "max_queue": 1,
+                                "in_flight": 0, "completed": 3, "rejected": 1}
+
+
+def test_executor_is_configured_by_the_environment(monkeypatch):
+    monkeypatch.setenv("INFERENCE_WORKERS", "3")
+    monkeypatch.setenv("INFERENCE_QUEUE_SIZE", "0")
+    monkeypatch.delenv("INFERENCE_EXECUTOR", raising=False)
+    executor = create_inference_executor()
+    executor.shutdown()
+    assert (executor.kind, executor.max_workers, executor.max_queue, executor.capacity) == ("thread", 3, 0, 3)
+
+
+@pytest.mark.parametrize("method,endpoint,body", [
+    ("post", "/predict", PROFILE),
+    ("post", "/explain", PROFILE),
+    ("post", "/predict/batch", [PROFILE, PROFILE]),
+])
+def test_saturated_executor_answers_503_with_retry_after(client, app_module, monkeypatch, method, endpoint, body):
+    saturated = InferenceExecutor(max_workers=1, max_queue=0)
+    saturated.in_flight = saturated.capacity
+    monkeypatch.setattr(app_module, "inference_executor", saturated)
+    monkeypatch.setattr(app_module, "MICROBATCH_ENABLED", False)
+    monkeypatch.setattr(app_module, "INFERENCE_RETRY_AFTER", "7")
+    try:
+        response = getattr(client, method)(endpoint, json=body)
+    finally:
+        saturated.in_flight = 0
+        saturated.shutdown()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert response.json()["detail"] == "Scoring capacity exceeded, please retry shortly"
+    assert saturated.rejected == 1
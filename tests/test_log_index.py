@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from log_index import LogIndex
+from log_writer import AssessmentLogWriter
+
+CATEGORIES = ["Conservative", "Moderate", "Aggressive"]
+
+
+def log_entry(i):
+    return {
+        "session_id": f"s{i}",
+        "timestamp": f"2024-01-{i // 10 + 1:02d}T00:00:{i % 10:02d}",
+        "recommendation": {"final_risk_category": CATEGORIES[i % 3]},
+        "completed": i % 2 == 0,
+    }
+
+
+@pytest.fixture(scope="module")
+def logged(tmp_path_factory):
+    """30 entries spread over rotated gzip segments and the active file"""
+    directory = tmp_path_factory.mktemp("logs")
+    index = LogIndex(str(directory / "logs.idx.db"))
+    writer = AssessmentLogWriter(str(directory / "log.jsonl"), batch_size=4, max_bytes=600, compression="gzip",
+                                 index=index)
+    entries = [log_entry(i) for i in range(30)]
+    for entry in entries:
+        writer.write(entry)
+    writer.close()
+    assert writer.rotations > 1
+    return index, entries
+
+
+def test_pages_cover_the_log_in_order(logged):
+    index, entries = logged
+    pages, cursor = [], None
+    while True:
+        page, cursor = index.page(limit=7, after=cursor)
+        pages.append(page)
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [7, 7, 7, 7, 2]
+    assert [entry for page in pages for entry in page] == entries
+    assert list(index.iter_entries(page_size=4)) == entries
+
+
+@pytest.mark.parametrize("filters", [
+    {"completed": True},
+    {"completed": False, "risk_category": "Moderate"},
+    {"start": "2024-01-02", "end": "2024-01-03"},
+    {"risk_category": "Unknown"},
+])
+def test_filters_match_the_entries(logged, filters):
+    index, entries = logged
+
+    def matches(entry):
+        return (entry["completed"] == filters.get("completed", entry["completed"])
+                and entry["recommendation"]["final_risk_category"] == filters.get(
+                    "risk_category", entry["recommendation"]["final_risk_category"])
+                and filters.get("start", "") <= entry["timestamp"] < filters.get("end", "9999"))
+
+    expected = [entry for entry in entries if matches(entry)]
+    assert index.count(**filters) == len(expected)
+    assert list(index.iter_entries(page_size=3, **filters)) == expected
+
+
+def test_logs_endpoint_pages_and_streams(client, app_module, logged, monkeypatch):
+    index, entries = logged
+    monkeypatch.setattr(app_module, "log_index", index)
+
+    body = client.get("/get-assessment-logs", params={"limit": 20, "completed": "true"}).json()
+    assert body["total_assessments"] == 15
+    assert body["logs"] == [entry for entry in entries if entry["completed"]]
+    assert body["next_cursor"] is None
+
+    first = client.get("/get-assessment-logs", params={"limit": 25}).json()
+    rest = client.get("/get-assessment-logs", params={"cursor": first["next_cursor"]}).json()
+    assert first["logs"] + rest["logs"] == entries
+
+    response = client.get("/get-assessment-logs", params={"format": "ndjson", "risk_category": "Aggressive"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert streamed == [entry for entry in entries if entry["recommendation"]["final_risk_category"] == "Aggressive"]
+
+    assert client.get("/get-assessment-logs", params={"limit": app_module.LOG_PAGE_MAX + 1}).status_code == 422
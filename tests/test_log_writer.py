@@ -0,0 +1,93 @@
+import json
+import os
+import time
+
+import pytest
+
+import log_writer
+from log_index import open_segment
+
+
+def test_multiple_workers_get_their_own_log_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.setenv("ASSESSMENT_LOG_PATH", str(tmp_path / "assessment_logs.jsonl"))
+    writer = log_writer.create_log_writer()
+    writer.write({"session_id": "a"})
+    writer.close()
+    assert writer.path == str(tmp_path / f"assessment_logs-{os.getpid()}.jsonl")
+    assert os.listdir(tmp_path) == [os.path.basename(writer.path)]
+
+
+def test_single_worker_keeps_the_configured_path(tmp_path, monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setenv("ASSESSMENT_LOG_PATH", str(tmp_path / "assessment_logs.jsonl"))
+    writer = log_writer.create_log_writer()
+    writer.close()
+    assert writer.path == str(tmp_path / "assessment_logs.jsonl")
+
+
+def read_entries(paths):
+    entries = []
+    for path in paths:
+        with open_segment(path) as f:
+            entries.extend(json.loads(line) for line in f)
+    return entries
+
+
+def test_close_flushes_queued_entries(tmp_path):
+    flushed = []
+    writer = log_writer.AssessmentLogWriter(str(tmp_path / "log.jsonl"), flush_interval=60,
+                                            on_flush=lambda seconds, entries: flushed.append(entries))
+    for i in range(10):
+        writer.write({"session_id": str(i)})
+    writer.close()
+    assert read_entries([writer.path]) == [{"session_id": str(i)} for i in range(10)]
+    assert sum(flushed) == 10
+    assert writer.stats()["written"] == 10 and writer.stats()["queue_depth"] == 0
+
+
+def test_full_batch_is_written_before_the_interval(tmp_path):
+    writer = log_writer.AssessmentLogWriter(str(tmp_path / "log.jsonl"), flush_interval=60, batch_size=3)
+    for i in range(3):
+        writer.write({"session_id": str(i)})
+    deadline = time.monotonic() + 5
+    while writer.written < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.written == 3
+    assert len(read_entries([writer.path])) == 3
+    writer.close()
+
+
+@pytest.mark.parametrize("compression,suffix", [(None, ".jsonl"), ("gzip", ".jsonl.gz")])
+def test_active_file_is_rotated_by_size(tmp_path, compression, suffix):
+    entries = [{"session_id": str(i), "padding": "x" * 80} for i in range(6)]
+    writer = log_writer.AssessmentLogWriter(str(tmp_path / "log.jsonl"), batch_size=1, max_bytes=250,
+                                            compression=compression)
+    for entry in entries:
+        writer.write(entry)
+    writer.close()
+
+    rotated = sorted((p for p in tmp_path.iterdir() if p.name != "log.jsonl"),
+                     key=lambda p: int(p.name.split("-")[-1].split(".")[0]))
+    assert writer.rotations == len(rotated) > 0
+    assert all(p.name.endswith(suffix) for p in rotated)
+    assert os.path.getsize(writer.path) <= 250
+    # Nothing is lost or reordered across segments
+    assert read_entries([str(p) for p in rotated] + [writer.path]) == entries
+
+
+def test_active_file_is_rotated_by_age(tmp_path):
+    writer = log_writer.AssessmentLogWriter(str(tmp_path / "log.jsonl"), flush_interval=0.01, rotate_interval=0.2)
+    writer.write({"session_id": "old"})
+    deadline = time.monotonic() + 5
+    while writer.rotations == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.write({"session_id": "new"})
+    writer.close()
+    assert writer.rotations >= 1
+    assert read_entries([writer.path]) == [{"session_id": "new"}]
+
+
+def test_unknown_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="unsupported log compression"):
+        log_writer.AssessmentLogWriter(str(tmp_path / "log.jsonl"), compression="bz2")
@@ -0,0 +1,95 @@
+import re
+
+from metrics import MetricsRegistry
+
+PROFILE = {"age": 35, "income": 85000, "risk_tolerance": 3, "investment_horizon": 15}
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse(text):
+    """{family: {"type": kind, "samples": [(name, labels, value)]}}, checking the exposition grammar"""
+    assert text.endswith("\n")
+    families, current = {}, None
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            current = line.split(" ")[2]
+            assert current not in families
+            families[current] = {"type": None, "samples": []}
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name == current and kind in ("counter", "gauge", "histogram", "untyped")
+            families[name]["type"] = kind
+        elif line.startswith("#"):
+            continue
+        else:
+            match = SAMPLE.match(line)
+            assert match, f"malformed sample line: {line!r}"
+            name, labels, value = match.group(1), dict(LABEL.findall(match.group(2) or "")), match.group(3)
+            suffixes = ("_bucket", "_sum", "_count") if families[current]["type"] == "histogram" else ("",)
+            assert any(name == current + suffix for suffix in suffixes), f"{name} outside family {current}"
+            families[current]["samples"].append((name, labels, float(value)))
+    return families
+
+
+def sample_value(family, **labels):
+    return next((value for _, sample_labels, value in family["samples"] if sample_labels == labels), 0.0)
+
+
+def test_metrics_endpoint_uses_the_text_format(client, app_module):
+    client.post("/predict", json=PROFILE)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    families = parse(response.text)
+    assert families["robo_http_requests_total"]["type"] == "counter"
+    assert families["robo_http_request_duration_seconds"]["type"] == "histogram"
+    assert families["robo_sessions"]["type"] == "gauge"
+    assert sample_value(families["robo_model_info"], version=app_module.active_bundle.version) == 1
+
+
+def test_histogram_buckets_are_cumulative(client):
+    client.post("/predict", json=PROFILE)
+    families = parse(client.get("/metrics").text)
+    for family in (families["robo_http_request_duration_seconds"], families["robo_stage_duration_seconds"]):
+        series = {}
+        for name, labels, value in family["samples"]:
+            key = tuple(sorted((k, v) for k, v in labels.items() if k != "le"))
+            series.setdefault(key, {"buckets": [], "count": None})
+            if name.endswith("_bucket"):
+                series[key]["buckets"].append((labels["le"], value))
+            elif name.endswith("_count"):
+                series[key]["count"] = value
+        assert series
+        for values in series.values():
+            counts = [count for _, count in values["buckets"]]
+            assert counts == sorted(counts)
+            assert values["buckets"][-1] == ("+Inf", values["count"])
+
+
+def test_requests_are_counted_by_route_template(client):
+    def count(route, status, method="GET"):
+        family = parse(client.get("/metrics").text)["robo_http_requests_total"]
+        return sample_value(family, method=method, route=route, status=status)
+
+    before = count("/session-status/{session_id}", "404")
+    predicted = count("/predict", "200", "POST")
+    client.get("/session-status/no-such-session")
+    client.post("/predict", json=PROFILE)
+    assert count("/session-status/{session_id}", "404") == before + 1
+    assert count("/predict", "200", "POST") == predicted + 1
+    # Ids never become label values
+    assert "no-such-session" not in client.get("/metrics").text
+
+
+def test_registry_escapes_labels_and_reports_failing_callbacks():
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs by name", ("name",)).inc('say "hi"\\\n')
+    registry.gauge("queue_depth", "Broken callback", callback=lambda: 1 / 0)
+    registry.histogram("work_seconds", "Work", buckets=(0.1, 1.0)).observe(0.5)
+    text = registry.render()
+    assert 'jobs_total{name="say \\"hi\\"\\\\\\n"} 1' in text
+    assert "# queue_depth unavailable: division by zero" in text
+    families = parse(text)
+    assert "queue_depth" not in families
+    assert [sample[2] for sample in families["work_seconds"]["samples"]] == [0.0, 1.0, 1.0, 0.5, 1.0]
@@ -0,0 +1,74 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from micro_batcher import MicroBatcher
+
+FEATURE_NAMES = ["age", "income", "risk_tolerance", "investment_horizon"]
+PROFILE = {"age": 35, "income": 85000, "risk_tolerance": 3, "investment_horizon": 15}
+
+
+@pytest.fixture
+def uncached(app_module, monkeypatch):
+    # Every row goes through the explainer, so batched and single SHAP values are really compared
+    bundle = app_module.active_bundle
+    monkeypatch.setattr(bundle, "explanation_cache", app_module.ExplanationCache(bundle.model, max_size=0))
+
+
+def test_batched_rows_match_single_predictions(app_module, uncached):
+    rows = pd.read_csv("synthetic_robo_advisor_data.csv")[FEATURE_NAMES].head(40).values.tolist()
+    batcher = MicroBatcher(app_module.score_rows_batch, max_rows=16, max_wait_ms=50)
+
+    async def scenario():
+        batched = await asyncio.gather(*(batcher.submit(row) for row in rows))
+        single = [(await app_module.score_rows_batch([row]))[0] for row in rows]
+        return batched, single
+
+    batched, single = asyncio.run(scenario())
+    assert batcher.stats()["batches"] == 3
+    for (batch_level, batch_shap), (single_level, single_shap) in zip(batched, single):
+        assert batch_level == single_level
+        assert np.array_equal(batch_shap, single_shap)
+
+
+def test_batches_are_cut_at_max_rows():
+    sizes = []
+
+    async def process(items):
+        sizes.append(len(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(process, max_rows=2, max_wait_ms=1000)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    # The final single row waits for the timer, the full batches do not
+    assert asyncio.run(scenario()) == [0, 10, 20, 30, 40]
+    assert sizes == [2, 2, 1]
+    stats = batcher.stats()
+    assert (stats["rows"], stats["max_batch_size"], stats["pending"]) == (5, 2, 0)
+    assert stats["batch_size_histogram"] == {"1": 1, "2": 2}
+
+
+def test_batch_failure_reaches_every_caller():
+    async def process(items):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(process, max_rows=3)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [str(result) for result in results] == ["model unavailable"] * 3
+
+
+def test_explain_is_unchanged_with_micro_batching(client, app_module, uncached, monkeypatch):
+    expected = client.post("/explain", json=PROFILE).json()
+    monkeypatch.setattr(app_module, "MICROBATCH_ENABLED", True)
+    monkeypatch.setattr(app_module, "micro_batcher", None)
+    assert client.post("/explain", json=PROFILE).json() == expected
+    assert client.get("/micro-batching/stats").json()["rows"] == 1
@@ -0,0 +1,69 @@
+import subprocess
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from forest_engine import CompiledForest
+from model_artifact import artifact_metadata, export_forest, load_forest, read_header
+from model_registry import file_digest
+
+FEATURE_NAMES = ["age", "income", "risk_tolerance", "investment_horizon"]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load("model.joblib")
+
+
+@pytest.fixture(scope="module")
+def artifact(model, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("artifact") / "model.forest")
+    export_forest(model, path, metadata={"source_digest": file_digest("model.joblib")})
+    return path
+
+
+def test_artifact_matches_joblib(model, artifact):
+    X = pd.read_csv("synthetic_robo_advisor_data.csv")[FEATURE_NAMES]
+    forest = load_forest(artifact)
+    assert isinstance(forest, CompiledForest)
+    assert artifact_metadata(artifact) == {"source_digest": file_digest("model.joblib")}
+    assert np.array_equal(forest.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(forest.classes_, model.classes_)
+
+
+def test_artifact_shap_matches_joblib(model, artifact):
+    shap = pytest.importorskip("shap")
+    X = pd.read_csv("synthetic_robo_advisor_data.csv")[FEATURE_NAMES].sample(200, random_state=0)
+    expected = shap.TreeExplainer(model).shap_values(X)
+    actual = shap.TreeExplainer(load_forest(artifact).shap_model()).shap_values(X)
+    assert np.array_equal(np.asarray(actual), np.asarray(expected))
+
+
+def test_artifact_loads_without_sklearn(artifact):
+    code = ("import sys; from model_artifact import load_forest; load_forest(sys.argv[1]); "
+            "print('sklearn' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code, artifact], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_artifact_from_other_sklearn_still_loads(model, tmp_path, monkeypatch):
+    import sklearn
+    path = tmp_path / "model.forest"
+    monkeypatch.setattr(sklearn, "__version__", "1.4.0")
+    export_forest(model, path)
+    monkeypatch.undo()
+    # The recorded version is informational: loading never checks it
+    assert read_header(path)[0]["trained_with"] == "scikit-learn 1.4.0"
+    X = pd.read_csv("synthetic_robo_advisor_data.csv")[FEATURE_NAMES]
+    assert np.array_equal(load_forest(path).predict_proba(X), model.predict_proba(X))
+
+
+def test_app_loads_the_artifact(app_module, artifact, monkeypatch):
+    monkeypatch.setattr(app_module, "MODEL_ARTIFACT_PATH", artifact)
+    loaded, metadata = app_module.load_local_model()
+    assert isinstance(loaded, CompiledForest)
+    assert metadata == {"content_hash": file_digest("model.joblib"), "artifact": artifact}
+    assert app_module.build_explainer(loaded) is not None
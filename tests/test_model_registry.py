@@ -0,0 +1,101 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_engine import CompiledForest
+from model_registry import ModelRegistry, ModelRegistryError, file_digest
+
+FEATURE_NAMES = ["age", "income", "risk_tolerance", "investment_horizon"]
+PROFILE = {"age": 35, "income": 85000, "risk_tolerance": 3, "investment_horizon": 15}
+
+
+@pytest.fixture(scope="module")
+def small_model_path(tmp_path_factory):
+    """A second, different artifact to register next to model.joblib"""
+    data = pd.read_csv("synthetic_robo_advisor_data.csv")
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(data[FEATURE_NAMES], data["risk_level"])
+    path = tmp_path_factory.mktemp("artifacts") / "small.joblib"
+    joblib.dump(model, path)
+    return str(path)
+
+
+def test_register_load_and_activate(tmp_path, small_model_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    first = registry.register("model.joblib", training_accuracy=0.9)
+    second = registry.register(small_model_path, version="v2")
+    assert (first["content_hash"], first["training_accuracy"]) == (file_digest("model.joblib"), 0.9)
+    assert first["feature_names"] == FEATURE_NAMES and second["n_estimators"] == 5
+    # Registering the same bytes again returns the existing version
+    assert registry.register("model.joblib") == first
+    assert [meta["version"] for meta in registry.list_versions()] == [first["version"], "v2"]
+
+    loaded, metadata = registry.load("v2")
+    assert isinstance(loaded, CompiledForest) and metadata == second
+    X = pd.DataFrame([PROFILE], columns=FEATURE_NAMES)
+    assert np.array_equal(loaded.predict(X), joblib.load(small_model_path).predict(X))
+
+    assert registry.active_version() is None
+    registry.set_active("v2")
+    assert registry.active_version() == "v2"
+    registry.clear_active()
+    assert registry.active_version() is None
+
+
+def test_unknown_and_corrupted_versions_are_refused(tmp_path, small_model_path):
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.register(small_model_path, version="v1")
+    for version in ("v9", "../v1", ".staging"):
+        with pytest.raises(ModelRegistryError):
+            registry.set_active(version)
+    with pytest.raises(ModelRegistryError, match="already exists"):
+        registry.register("model.joblib", version="v1")
+
+    with open(tmp_path / "registry" / "v1" / "model.joblib", "ab") as f:
+        f.write(b"tampered")
+    with pytest.raises(ModelRegistryError, match="content hash"):
+        registry.load("v1")
+
+
+@pytest.fixture
+def registry_app(app_module, client, tmp_path, monkeypatch):
+    """The running app with an empty registry; bundles and swap state are restored afterwards"""
+    for name, value in (("model_registry", ModelRegistry(str(tmp_path / "registry"))),
+                        ("active_bundle", app_module.active_bundle), ("previous_bundle", app_module.previous_bundle),
+                        ("model_swap", {"state": "idle", "version": None, "error": None}),
+                        ("model_swap_task", None)):
+        monkeypatch.setattr(app_module, name, value)
+    return app_module
+
+
+def test_activate_and_rollback(registry_app, client, small_model_path):
+    original = registry_app.active_bundle
+    version = registry_app.model_registry.register(small_model_path)["version"]
+
+    response = client.post(f"/admin/models/{version}/activate", params={"wait": "true"})
+    assert response.status_code == 200
+    assert registry_app.active_bundle.version == version
+    assert registry_app.previous_bundle is original
+    assert registry_app.model_registry.active_version() == version
+    X = pd.read_csv("synthetic_robo_advisor_data.csv")[FEATURE_NAMES]
+    assert np.array_equal(registry_app.predict_levels(X), joblib.load(small_model_path).predict(X))
+
+    # The previous bundle is still loaded, so rolling back is an immediate swap
+    response = client.post("/admin/models/rollback")
+    assert response.status_code == 200
+    assert registry_app.active_bundle is original
+    assert response.json()["previous"]["version"] == version
+    assert registry_app.model_registry.active_version() is None
+
+    listing = client.get("/admin/models").json()
+    assert listing["active"]["version"] == original.version
+    assert [meta["version"] for meta in listing["versions"]] == [version]
+
+
+def test_admin_errors(registry_app, client, monkeypatch):
+    assert client.post("/admin/models/missing/activate").status_code == 404
+    monkeypatch.setattr(registry_app, "previous_bundle", None)
+    response = client.post("/admin/models/rollback")
+    assert response.status_code == 409
+    assert response.json()["detail"] == "No previous model version is loaded"
@@ -0,0 +1,50 @@
+import time
+
+from projection_engine import MAX_PATH_YEARS, MonteCarloProjector
+
+ASSESSMENT = {
+    "demographics": {"age": 32, "income": 85000, "employment_status": "employed", "location": "SF",
+                     "dependents": 1, "marital_status": "married"},
+    "financial_goals": {"primary_goal": "retirement", "target_amount": 1000000, "time_horizon": 25,
+                        "current_savings": 50000, "monthly_expenses": 4500, "existing_debt": 15000,
+                        "emergency_fund_months": 6},
+    "risk_responses": [
+        {"question_id": question, "selected_option": option, "score": 3}
+        for question, option in enumerate(["intermediate", "hold", "20_percent", "5_10_years", "balanced_growth"], 1)
+    ],
+}
+
+
+def test_identical_assessments_get_identical_projections(client):
+    first = client.post("/assess", json=ASSESSMENT).json()["projections"]
+    second = client.post("/assess", json=ASSESSMENT).json()["projections"]
+    assert first == second
+
+
+def test_goal_flag_agrees_with_projected_amount(client):
+    for target in (10000, 1000000, 100000000):
+        assessment = dict(ASSESSMENT, financial_goals=dict(ASSESSMENT["financial_goals"], target_amount=target))
+        goal = client.post("/assess", json=assessment).json()["projections"]["goal_achievement"]
+        assert goal["likely_to_achieve"] == (goal["projected_amount"] >= target)
+
+
+def test_long_horizons_stay_within_the_path_budget():
+    projector = MonteCarloProjector()
+    allocation = {"stocks": 90, "bonds": 10, "cash": 0}
+    for years in (25, 40, 50):
+        result = projector.project(50000, 2000, allocation, years, 1000000)
+        assert result["paths"] * years <= MAX_PATH_YEARS
+        assert result["paths"] == min(projector.n_paths, MAX_PATH_YEARS // years)
+        # Capped, yet still seeded from the inputs
+        again = projector.project(50000, 2000, allocation, years, 1000000)
+        assert again["final_value"] == result["final_value"]
+        assert again["probability_of_reaching_target"] == result["probability_of_reaching_target"]
+
+
+def test_long_horizon_meets_the_latency_budget():
+    projector = MonteCarloProjector()
+    allocation = {"stocks": 60, "bonds": 35, "cash": 5}
+    projector.project(50000, 500, allocation, 50, 1000000)
+    started = time.perf_counter()
+    projector.project(50000, 500, allocation, 50, 1000000)
+    assert (time.perf_counter() - started) * 1000 < projector.budget_ms
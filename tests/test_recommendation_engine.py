@@ -0,0 +1,79 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from projection_engine import MonteCarloProjector
+from session_store import AssessmentSession
+
+# Ages and emergency funds on both sides of every threshold the recommendation code tests
+AGES = (29, 30, 55, 56, 61)
+EMERGENCY_FUND_MONTHS = (2, 3, 5, 6)
+HORIZONS = (1, 50)
+# (current savings, existing debt): debt below, equal to and above savings
+SAVINGS_AND_DEBT = ((50000, 0), (50000, 50000), (0, 15000))
+INCOMES_AND_EXPENSES = ((20000, 4000), (50000000, 0))
+TARGETS = (None, 1000, 100000000)
+
+
+def grid_sessions():
+    """(AssessmentSessions, risk levels) for every combination of the values above"""
+    sessions, levels = [], []
+    combinations = itertools.product(range(1, 6), AGES, EMERGENCY_FUND_MONTHS, HORIZONS, SAVINGS_AND_DEBT,
+                                     INCOMES_AND_EXPENSES, TARGETS)
+    for i, (level, age, fund, years, (savings, debt), (income, expenses), target) in enumerate(combinations):
+        session = AssessmentSession(session_id=str(i), created_at="")
+        session.set_demographics({"age": age, "income": income, "employment_status": "employed",
+                                  "location": "", "dependents": 0, "marital_status": "single"})
+        session.set_financial_goals({"primary_goal": "retirement", "target_amount": target, "time_horizon": years,
+                                     "current_savings": savings, "monthly_expenses": expenses,
+                                     "existing_debt": debt, "emergency_fund_months": fund})
+        session.set_risk_responses([{"question_id": q, "selected_option": "", "score": (i + q) % 4 + 1}
+                                    for q in range(i % 5 + 1)])
+        sessions.append(session)
+        levels.append(level)
+    return sessions, np.array(levels)
+
+
+@pytest.fixture
+def cheap_projector(app_module, monkeypatch):
+    # Only the deterministic fields are compared; a few paths keep the grid fast
+    monkeypatch.setattr(app_module, "projector", MonteCarloProjector(n_paths=2, seed=0))
+
+
+def test_columnar_recommender_matches_per_session_functions(app_module, cheap_projector):
+    sessions, levels = grid_sessions()
+    columns = app_module.session_columns(sessions)
+    result = app_module.recommender.recommend(
+        age=columns["age"], income=columns["income"], risk_level=levels,
+        time_horizon=columns["time_horizon"], current_savings=columns["current_savings"],
+        monthly_expenses=columns["monthly_expenses"], emergency_fund_months=columns["emergency_fund_months"],
+        existing_debt=columns["existing_debt"], target_amount=columns["target_amount"],
+    )
+    values = {name: column.tolist() for name, column in result.items()}
+
+    for i, (stored, level) in enumerate(zip(sessions, levels.tolist())):
+        session = stored.as_dict()
+        portfolio = app_module.generate_portfolio_allocation(level, session)
+        projections = app_module.calculate_projections(session, portfolio)
+        goal = projections["goal_achievement"]
+        responses = session["risk_responses"]
+        questionnaire = max(1, min(5, round(sum(r["score"] for r in responses) / (len(responses) * 4) * 4 + 1)))
+
+        assert (values["stocks"][i], values["bonds"][i], values["cash"][i]) == tuple(portfolio["allocation"].values())
+        assert values["recommended_monthly_investment"][i] == portfolio["recommended_monthly_investment"]
+        assert f"{values['expected_annual_return'][i]:.1%}" == projections["expected_annual_return"]
+        # Bit for bit, not approximately
+        assert values["projected_value"][i] == goal["projected_amount"]
+        assert values["projected_to_reach_target"][i] == goal["likely_to_achieve"]
+        assert app_module.explanation_variant(level, values["age_band"][i]) == \
+            app_module.generate_explanation(session, {}, level)
+        assert list(app_module.next_steps_variant(values["needs_emergency_fund"][i],
+                                                  values["debt_exceeds_savings"][i])) == \
+            app_module.generate_next_steps(session)
+        assert int(columns["questionnaire_risk_tolerance"][i]) == questionnaire
+
+
+def test_unknown_risk_level_is_rejected(app_module):
+    with pytest.raises(ValueError, match="Unknown risk levels"):
+        app_module.recommender.level_index(np.array([3, 7]))
@@ -0,0 +1,90 @@
+import gzip
+import json
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def questionnaire(client):
+    response = client.get("/get-risk-questions", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    return response
+
+
+def test_questionnaire_is_cacheable(questionnaire, app_module):
+    assert questionnaire.headers["ETag"] == app_module.RISK_QUESTIONS_ETAG
+    assert questionnaire.headers["Cache-Control"].startswith("public, max-age=")
+    assert "Accept-Encoding" in questionnaire.headers["Vary"]
+    assert "Content-Encoding" not in questionnaire.headers
+    body = questionnaire.json()
+    assert body["total_questions"] == len(body["questions"]) == len(app_module.RISK_QUESTIONS)
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", "W/{etag}", '"stale", {etag}', "*"])
+def test_matching_etag_gets_304(client, questionnaire, if_none_match):
+    etag = questionnaire.headers["ETag"]
+    response = client.get("/get-risk-questions", headers={"If-None-Match": if_none_match.format(etag=etag)})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_stale_etag_gets_the_body(client, questionnaire):
+    response = client.get("/get-risk-questions", headers={"If-None-Match": '"1-0000000000000000"',
+                                                          "Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.content == questionnaire.content
+
+
+@pytest.mark.parametrize("accept_encoding,expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0.5, deflate", "gzip"),
+    ("*", "gzip"),
+    ("gzip;q=0", None),
+    ("*;q=1, gzip;q=0", None),
+    ("x-gzip", None),
+    ("identity", None),
+])
+def test_encoding_follows_accept_encoding(client, app_module, questionnaire, monkeypatch, accept_encoding, expected):
+    # Negotiation between br and gzip must not depend on whether brotli is installed here
+    monkeypatch.delitem(app_module.RISK_QUESTIONS_BODIES, "br", raising=False)
+    response = client.get("/get-risk-questions", headers={"Accept-Encoding": accept_encoding})
+    assert response.headers.get("Content-Encoding") == expected
+    # httpx decodes gzip transparently, so every variant reads back as the same document
+    assert response.json() == questionnaire.json()
+
+
+def test_brotli_is_preferred_on_ties(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.RISK_QUESTIONS_BODIES, "br", b"")
+    assert app_module.negotiate_encoding("gzip, br") == "br"
+    assert app_module.negotiate_encoding("gzip, br;q=0.5") == "gzip"
+    assert app_module.negotiate_encoding("br;q=0, gzip;q=0") == "identity"
+
+
+def test_gzip_body_is_precompressed(app_module):
+    body = app_module.RISK_QUESTIONS_BODIES
+    assert gzip.decompress(body["gzip"]) == body["identity"]
+    assert json.loads(body["identity"])["questions"] == app_module.RISK_QUESTIONS
+
+
+def test_client_scores_are_replaced_by_the_questionnaire(client, app_module, questionnaire):
+    session_id = client.post("/start-assessment").json()["session_id"]
+    question = questionnaire.json()["questions"][0]
+    option = question["options"][0]
+    response = client.post(f"/submit-risk-assessment?session_id={session_id}", json=[
+        {"question_id": question["id"], "selected_option": option["value"], "score": 99},
+    ])
+    assert response.status_code == 200
+    stored = app_module.session_store.get(session_id).risk_responses_list()
+    assert stored == [{"question_id": question["id"], "selected_option": option["value"], "score": option["score"]}]
+
+
+@pytest.mark.parametrize("answers,detail", [
+    ([{"question_id": 1, "selected_option": "guess", "score": 1}], "Unknown option 'guess' for question 1"),
+    ([{"question_id": 99, "selected_option": "hold", "score": 1}], "Unknown option 'hold' for question 99"),
+])
+def test_unknown_answers_are_rejected(client, answers, detail):
+    session_id = client.post("/start-assessment").json()["session_id"]
+    response = client.post(f"/submit-risk-assessment?session_id={session_id}", json=answers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
@@ -0,0 +1,71 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring_index import ScoringIndex, ScoringIndexTooLarge
+
+FEATURE_NAMES = ["age", "income", "risk_tolerance", "investment_horizon"]
+# A few integer values per bounded feature keeps the SHAP table small
+SMALL_DOMAIN = {"age": (30, 32), "income": None, "risk_tolerance": (3, 4), "investment_horizon": (10, 11)}
+
+
+@pytest.fixture(scope="module")
+def model():
+    return joblib.load("model.joblib")
+
+
+@pytest.fixture(scope="module")
+def index(model):
+    return ScoringIndex(model)
+
+
+def profiles(**overrides):
+    return pd.DataFrame([dict({"age": 35, "income": 85000, "risk_tolerance": 3, "investment_horizon": 15}, **overrides)],
+                        columns=FEATURE_NAMES)
+
+
+def test_index_matches_model_predict(model, index):
+    X = pd.read_csv("synthetic_robo_advisor_data.csv")[FEATURE_NAMES]
+    assert index.validate(model, X) == 0
+    assert np.array_equal(index.predict(X), model.predict(X))
+
+
+@pytest.mark.parametrize("overrides", [{"age": 17}, {"age": 101}, {"age": 35.5}, {"investment_horizon": 51}])
+def test_out_of_domain_rows_use_the_fallback(model, index, overrides):
+    X = pd.concat([profiles(), profiles(**overrides)], ignore_index=True)
+    _, in_domain = index.locate(X)
+    assert in_domain.tolist() == [True, False]
+    assert np.array_equal(index.predict(X, fallback=model), model.predict(X))
+    with pytest.raises(ValueError, match="outside the scoring index domain"):
+        index.predict(X)
+
+
+def test_table_over_budget_is_rejected(model):
+    with pytest.raises(ScoringIndexTooLarge, match="budget"):
+        ScoringIndex(model, max_bytes=1024)
+
+
+def test_validate_counts_disagreements(model, index):
+    class Constant:
+        def predict(self, X):
+            return np.full(len(X), 1)
+
+    X = pd.read_csv("synthetic_robo_advisor_data.csv")[FEATURE_NAMES]
+    expected = int(np.sum(model.predict(X) != 1))
+    assert index.validate(Constant(), X, n_samples=1) >= expected > 0
+
+
+def test_shap_table_matches_the_explainer(model):
+    shap = pytest.importorskip("shap")
+    explainer = shap.TreeExplainer(model)
+    index = ScoringIndex(model, domain=SMALL_DOMAIN, explainer=explainer)
+    X = pd.DataFrame([[age, income, risk, years]
+                      for age in (30, 32) for income in (25000, 85000, 400000) for risk in (3, 4) for years in (10, 11)],
+                     columns=FEATURE_NAMES)
+    rows, in_domain = index.shap_values(X)
+    assert in_domain.all()
+    values = np.asarray(explainer.shap_values(X))
+    predicted = np.searchsorted(model.classes_, model.predict(X))
+    assert np.allclose(rows, values[np.arange(len(X)), :, predicted])
+    assert ScoringIndex(model, domain=SMALL_DOMAIN).shap_values(X) is None
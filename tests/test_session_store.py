@@ -0,0 +1,92 @@
+import types
+
+import pytest
+
+import session_store
+from session_store import AssessmentSession, MemorySessionStore, SessionStore, SQLiteSessionStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen replacement for the store's time module; advance with ``clock.now += seconds``"""
+    fake = types.SimpleNamespace(now=1000.0)
+    fake.time = fake.monotonic = lambda: fake.now
+    monkeypatch.setattr(session_store, "time", fake)
+    return fake
+
+
+def completed_session(session_id="s1"):
+    session = AssessmentSession(session_id=session_id, created_at="2024-01-01T00:00:00")
+    session.set_demographics({"age": 35, "income": 85000, "employment_status": "employed",
+                              "location": "Austin", "dependents": 2, "marital_status": "married"})
+    session.set_financial_goals({"primary_goal": "retirement", "target_amount": None, "time_horizon": 20,
+                                 "current_savings": 25000.5, "monthly_expenses": 4000,
+                                 "existing_debt": 0, "emergency_fund_months": 6})
+    session.set_risk_responses([{"question_id": 1, "selected_option": "hold", "score": 3},
+                                {"question_id": 2, "selected_option": "growth", "score": 4}])
+    session.status = "completed"
+    session.completed = True
+    session.completed_at = "2024-01-01T00:05:00"
+    session.risk_scores = (4, 3)
+    return session
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, clock):
+    if request.param == "memory":
+        return MemorySessionStore(ttl_seconds=60, max_sessions=2)
+    return SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60, max_sessions=2, purge_interval=0)
+
+
+def test_session_expires_after_idle_ttl(store, clock):
+    store.save(completed_session("a"))
+    clock.now += 50
+    # Saving again resets the idle timer
+    store.save(store.get("a"))
+    clock.now += 50
+    assert "a" in store
+    clock.now += 11
+    assert store.get("a") is None
+    assert store.count() == 0
+
+
+def test_oldest_session_is_dropped_over_the_cap(store, clock):
+    for session_id in ("a", "b", "c"):
+        store.save(completed_session(session_id))
+        clock.now += 1
+    assert store.get("a") is None
+    assert sorted(session.session_id for session in store.iter_sessions()) == ["b", "c"]
+    assert len(store) == 2
+    store.delete("b")
+    assert store.count() == 1
+
+
+def test_sqlite_round_trip_is_shared_between_stores(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    session = completed_session()
+    SQLiteSessionStore(path).save(session)
+    # A second store on the same file stands in for another worker process
+    loaded = SQLiteSessionStore(path).get(session.session_id)
+    assert loaded == session
+    assert loaded.as_dict() == session.as_dict()
+    assert AssessmentSession.from_record(session.to_record()) == session
+
+
+def test_backend_is_chosen_by_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("SESSION_TTL_SECONDS", "5")
+    monkeypatch.setenv("SESSION_MAX_COUNT", "7")
+    monkeypatch.delenv("SESSION_BACKEND", raising=False)
+    memory = session_store.create_session_store()
+    assert isinstance(memory, MemorySessionStore)
+    assert (memory.ttl_seconds, memory.max_sessions) == (5, 7)
+
+    monkeypatch.setenv("SESSION_BACKEND", "sqlite")
+    monkeypatch.setenv("SESSION_DB_PATH", str(tmp_path / "shared.db"))
+    sqlite = session_store.create_session_store()
+    assert isinstance(sqlite, SQLiteSessionStore)
+    assert sqlite.path == str(tmp_path / "shared.db")
+
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
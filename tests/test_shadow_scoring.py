@@ -0,0 +1,37 @@
+from metrics import MetricsRegistry
+from shadow_scoring import ShadowStats
+
+
+def test_shadow_report_and_metrics_use_the_same_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("model_seconds", "Prediction latency", ("role",))
+    stats = ShadowStats(latency)
+    for seconds in (0.0004, 0.002, 0.002, 0.03):
+        stats.record_latency("primary", seconds)
+    stats.record_latency("candidate", 20.0)
+
+    report = stats.snapshot()["latency"]
+    assert report["primary"]["count"] == 4
+    assert report["primary"]["p50_ms"] == 2.5
+    assert report["primary"]["p99_ms"] == 50.0
+    assert report["candidate"]["p50_ms"] is None  # beyond the last bucket
+    rendered = registry.render()
+    assert 'model_seconds_count{role="primary"} 4' in rendered
+    assert 'model_seconds_bucket{role="primary",le="0.0025"} 3' in rendered
+
+
+def test_reset_keeps_exported_counters_monotonic():
+    registry = MetricsRegistry()
+    latency = registry.histogram("model_seconds", "Prediction latency", ("role",))
+    stats = ShadowStats(latency)
+    stats.record_latency("primary", 0.002)
+    stats.record_latency("candidate", 0.004)
+
+    # A new candidate starts a fresh report, but /metrics keeps counting
+    stats.reset()
+    assert stats.snapshot()["latency"] == {}
+    stats.record_latency("primary", 0.002)
+    assert stats.snapshot()["latency"]["primary"]["count"] == 1
+    rendered = registry.render()
+    assert 'model_seconds_count{role="primary"} 2' in rendered
+    assert 'model_seconds_count{role="candidate"} 1' in rendered
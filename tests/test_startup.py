@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+PROFILE = {"age": 35, "income": 85000, "risk_tolerance": 3, "investment_horizon": 15}
+
+
+@pytest.fixture
+def lazy_app(app_module, monkeypatch):
+    """The app as a fresh lazy-mode process sees it: no model yet, own executor, writer and shadow router"""
+    for name, value in (("STARTUP_MODE", "lazy"), ("active_bundle", None), ("previous_bundle", None),
+                        ("startup_error", None), ("startup_timings", {}), ("inference_executor", None),
+                        ("log_writer", None), ("shadow_router", app_module.create_shadow_router())):
+        monkeypatch.setattr(app_module, name, value)
+    return app_module
+
+
+def wait_for_ready(client, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/readyz")
+        if response.status_code == 200:
+            return response.json()
+        time.sleep(0.05)
+    raise AssertionError("model did not finish loading")
+
+
+def test_probes_while_the_model_loads(lazy_app, monkeypatch):
+    release = threading.Event()
+    load_model = lazy_app.load_model
+
+    def slow_load_model():
+        release.wait(30)
+        return load_model()
+
+    monkeypatch.setattr(lazy_app, "load_model", slow_load_model)
+    with TestClient(lazy_app.app) as client:
+        try:
+            assert client.get("/healthz").json() == {"status": "ok"}
+            response = client.get("/readyz")
+            assert response.status_code == 503
+            assert response.json()["status"] == "loading" and not response.json()["model_loaded"]
+
+            response = client.post("/predict", json=PROFILE)
+            assert response.status_code == 503
+            assert response.json()["detail"] == "Model is still loading"
+            assert "Retry-After" in response.headers
+            # Requests that need no model are served during the load
+            assert client.get("/get-risk-questions").status_code == 200
+        finally:
+            release.set()
+
+        body = wait_for_ready(client)
+        assert body["status"] == "ready" and body["startup_mode"] == "lazy"
+        assert body["model_version"] == lazy_app.active_bundle.version
+        assert "model_load" in body["startup_timings"]
+        assert client.post("/predict", json=PROFILE).status_code == 200
+
+
+def test_failed_load_is_reported(lazy_app, monkeypatch):
+    def broken_load_model():
+        raise RuntimeError("model.joblib is corrupt")
+
+    monkeypatch.setattr(lazy_app, "load_model", broken_load_model)
+    with TestClient(lazy_app.app) as client:
+        deadline = time.monotonic() + 10
+        while lazy_app.startup_error is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["status"] == "failed"
+        assert response.json()["error"] == "model.joblib is corrupt"
+        assert client.get("/healthz").status_code == 200
+        assert client.post("/predict", json=PROFILE).json()["detail"] == "Model failed to load: model.joblib is corrupt"
+
+
+def test_eager_mode_is_ready_at_startup(client):
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json()["model_loaded"] and response.json()["explainer_ready"]
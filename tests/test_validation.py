@@ -0,0 +1,29 @@
+import pytest
+
+PROFILE = {"age": 35, "income": 85000, "risk_tolerance": 3, "investment_horizon": 15}
+LIMITS = {"age": (18, 100), "income": (20000, 50000000), "risk_tolerance": (1, 5), "investment_horizon": (1, 50)}
+
+
+@pytest.mark.parametrize("endpoint", ["/predict", "/explain"])
+@pytest.mark.parametrize("field", sorted(LIMITS))
+def test_profile_bounds(client, endpoint, field):
+    low, high = LIMITS[field]
+    for value in (low, high):
+        assert client.post(endpoint, json=dict(PROFILE, **{field: value})).status_code == 200
+    for value in (low - 1, high + 1):
+        response = client.post(endpoint, json=dict(PROFILE, **{field: value}))
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", field]
+
+
+@pytest.mark.parametrize("endpoint", ["/predict/batch", "/explain/batch"])
+def test_batch_reports_every_invalid_row(client, endpoint):
+    rows = [PROFILE, dict(PROFILE, age=17), PROFILE, dict(PROFILE, risk_tolerance=9, income=-1)]
+    response = client.post(endpoint, json=rows)
+    assert response.status_code == 422
+    locations = [error["loc"] for error in response.json()["detail"]]
+    assert locations == [["body", 1, "age"], ["body", 3, "income"], ["body", 3, "risk_tolerance"]]
+
+    response = client.post(endpoint, json=[PROFILE, dict(PROFILE, age=100)])
+    assert response.status_code == 200
+    assert response.json()["total_profiles"] == 2
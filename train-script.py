@@ -1,52 +1,317 @@
-#Generate a synthetic dataset with features: age, income, risk_tolerance, investment_horizon, and target risk_level (1-5).
+"""Train the risk-level RandomForest used by the API.
 
+Training data is parsed in chunks from CSV files (age, income,
+risk_tolerance, investment_horizon, risk_level) and/or assessment log
+segments (``assessment_logs*.jsonl``, ``.gz`` or ``.zst``). Parsing never
+holds a whole file or DataFrame, but the forest is fitted on the full
+matrix, so the compact int32 feature and int8 label arrays of every row
+(17 bytes per row) are concatenated in memory. Log rows need an explicit
+``--label-field``: the logs carry no independent label by default, and
+training on ``ml_predicted_risk_score`` would fit the model to its own
+predictions. Trees are fitted on all cores
+(``--n-jobs``). ``--add-trees N`` warm-starts the existing model and fits N
+more trees on the new data instead of retraining from scratch.
+
+A run is skipped when the data hash, the hyperparameters and the
+scikit-learn version all match the last run that wrote ``--output``
+(recorded in ``<output>.train.json``); ``--force`` retrains anyway. The
+record is local to the working tree and not committed, so a fresh checkout
+(such as every deploy build) always trains once.
+
+Besides the joblib pickle, every run writes ``--compact-output``
+(``model.forest``), the pickle-free artifact the API loads first (see
+model_artifact.py).
+
+Examples:
+    python train-script.py                                   # synthetic_robo_advisor_data.csv
+    python train-script.py --data "labelled_logs*.jsonl" --label-field risk_level --register --activate
+    python train-script.py --data new_rows.csv --add-trees 20
+    python train-script.py --generate-rows 1000000 --data big.csv
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+import joblib
 import numpy as np
 import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
 
-np.random.seed(42)
-size = 1000
-df = pd.DataFrame({
-    'age': np.random.randint(18, 70, size),
-    'income': np.random.randint(30000, 200000, size),
-    'risk_tolerance': np.random.randint(1, 6, size),        # 1 (low risk) to 5 (high risk)
-    'investment_horizon': np.random.randint(1, 31, size),   # years
-})
+from log_index import open_segment
+from model_artifact import artifact_metadata, export_forest
+from model_registry import file_digest
 
-# Simulate risk level (target)
-df['risk_level'] = (0.3*(df['income']<80000) + 
-                    0.4*(df['age']<35) + 
-                    0.6*(df['risk_tolerance']) + 
-                    0.1*(df['investment_horizon']>10)).round().astype(int)
-df['risk_level'] = df['risk_level'].clip(1, 5)
+FEATURE_NAMES = ["age", "income", "risk_tolerance", "investment_horizon"]
+TARGET = "risk_level"
+DEFAULT_DATA = "synthetic_robo_advisor_data.csv"
 
-#Print first few rows of the dataset
-print(df.head())
 
+def generate_synthetic(size=1000, seed=42):
+    """Synthetic dataset with features age, income, risk_tolerance, investment_horizon and target risk_level (1-5)"""
+    np.random.seed(seed)
+    df = pd.DataFrame({
+        'age': np.random.randint(18, 70, size),
+        'income': np.random.randint(30000, 200000, size),
+        'risk_tolerance': np.random.randint(1, 6, size),        # 1 (low risk) to 5 (high risk)
+        'investment_horizon': np.random.randint(1, 31, size),   # years
+    })
 
-# Train-test split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-import mlflow
-import mlflow.sklearn
-import joblib
+    # Simulate risk level (target)
+    df['risk_level'] = (0.3*(df['income']<80000) +
+                        0.4*(df['age']<35) +
+                        0.6*(df['risk_tolerance']) +
+                        0.1*(df['investment_horizon']>10)).round().astype(int)
+    df['risk_level'] = df['risk_level'].clip(1, 5)
+    return df
+
+
+def iter_csv_chunks(path, chunk_size):
+    """(features, labels) array chunks from a CSV file"""
+    columns = FEATURE_NAMES + [TARGET]
+    for chunk in pd.read_csv(path, usecols=columns, dtype={name: np.int32 for name in columns}, chunksize=chunk_size):
+        yield chunk[FEATURE_NAMES].to_numpy(np.int32), chunk[TARGET].to_numpy(np.int8)
+
+
+def log_row(entry, label_field):
+    """Feature row and label of one assessment log entry, or None if it has no recommendation or label"""
+    recommendation = entry.get("recommendation")
+    if not recommendation or not entry.get("demographics") or not entry.get("financial_goals"):
+        return None
+    # A label added to the entry itself (e.g. an adviser review) wins over the logged recommendation fields
+    label = entry.get(label_field, recommendation.get(label_field))
+    if label is None:
+        return None
+    return (
+        entry["demographics"]["age"],
+        entry["demographics"]["income"],
+        # The questionnaire score is the risk_tolerance feature the model was scored with
+        recommendation["questionnaire_risk_score"],
+        entry["financial_goals"]["time_horizon"],
+        label,
+    )
+
+
+def iter_log_chunks(path, chunk_size, label_field):
+    """(features, labels) array chunks from an assessment log segment"""
+    rows = []
+    with open_segment(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = log_row(json.loads(line), label_field)
+            if row is not None:
+                rows.append(row)
+            if len(rows) >= chunk_size:
+                block = np.array(rows, dtype=np.int32)
+                yield block[:, :-1], block[:, -1].astype(np.int8)
+                rows = []
+    if rows:
+        block = np.array(rows, dtype=np.int32)
+        yield block[:, :-1], block[:, -1].astype(np.int8)
+
+
+def expand_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if not matches and not glob.has_magic(pattern):
+            raise FileNotFoundError(pattern)
+        paths.extend(matches)
+    return paths
+
+
+def load_training_data(paths, chunk_size=100000, label_field=None):
+    """(X, y, data_hash) from CSV and JSONL sources; the hash covers the parsed rows, not file bytes"""
+    digest = hashlib.sha256()
+    features, labels = [], []
+    for path in paths:
+        is_log = ".jsonl" in os.path.basename(path)
+        if is_log and not label_field:
+            raise ValueError(f"{path} is an assessment log: pass label_field (--label-field) to choose its label")
+        chunks = iter_log_chunks(path, chunk_size, label_field) if is_log else iter_csv_chunks(path, chunk_size)
+        for X_chunk, y_chunk in chunks:
+            X_chunk = np.ascontiguousarray(X_chunk, dtype=np.int32)
+            # Hash whole rows so the result does not depend on where chunks split
+            digest.update(np.column_stack([X_chunk, y_chunk.astype(np.int32)]).tobytes())
+            features.append(X_chunk)
+            labels.append(y_chunk)
+    if not features:
+        raise ValueError("No training rows found in " + ", ".join(paths))
+    X = pd.DataFrame(np.concatenate(features), columns=FEATURE_NAMES)
+    return X, np.concatenate(labels), digest.hexdigest()
 
-X = df.drop('risk_level', axis=1)
-y = df['risk_level']
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+def state_path(output):
+    return output + ".train.json"
 
-with mlflow.start_run(run_name="RoboAdvisorRandomForest"):
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
+
+def read_state(output):
+    try:
+        with open(state_path(output)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def fit_model(X_train, y_train, n_estimators=100, max_depth=None, n_jobs=-1, random_state=42, base_model=None):
+    """Fit a new forest, or add n_estimators trees to base_model with warm_start"""
+    if base_model is None:
+        model = RandomForestClassifier(
+            n_estimators=n_estimators, max_depth=max_depth, n_jobs=n_jobs, random_state=random_state
+        )
+    else:
+        if set(np.unique(y_train)) != set(base_model.classes_.tolist()):
+            raise ValueError(
+                f"Warm start needs the same classes as the existing model {base_model.classes_.tolist()}, "
+                f"got {sorted(set(np.unique(y_train).tolist()))}"
+            )
+        model = base_model
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_estimators, n_jobs=n_jobs)
     model.fit(X_train, y_train)
-    accuracy = model.score(X_test, y_test)
-    mlflow.log_metric("test_accuracy", accuracy)
-    mlflow.sklearn.log_model(model, "robo_model")
-    joblib.dump(model, "model.joblib")
+    # The API scores one request at a time: don't spin up a worker pool per predict call
+    model.set_params(n_jobs=None, warm_start=False)
+    return model
+
+
+def export_compact(model_path, compact_path, model=None):
+    """Write the pickle-free artifact for model_path unless an up-to-date one exists"""
+    digest = file_digest(model_path)
+    existing = artifact_metadata(compact_path)
+    if existing and existing.get("source_digest") == digest:
+        return
+    model = model if model is not None else joblib.load(model_path)
+    size = export_forest(model, compact_path, metadata={"source_digest": digest})
+    print(f"✅ Compact artifact {compact_path}: {size / 1024:.0f} KB "
+          f"(pickle {os.path.getsize(model_path) / 1024:.0f} KB)")
+
+
+def log_to_mlflow(model, params, accuracy):
+    """Record the run in MLflow when it is installed"""
+    try:
+        import mlflow
+        import mlflow.sklearn
+    except ImportError:
+        print("⚠️ mlflow not installed, skipping experiment tracking")
+        return
+    with mlflow.start_run(run_name="RoboAdvisorRandomForest"):
+        mlflow.log_params(params)
+        mlflow.log_metric("test_accuracy", accuracy)
+        mlflow.sklearn.log_model(model, "robo_model")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the risk-level model")
+    parser.add_argument("--data", nargs="+", default=[DEFAULT_DATA],
+                        help="CSV files and/or assessment log segments (globs allowed)")
+    parser.add_argument("--output", default="model.joblib")
+    parser.add_argument("--compact-output", default="model.forest",
+                        help="pickle-free artifact loaded by the API ('' to skip the export)")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--label-field",
+                        help="entry or recommendation field used as the label for assessment log rows "
+                             "(required for log sources)")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="cores used to fit trees (-1: all)")
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--add-trees", type=int, metavar="N",
+                        help="warm-start the existing --output model and fit N more trees on the data")
+    parser.add_argument("--generate-rows", type=int, metavar="N",
+                        help="write an N-row synthetic dataset to the (single) --data path first")
+    parser.add_argument("--force", action="store_true", help="retrain even if data and parameters are unchanged")
+    parser.add_argument("--mlflow", action="store_true", default=bool(os.environ.get("MLFLOW_TRACKING_URI")),
+                        help="log the run to MLflow (default when MLFLOW_TRACKING_URI is set)")
+    parser.add_argument("--register", action="store_true", help="add the trained model to the model registry")
+    parser.add_argument("--activate", action="store_true", help="make the registered version the active one")
+    return parser.parse_args(argv)
 
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.generate_rows or args.data == [DEFAULT_DATA] and not os.path.exists(DEFAULT_DATA):
+        if len(args.data) != 1:
+            raise SystemExit("--generate-rows needs exactly one --data path")
+        generate_synthetic(args.generate_rows or 1000).to_csv(args.data[0], index=False)
+        print(f"✅ Synthetic dataset written to {args.data[0]}")
+
+    started = time.perf_counter()
+    if args.label_field == "ml_predicted_risk_score":
+        print("⚠️ ml_predicted_risk_score labels are the model's own predictions; retraining on them only reinforces it")
+    X, y, data_hash = load_training_data(expand_paths(args.data), args.chunk_size, args.label_field)
+    load_seconds = time.perf_counter() - started
+    print(f"✅ Loaded {len(X):,} rows in {load_seconds:.1f}s (data hash {data_hash[:12]})")
+
+    params = {
+        "n_estimators": args.n_estimators,
+        "max_depth": args.max_depth,
+        "random_state": args.random_state,
+        "test_size": args.test_size,
+        "add_trees": args.add_trees,
+        "sklearn_version": sklearn.__version__,
+    }
+    state = read_state(args.output)
+    if (not args.force and os.path.exists(args.output) and state
+            and state.get("data_hash") == data_hash and state.get("params") == params):
+        print(f"✅ {args.output} is up to date (same data and parameters), skipping training")
+        if args.compact_output:
+            export_compact(args.output, args.compact_output)
+        return state
+
+    base_model = None
+    if args.add_trees:
+        base_model = joblib.load(args.output)
+        print(f"🔄 Adding {args.add_trees} trees to {len(base_model.estimators_)} in {args.output}")
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=args.test_size, random_state=args.random_state)
+    started = time.perf_counter()
+    model = fit_model(
+        X_train, y_train,
+        n_estimators=args.add_trees or args.n_estimators,
+        max_depth=args.max_depth,
+        n_jobs=args.n_jobs,
+        random_state=args.random_state,
+        base_model=base_model,
+    )
+    fit_seconds = time.perf_counter() - started
+    accuracy = model.score(X_test, y_test)
     print(f"Test Accuracy: {accuracy}")
+
+    joblib.dump(model, args.output)
+    state = {
+        "data_hash": data_hash,
+        "params": params,
+        "rows": len(X),
+        "n_estimators": len(model.estimators_),
+        "test_accuracy": accuracy,
+        "fit_seconds": round(fit_seconds, 3),
+        "trained_at": datetime.now().isoformat(),
+    }
+    with open(state_path(args.output), "w") as f:
+        json.dump(state, f, indent=2)
+    print(f"✅ Model with {len(model.estimators_)} trees saved to {args.output} (fit {fit_seconds:.1f}s)")
+    if args.compact_output:
+        export_compact(args.output, args.compact_output, model)
+
+    if args.mlflow:
+        log_to_mlflow(model, params, accuracy)
+    if args.register or args.activate:
+        from model_registry import create_model_registry
+        registry = create_model_registry()
+        metadata = registry.register(args.output, training_accuracy=accuracy, extra={"data_hash": data_hash})
+        if args.activate:
+            registry.set_active(metadata["version"])
+        print(f"✅ Registered model version {metadata['version']}" + (" (active)" if args.activate else ""))
     print("Model training complete.")
-    mlflow.end_run()
+    return state
 
-# Save the dataset to a CSV file
-df.to_csv("synthetic_robo_advisor_data.csv", index=False)
 
+if __name__ == "__main__":
+    main()